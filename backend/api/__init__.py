@@ -3,10 +3,9 @@ API module. Uses FastAPI.
 """
 
 import os
-import time
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Response, Path as FPath
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -15,7 +14,13 @@ import django
 
 django.setup()
 
+from django.conf import settings
+from api import internal, metrics
+from api.db import DatabaseConnectionsMiddleware
 from api.v1 import router as v1_router
+from rental_ms.cpu_profiler import CPUProfilerASGIMiddleware
+from rental_ms.db_router import ReplicaRoutingASGIMiddleware
+from rental_ms.sql_profiler import SQLProfilerASGIMiddleware
 from rental_ms.settings import (
     STATIC_URL,
     MEDIA_URL,
@@ -30,7 +35,6 @@ api_prefix = "/api"
 app = FastAPI(
     title="House-Rental-Management-System API",
     version=api_module_path.joinpath("VERSION").read_text().strip(),
-    description=api_module_path.joinpath("README.md").read_text(),
     license_info={
         "name": "GPLv3 License",
         "url": "https://raw.githubusercontent.com/Simatwa/house-rental-management-system/refs/heads/main/LICENSE",
@@ -41,15 +45,23 @@ app = FastAPI(
 )
 
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response: Response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+def openapi():
+    """Generates the openapi schema, reading `README.md` only when it's requested"""
+    if app.openapi_schema is None:
+        app.description = api_module_path.joinpath("README.md").read_text()
+    return FastAPI.openapi(app)
 
 
+app.openapi = openapi
+
+
+metrics.instrument()
+app.add_middleware(DatabaseConnectionsMiddleware)
+app.add_middleware(ReplicaRoutingASGIMiddleware)
+app.add_middleware(SQLProfilerASGIMiddleware)
+app.add_middleware(CPUProfilerASGIMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -62,31 +74,28 @@ app.add_middleware(
 app.mount(STATIC_URL[:-1], StaticFiles(directory=STATIC_ROOT), name="static")
 app.mount(MEDIA_URL[:-1], StaticFiles(directory=MEDIA_ROOT), name="media")
 
-from django.core.handlers.wsgi import WSGIHandler
-
-from fastapi.middleware.wsgi import WSGIMiddleware
-
 # Include API router
 app.include_router(v1_router, prefix=api_prefix)
+app.include_router(internal.router, prefix=api_prefix)
+
+if settings.MOUNT_DJANGO_APP:
+    from rental_ms.asgi import application as django_application
 
-app.mount("/d", app=WSGIMiddleware(WSGIHandler()), name="django")
+    app.mount("/d", app=django_application, name="django")
 
 if FRONTEND_DIR:
+    from api.frontend import IndexShell
 
-    def get_index_reponse():
-        file_path = FRONTEND_DIR / "index.html"
-        if file_path.exists():
-            return Response(content=file_path.read_text(), media_type="text/html")
-        return Response(content="index.html not found", status_code=404)
+    index_shell = IndexShell(FRONTEND_DIR / "index.html")
 
     @app.get("/{path}", name="React requests hit here", include_in_schema=False)
-    def serve_react_app(path: str):
-        return get_index_reponse()
+    async def serve_react_app(path: str, request: Request):
+        return index_shell.response(request)
 
     @app.get(
         "/dashboard/{path}", name="React requests hit here", include_in_schema=False
     )
-    def serve_react_app_dashboard(path: str):
-        return get_index_reponse()
+    async def serve_react_app_dashboard(path: str, request: Request):
+        return index_shell.response(request)
 
     app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="frontend")
@@ -1,4 +1,77 @@
+import os
+from typing import Annotated, Optional
+
+import typer
 from fastapi_cli.cli import app
 
+
+@app.command()
+def serve(
+    app_path: Annotated[
+        str, typer.Argument(help="Import string of the ASGI app to serve")
+    ] = "api:app",
+    host: Annotated[str, typer.Option(help="Address to bind to")] = "0.0.0.0",
+    port: Annotated[int, typer.Option(help="Port to bind to")] = 8000,
+    workers: Annotated[
+        int, typer.Option(help="Worker processes to fork", min=1)
+    ] = os.cpu_count() or 1,
+    threadpool_size: Annotated[
+        int, typer.Option(help="Threads per worker for sync routes & dependencies")
+    ] = 40,
+    limit_concurrency: Annotated[
+        Optional[int],
+        typer.Option(help="Connections per worker before responding with 503"),
+    ] = None,
+    backlog: Annotated[int, typer.Option(help="Pending connections queue size")] = 2048,
+    keep_alive: Annotated[int, typer.Option(help="Keep-alive timeout in seconds")] = 5,
+    graceful_timeout: Annotated[
+        int, typer.Option(help="Seconds given to in-flight requests on shutdown/reload")
+    ] = 30,
+    log_level: Annotated[str, typer.Option(help="Log level")] = "info",
+):
+    """Production server: preloads the app once and forks workers sharing it.
+
+    Send [blue]SIGHUP[/] to the master for a graceful reload.
+    """
+    from api.server import PreforkServer
+
+    PreforkServer(
+        app_path,
+        host=host,
+        port=port,
+        workers=workers,
+        threadpool_size=threadpool_size,
+        limit_concurrency=limit_concurrency,
+        backlog=backlog,
+        keep_alive=keep_alive,
+        graceful_timeout=graceful_timeout,
+        log_level=log_level,
+    ).run()
+
+
+@app.command()
+def sql_profile_token():
+    """Prints a token for the `X-SQL-Profile` header, enabling SQL profiling of a request"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+    import django
+
+    django.setup()
+    from rental_ms.sql_profiler import generate_token
+
+    print(generate_token())
+
+
+@app.command()
+def cpu_profile_token():
+    """Prints a token for the `X-CPU-Profile` header, enabling CPU profiling of a request"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+    import django
+
+    django.setup()
+    from rental_ms.cpu_profiler import generate_token
+
+    print(generate_token())
+
+
 if __name__ == "__main__":
     app()
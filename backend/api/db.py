@@ -0,0 +1,58 @@
+"""Lifecycle of the database connections used by the API
+
+Django releases its connections at the end of its own requests only. The API
+runs the ORM on threads Django knows nothing about:
+
+- Sync routes and dependencies run on the anyio threadpool.
+- Async ORM calls (`aget`, `async for` ...) run on the thread of the tenant
+  route's `ThreadSensitiveContext`, or else on asgiref's single thread.
+
+Their connections are released here after each sync route
+(`api.routing.ThreadpoolRoute`), after each route for its context's thread
+(`api.v1.utils.ThreadSensitiveContexts`), and after each request for asgiref's
+thread. Connections past `CONN_MAX_AGE` or found broken are closed, and the
+rest are kept for reuse by the thread. With pooling (PostgreSQL,
+`DATABASE_POOL_MAX_SIZE`) they are returned to the pool instead.
+Either way a worker holds at most one connection per thread or
+`DATABASE_POOL_MAX_SIZE` connections.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+
+def release_connections(func):
+    """Wraps a callable about to run on a thread so that the connections
+    it used are released once it returns"""
+
+    def func_releasing_connections(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return func_releasing_connections
+
+
+def get_pool_stats() -> dict | None:
+    """Stats of the `default` connection pool, `None` when pooling is off"""
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not connection.settings_dict["OPTIONS"].get("pool"):
+        return None
+    return connection.pool.get_stats()
+
+
+class DatabaseConnectionsMiddleware:
+    """Releases the connection of asgiref's thread once a request is handled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Thread sensitive, so it runs on the thread of the async ORM calls
+            await sync_to_async(close_old_connections)()
@@ -0,0 +1,101 @@
+"""Serves the React app shell (`index.html`) from memory"""
+
+import gzip
+import hashlib
+import re
+import time
+from pathlib import Path
+
+from fastapi import Request, Response
+
+entry_script_pattern = re.compile(
+    r"<script[^>]*type=\"module\"[^>]*src=\"(?P<src>[^\"]+)\"", re.IGNORECASE
+)
+"""Matches the bundled entry script e.g `/assets/index-D1mQ0K6C.js`"""
+
+entry_style_pattern = re.compile(
+    r"<link[^>]*rel=\"stylesheet\"[^>]*crossorigin[^>]*href=\"(?P<href>[^\"]+)\"",
+    re.IGNORECASE,
+)
+"""Matches the bundled entry stylesheet e.g `/assets/index-C67XP936.css`"""
+
+
+class IndexShell:
+    """Keeps `index.html` together with its gzipped form in memory.
+
+    The file is only re-read when its modification time changes and
+    the modification time itself is checked at most once per `check_interval`
+    seconds, so serving the shell does not hit the filesystem per request.
+    """
+
+    cache_control = "no-cache"
+    """Browsers have to revalidate the shell (cheap `304`) since the bundle
+    names it references change on every frontend build"""
+
+    def __init__(self, file_path: Path, check_interval: float = 2):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self.content: bytes | None = None
+        self.gzipped_content: bytes | None = None
+        self.etag: str | None = None
+        self.link: str | None = None
+        self._mtime: int | None = None
+        self._next_check: float = 0
+        self.refresh()
+
+    def load(self, mtime: int):
+        content = self.file_path.read_bytes()
+        self.gzipped_content = gzip.compress(content, compresslevel=9)
+        self.etag = '"%s"' % hashlib.md5(content).hexdigest()
+        self.link = self.get_preload_link(content.decode())
+        self.content = content
+        self._mtime = mtime
+
+    def refresh(self):
+        """Reloads the shell if `index.html` has changed since the last check"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = self.file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.content = self.gzipped_content = self.etag = self.link = None
+            self._mtime = None
+            return
+        if mtime != self._mtime:
+            self.load(mtime)
+
+    @staticmethod
+    def get_preload_link(html: str) -> str | None:
+        """`Link` header value preloading the entry bundle"""
+        links = []
+        for match in entry_script_pattern.finditer(html):
+            links.append(f"<{match.group('src')}>; rel=modulepreload; crossorigin")
+        for match in entry_style_pattern.finditer(html):
+            links.append(f"<{match.group('href')}>; rel=preload; as=style; crossorigin")
+        return ", ".join(links) or None
+
+    def response(self, request: Request) -> Response:
+        self.refresh()
+        if self.content is None:
+            return Response(content="index.html not found", status_code=404)
+
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.link:
+            headers["Link"] = self.link
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                content=self.gzipped_content, media_type="text/html", headers=headers
+            )
+        return Response(content=self.content, media_type="text/html", headers=headers)
@@ -0,0 +1,73 @@
+"""Internal endpoints meant for the operators and monitoring only.
+
+Requests have to carry the `X-Internal-Token` header matching `INTERNAL_API_TOKEN`.
+Without a token set, nothing is served - unless `INTERNAL_API_ALLOW_LOOPBACK` is on,
+serving requests from the loopback interface. Don't turn it on behind a reverse
+proxy on the same host, every request would come from the loopback interface.
+"""
+
+import secrets
+from typing import Annotated
+
+from django.conf import settings
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from api import metrics
+from api.routing import ThreadpoolRoute
+from rental_ms import cpu_profiler
+
+loopback_hosts = ("127.0.0.1", "::1", "localhost")
+
+
+async def verify_internal_access(
+    request: Request,
+    x_internal_token: Annotated[str | None, Header()] = None,
+):
+    if settings.INTERNAL_API_TOKEN:
+        if x_internal_token and secrets.compare_digest(
+            x_internal_token, settings.INTERNAL_API_TOKEN
+        ):
+            return
+    elif (
+        settings.INTERNAL_API_ALLOW_LOOPBACK
+        and request.client
+        and request.client.host in loopback_hosts
+    ):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not allowed",
+    )
+
+
+router = APIRouter(
+    prefix="/internal",
+    dependencies=[Depends(verify_internal_access)],
+    include_in_schema=False,
+    route_class=ThreadpoolRoute,
+)
+
+
+@router.get("/metrics", name="Prometheus metrics")
+async def get_metrics():
+    return metrics.metrics_response()
+
+
+@router.get("/profiles", name="Recent CPU profiles")
+def get_profiles() -> list[dict]:
+    return [
+        cpu_profiler.get_profile_info(file_path)
+        for file_path in cpu_profiler.list_profiles()
+    ]
+
+
+@router.get("/profiles/{name}", name="Download CPU profile")
+def download_profile(name: str):
+    for file_path in cpu_profiler.list_profiles():
+        if file_path.name == name:
+            return FileResponse(file_path, media_type="application/json")
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Profile not found",
+    )
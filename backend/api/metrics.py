@@ -0,0 +1,374 @@
+"""Request metrics exposed in the Prometheus text format
+
+Per route template it records:
+
+- Latency histogram, request count by status (error rates) and requests in flight.
+- Database queries made and the time spent on them.
+- Time spent waiting for a thread and running on it by sync routes
+  (`api.routing.ThreadpoolRoute`).
+
+Database connections opened are counted and, with pooling on, the pool's
+utilization and the time spent waiting for a pool connection are exposed.
+
+Metrics are kept per process - every worker of the production server is
+to be scraped on its own or through a `worker` label added by the scraper.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from anyio import to_thread
+from django.db.backends.signals import connection_created
+from fastapi import Response
+
+from api.db import get_pool_stats
+
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+"""Request duration buckets in seconds"""
+
+query_count_buckets = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+"""Database queries per request buckets"""
+
+wait_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+"""Threadpool wait buckets in seconds"""
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def format_labels(self, labels: tuple, **extra) -> str:
+        pairs = list(zip(self.labelnames, labels)) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{%s}" % ",".join(
+            '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+            for name, value in pairs
+        )
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, self.format_labels(labels), value
+
+    def expose(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {value:g}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, labels: tuple = (), value: float = 0):
+        """For totals counted elsewhere e.g by the connection pool"""
+        self.values[labels] = value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple = (), value: float = 0):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = {}
+
+    def observe(self, labels: tuple, value: float):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def samples(self):
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket", self.format_labels(labels, le=le), cumulative
+            yield f"{self.name}_sum", self.format_labels(labels), self.sums[labels]
+            yield f"{self.name}_count", self.format_labels(labels), cumulative
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        return "\n".join(metric.expose() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+requests_total = registry.register(
+    Counter(
+        "rental_ms_http_requests_total",
+        "Requests handled",
+        ("route", "method", "status"),
+    )
+)
+request_duration = registry.register(
+    Histogram(
+        "rental_ms_http_request_duration_seconds",
+        "Time taken to handle a request",
+        ("route", "method"),
+        latency_buckets,
+    )
+)
+requests_in_flight = registry.register(
+    Gauge("rental_ms_http_requests_in_flight", "Requests being handled", ())
+)
+db_queries = registry.register(
+    Histogram(
+        "rental_ms_db_queries_per_request",
+        "Database queries made per request",
+        ("route",),
+        query_count_buckets,
+    )
+)
+db_query_duration = registry.register(
+    Counter(
+        "rental_ms_db_query_duration_seconds_total",
+        "Time spent on database queries",
+        ("route",),
+    )
+)
+threadpool_wait = registry.register(
+    Histogram(
+        "rental_ms_threadpool_wait_seconds",
+        "Time spent waiting for a thread by sync routes",
+        ("route",),
+        wait_buckets,
+    )
+)
+threadpool_run = registry.register(
+    Counter(
+        "rental_ms_threadpool_run_seconds_total",
+        "Time spent running on a thread by sync routes",
+        ("route",),
+    )
+)
+threadpool_busy = registry.register(
+    Gauge("rental_ms_threadpool_busy_threads", "Threadpool threads in use", ())
+)
+threadpool_size = registry.register(
+    Gauge("rental_ms_threadpool_threads", "Threadpool size", ())
+)
+threadpool_waiting = registry.register(
+    Gauge(
+        "rental_ms_threadpool_waiting_tasks", "Tasks waiting for a free thread", ()
+    )
+)
+db_connections_opened = registry.register(
+    Counter(
+        "rental_ms_db_connections_opened_total", "Database connections opened", ()
+    )
+)
+db_pool_size = registry.register(
+    Gauge("rental_ms_db_pool_connections", "Connections held by the pool", ())
+)
+db_pool_max_size = registry.register(
+    Gauge("rental_ms_db_pool_max_connections", "Maximum connections of the pool", ())
+)
+db_pool_in_use = registry.register(
+    Gauge(
+        "rental_ms_db_pool_connections_in_use",
+        "Pool connections lent out or being opened",
+        (),
+    )
+)
+db_pool_waiting = registry.register(
+    Gauge(
+        "rental_ms_db_pool_waiting_requests", "Requests waiting for a connection", ()
+    )
+)
+db_pool_requests = registry.register(
+    Counter(
+        "rental_ms_db_pool_requests_total", "Connections requested from the pool", ()
+    )
+)
+db_pool_wait = registry.register(
+    Counter(
+        "rental_ms_db_pool_wait_seconds_total",
+        "Time spent waiting for a pool connection",
+        (),
+    )
+)
+db_pool_errors = registry.register(
+    Counter(
+        "rental_ms_db_pool_errors_total",
+        "Connection requests that failed or timed out",
+        (),
+    )
+)
+
+
+@dataclass
+class RequestMetrics:
+    """Accumulates what a request does on the event loop and its threads"""
+
+    queries: int = 0
+    query_time: float = 0
+    threadpool_wait: float = 0
+    threadpool_run: float = 0
+
+
+current_request_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_request_metrics", default=None
+)
+"""Metrics of the request being handled. Context variables are copied to
+the threads running the ORM so queries are accounted to their request"""
+
+
+def record_query(execute, sql, params, many, context):
+    """Database `execute_wrapper` timing queries made during requests"""
+    request_metrics = current_request_metrics.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.queries += 1
+        request_metrics.query_time += time.perf_counter() - start_time
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    db_connections_opened.inc()
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+async def run_in_threadpool(func, *args, **kwargs):
+    """Runs `func` on anyio's threadpool as Starlette's `run_in_threadpool`
+    does, recording how long the call waited for a thread and ran on it"""
+    request_metrics = current_request_metrics.get()
+    queued_at = time.perf_counter()
+
+    def measured_func():
+        started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if request_metrics is not None:
+                request_metrics.threadpool_wait += started_at - queued_at
+                request_metrics.threadpool_run += time.perf_counter() - started_at
+
+    return await to_thread.run_sync(measured_func)
+
+
+def instrument():
+    """Hooks the query recorder into the database connections"""
+    connection_created.connect(install_query_recorder)
+
+
+def get_route_name(scope) -> str:
+    """Route template handling the request e.g `/api/v1/core/concern/{id}`
+    or the mount point for mounted apps e.g `/d/*`"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    if "endpoint" in scope:
+        return scope.get("root_path", "") + "/*"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Records request metrics. Pure ASGI so that streamed responses and
+    the mounted Django app are passed through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_metrics = RequestMetrics()
+        token = current_request_metrics.set(request_metrics)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            requests_in_flight.dec()
+            current_request_metrics.reset(token)
+            route = get_route_name(scope)
+            method = scope["method"]
+            requests_total.inc((route, method, str(status)))
+            request_duration.observe((route, method), duration)
+            db_queries.observe((route,), request_metrics.queries)
+            db_query_duration.inc((route,), request_metrics.query_time)
+            threadpool_wait.observe((route,), request_metrics.threadpool_wait)
+            threadpool_run.inc((route,), request_metrics.threadpool_run)
+
+
+def metrics_response() -> Response:
+    limiter = to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    threadpool_busy.set(value=statistics.borrowed_tokens)
+    threadpool_size.set(value=limiter.total_tokens)
+    threadpool_waiting.set(value=statistics.tasks_waiting)
+    pool_stats = get_pool_stats()
+    if pool_stats is not None:
+        db_pool_size.set(value=pool_stats["pool_size"])
+        db_pool_max_size.set(value=pool_stats["pool_max"])
+        db_pool_in_use.set(
+            value=pool_stats["pool_size"] - pool_stats["pool_available"]
+        )
+        db_pool_waiting.set(value=pool_stats["requests_waiting"])
+        db_pool_requests.set(value=pool_stats.get("requests_num", 0))
+        db_pool_wait.set(value=pool_stats.get("requests_wait_ms", 0) / 1000)
+        db_pool_errors.set(value=pool_stats.get("requests_errors", 0))
+    return Response(
+        content=registry.expose(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
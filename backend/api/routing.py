@@ -0,0 +1,40 @@
+"""Route class of the API's routers
+
+FastAPI runs sync endpoints on anyio's threadpool by itself. `ThreadpoolRoute`
+has them run there through `run_on_threadpool` instead, which records the time
+they waited for a thread and ran on it (`api.metrics`), profiles their thread
+when the request is CPU profiled (`rental_ms.cpu_profiler`) and releases the
+connections they used (`api.db`).
+"""
+
+import functools
+import inspect
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+from api import metrics
+from api.db import release_connections
+from rental_ms.cpu_profiler import profile_thread_call
+
+
+def run_on_threadpool(endpoint: Callable) -> Callable:
+    """Async endpoint running the sync `endpoint` on the threadpool"""
+
+    @functools.wraps(endpoint)
+    async def endpoint_on_threadpool(*args, **kwargs):
+        return await metrics.run_in_threadpool(
+            release_connections(profile_thread_call(endpoint)), *args, **kwargs
+        )
+
+    return endpoint_on_threadpool
+
+
+class ThreadpoolRoute(APIRoute):
+    """Route running its sync endpoint with `run_on_threadpool`. Sync
+    dependencies, of which the API has none, are still run by FastAPI"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = run_on_threadpool(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,196 @@
+"""Pre-forking production server for the API
+
+The app is imported once in the master process and workers are forked from it,
+so the imported Django/FastAPI state is shared copy-on-write between them.
+All workers accept connections from the same listening socket.
+
+Signals handled by the master:
+
+- `SIGHUP` : Graceful reload. The master re-executes itself (importing fresh code)
+  while keeping the listening socket, forks new workers and only then asks the
+  old ones to finish their in-flight requests and exit.
+- `SIGTERM`/`SIGINT` : Graceful shutdown.
+"""
+
+import asyncio
+import gc
+import logging
+import logging.config
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+from uvicorn.importer import import_from_string
+
+logger = logging.getLogger("uvicorn.error")
+
+listen_fd_env = "RENTAL_MS_LISTEN_FD"
+"""Listening socket inherited across a graceful reload"""
+old_workers_env = "RENTAL_MS_OLD_WORKERS"
+"""Workers of the previous generation to be retired after a graceful reload"""
+
+
+class PreforkServer:
+
+    def __init__(
+        self,
+        app_path: str,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 1,
+        threadpool_size: int = 40,
+        limit_concurrency: int | None = None,
+        backlog: int = 2048,
+        keep_alive: int = 5,
+        graceful_timeout: int = 30,
+        log_level: str = "info",
+    ):
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threadpool_size = threadpool_size
+        self.limit_concurrency = limit_concurrency
+        self.backlog = backlog
+        self.keep_alive = keep_alive
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.app = None
+        self.sock: socket.socket | None = None
+        self.children: set[int] = set()
+        self.signal_received: int | None = None
+
+    def get_socket(self) -> socket.socket:
+        if listen_fd_env in os.environ:
+            sock = socket.socket(fileno=int(os.environ.pop(listen_fd_env)))
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def preload(self):
+        """Imports the app and prepares the process state to be shared by workers"""
+        self.app = import_from_string(self.app_path)
+        from django.db import connections
+
+        # Database connections must never be shared across processes
+        connections.close_all()
+        # Keep the garbage collector from touching (and so copying) shared objects
+        gc.collect()
+        gc.freeze()
+
+    def spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return pid
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            asyncio.run(self.serve_worker())
+        except BaseException:
+            logger.exception("Worker %d crashed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    async def serve_worker(self):
+        from anyio import to_thread
+
+        to_thread.current_default_thread_limiter().total_tokens = self.threadpool_size
+        config = uvicorn.Config(
+            self.app,
+            limit_concurrency=self.limit_concurrency,
+            backlog=self.backlog,
+            timeout_keep_alive=self.keep_alive,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            log_level=self.log_level,
+        )
+        await uvicorn.Server(config).serve(sockets=[self.sock])
+
+    def handle_signal(self, signum, frame):
+        self.signal_received = signum
+
+    def reap_workers(self) -> list[int]:
+        """Collects exited workers and returns those of the current generation"""
+        exited = []
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            if pid in self.children:
+                self.children.discard(pid)
+                exited.append(pid)
+        return exited
+
+    def retire_old_workers(self):
+        old_workers = os.environ.pop(old_workers_env, "")
+        for pid in filter(None, old_workers.split(",")):
+            try:
+                os.kill(int(pid), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop_workers(self):
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def reload(self):
+        """Re-executes the master keeping the listening socket and current workers"""
+        logger.info("Reloading - spawning a new generation of workers")
+        os.environ[listen_fd_env] = str(self.sock.fileno())
+        os.environ[old_workers_env] = ",".join(map(str, self.children))
+        os.execv(sys.executable, [sys.executable] + sys.orig_argv[1:])
+
+    def run(self):
+        logging.config.dictConfig(LOGGING_CONFIG)
+        logger.setLevel(self.log_level.upper())
+        self.sock = self.get_socket()
+        self.preload()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.handle_signal)
+
+        for _ in range(self.workers):
+            self.spawn_worker()
+        self.retire_old_workers()
+        logger.info(
+            "Master %d serving on %s:%d with %d workers",
+            os.getpid(),
+            *self.sock.getsockname()[:2],
+            self.workers,
+        )
+
+        while self.signal_received is None:
+            for pid in self.reap_workers():
+                logger.warning("Worker %d exited, spawning a new one", pid)
+                self.spawn_worker()
+            time.sleep(0.2)
+
+        if self.signal_received == signal.SIGHUP:
+            self.reload()
+        logger.info("Shutting down workers")
+        self.stop_workers()
+        self.sock.close()
@@ -7,18 +7,16 @@ from fastapi import (
     Depends,
     Query,
 )
-from fastapi.encoders import jsonable_encoder
 from fastapi.security.oauth2 import OAuth2PasswordRequestFormStrict
 from typing import Annotated
 
 from users.models import CustomUser, AuthToken
 from finance.models import Account, Transaction
-from rental_ms.utils import get_expiry_datetime
 
-from api.v1.utils import send_email, get_value
+from api.v1.utils import ThreadSensitiveRoute, send_email, get_value, json_response
 from api.v1.account.utils import get_user, generate_token, generate_password_reset_token
 
-from rental_ms.utils import send_payment_push
+from rental_ms.utils import send_payment_push, generate_transaction_reference
 from api.v1.account.models import (
     TokenAuth,
     ResetPassword,
@@ -34,6 +32,7 @@ from django.db.models import Q
 router = APIRouter(
     prefix="/account",
     tags=["Account"],
+    route_class=ThreadSensitiveRoute,
 )
 
 
@@ -74,12 +73,12 @@ def generate_new_token(user: Annotated[CustomUser, Depends(get_user)]) -> TokenA
 
 
 @router.get("/profile", name="Get user profile")
-def profile_information(user: Annotated[CustomUser, Depends(get_user)]) -> UserProfile:
+async def profile_information(user: Annotated[CustomUser, Depends(get_user)]) -> UserProfile:
     return user.model_dump()
 
 
 @router.patch("/profile", name="Update user profile")
-def update_personal_info(
+async def update_personal_info(
     user: Annotated[CustomUser, Depends(get_user)],
     updated_personal_data: EditablePersonalData,
 ) -> EditablePersonalData:
@@ -91,7 +90,7 @@ def update_personal_info(
     )
     user.email = get_value(updated_personal_data.email, user.email)
     user.occupation = get_value(updated_personal_data.occupation, user.occupation)
-    user.save()
+    await user.asave()
     return user.model_dump()
 
 
@@ -110,7 +109,7 @@ def check_if_username_exists(
 
 
 @router.get("/transactions", name="Financial transactions")
-def get_financial_transactions(
+async def get_financial_transactions(
     user: Annotated[CustomUser, Depends(get_user)],
     means: Annotated[
         Transaction.TransactionMeans, Query(description="Transaction means")
@@ -125,12 +124,15 @@ def get_financial_transactions(
         search_filter["means"] = means.value
     if type is not None:
         search_filter["type"] = type.value
-    return [
-        jsonable_encoder(transaction)
-        for transaction in Transaction.objects.filter(**search_filter)
-        .order_by("-created_at")
-        .all()[:15]
-    ]
+    return json_response(
+        list[TransactionInfo],
+        [
+            transaction
+            async for transaction in Transaction.objects.filter(**search_filter)
+            .order_by("-created_at")
+            .values("type", "amount", "means", "reference", "notes", "created_at")[:15]
+        ],
+    )
 
 
 @router.get("/mpesa-payment-account-details", name="Get mpesa payment account details")
@@ -213,7 +215,7 @@ def send_mpesa_popup_to(
             type=Transaction.TransactionType.DEPOSIT.value,
             amount=amount,
             means=Transaction.TransactionMeans.MPESA.value,
-            reference=generate_password_reset_token(),
+            reference=generate_transaction_reference(),
         ).save()
 
     send_popup(popup_to.phone_number, popup_to.amount)
@@ -230,20 +232,17 @@ def reset_password(
             Q(username=identity) | Q(email=identity)
         ).get()
         auth_token = AuthToken.objects.filter(user=target_user).first()
-        if auth_token is not None:
-            auth_token.token = generate_password_reset_token()
-            auth_token.expiry_datetime = get_expiry_datetime()
-        else:
-            auth_token = AuthToken.objects.create(
-                user=target_user,
-                token=generate_password_reset_token(),
-            )
+        if auth_token is None:
+            auth_token = AuthToken(user=target_user)
+        # Only the hash is saved, the token itself is emailed
+        token = generate_password_reset_token()
+        auth_token.set_token(token)
         auth_token.save()
         send_email(
             subject="Password Reset Token",
             recipient=auth_token.user.email,
             template_name="email/password_reset_token",
-            context=dict(auth_token=auth_token),
+            context=dict(auth_token=auth_token, token=token),
         )
 
     except CustomUser.DoesNotExist:
@@ -262,12 +261,9 @@ def reset_password(
 def reset_password(info: ResetPassword) -> ProcessFeedback:
     """Resets user password"""
     try:
-        auth_token = AuthToken.objects.get(token=info.token)
-        if auth_token.is_expired():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Token has expired.",
-            )
+        auth_token = (
+            AuthToken.objects.filter_valid(info.token).select_related("user").get()
+        )
         user = auth_token.user
         if user.username == info.username:
             user.set_password(info.new_password)
@@ -281,6 +277,11 @@ def reset_password(info: ResetPassword) -> ProcessFeedback:
             )
 
     except AuthToken.DoesNotExist:
+        if AuthToken.objects.filter(token=AuthToken.hash_token(info.token)).exists():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token has expired.",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid token.",
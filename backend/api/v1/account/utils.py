@@ -8,7 +8,6 @@ from rental_ms.utils import generate_random_token
 import uuid
 import random
 from string import ascii_lowercase
-import asyncio
 
 token_id = "rms_"
 """First characters of every user auth-token"""
@@ -24,11 +23,9 @@ async def get_user(token: Annotated[str, Depends(v1_auth_scheme)]) -> CustomUser
     if token:
         try:
             if token.startswith(token_id):
-
-                def fetch_user(token) -> CustomUser:
-                    return CustomUser.objects.select_related("account").get(token=token)
-
-                return await asyncio.to_thread(fetch_user, token)
+                return await CustomUser.objects.select_related("account").aget(
+                    token=token
+                )
 
         except CustomUser.DoesNotExist:
             pass
@@ -4,7 +4,8 @@ from external.models import About, Message, FAQ, ServiceFeedback, Gallery, Docum
 from rental.models import House, UnitGroup
 from management.models import AppUtility
 
-from api.v1.utils import send_email
+from api.routing import ThreadpoolRoute
+from api.v1.utils import send_email, json_response
 
 from api.v1.models import ProcessFeedback
 from api.v1.business.models import (
@@ -22,7 +23,7 @@ from api.v1.business.models import (
 from typing import Annotated
 
 
-router = APIRouter(prefix="/business", tags=["Business"])
+router = APIRouter(prefix="/business", tags=["Business"], route_class=ThreadpoolRoute)
 
 
 @router.get("/about", name="Business information")
@@ -60,12 +61,14 @@ def new_visitor_message(message: NewVisitorMessage) -> ProcessFeedback:
 
 @router.get("/galleries", name="Business galleries")
 def get_business_galleries() -> list[BusinessGallery]:
-    return [
-        jsonable_encoder(gallery)
-        for gallery in Gallery.objects.filter(show_in_index=True)
-        .all()
-        .order_by("-created_at")[:12]
-    ]
+    return json_response(
+        list[BusinessGallery],
+        Gallery.objects.filter(show_in_index=True)
+        .order_by("-created_at")
+        .values(
+            "title", "details", "location_name", "youtube_video_link", "picture", "date"
+        )[:12],
+    )
 
 
 @router.get("/feedbacks", name="Customers' feedback")
@@ -87,10 +90,12 @@ def get_client_feedbacks() -> list[UserFeedback]:
 @router.get("/faqs", name="Frequently asked questions")
 def get_faqs() -> list[FAQDetails]:
     """Get frequently asked question"""
-    return [
-        FAQDetails(**jsonable_encoder(faq))
-        for faq in FAQ.objects.filter(is_shown=True).order_by("created_at").all()[:10]
-    ]
+    return json_response(
+        list[FAQDetails],
+        FAQ.objects.filter(is_shown=True)
+        .order_by("created_at")
+        .values("question", "answer")[:10],
+    )
 
 
 @router.get("/document", name="Site document")
@@ -115,7 +120,9 @@ def get_app_utilities(
     search_filter = dict()
     if name is not None:
         search_filter["name"] = name.value
-    return [
-        jsonable_encoder(utility)
-        for utility in AppUtility.objects.filter(**search_filter).all()
-    ]
+    return json_response(
+        list[AppUtilityInfo],
+        AppUtility.objects.filter(**search_filter).values(
+            "name", "description", "value"
+        ),
+    )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, field_validator, HttpUrl, Field
 from typing import Optional, List
 from management.models import CommunityMessage, Concern
+from management.search import SearchKind
 from rental.models import Unit
 from external.models import ServiceFeedback
 from api.v1.utils import get_document_path
@@ -234,3 +235,37 @@ class NewTenantFeedback(BaseModel):
 class TenantFeedbackDetails(NewTenantFeedback):
     created_at: datetime
     updated_at: datetime
+
+
+class SearchResult(BaseModel):
+    kind: SearchKind
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchResults(BaseModel):
+    page: int
+    has_next: bool
+    results: List[SearchResult]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "page": 1,
+                "has_next": False,
+                "results": [
+                    {
+                        "kind": "community_message",
+                        "id": 40,
+                        "title": "Planned Water Outage",
+                        "snippet": (
+                            "Dear tenants, there will be a planned water outage on "
+                            "Thursday, April 30th, from 9 AM to 3 PM…"
+                        ),
+                        "score": 4.52,
+                    }
+                ],
+            }
+        }
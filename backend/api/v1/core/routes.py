@@ -8,13 +8,21 @@ from fastapi import (
     Query,
     Path,
 )
-from api.v1.utils import get_value
+from api.v1.utils import ThreadSensitiveRoute, get_value, json_response
 from api.v1.account.utils import get_user
 
 from users.models import CustomUser
-from rental.models import Tenant, Unit
-from management.models import CommunityMessage, GroupMessage, PersonalMessage, Concern
+from rental.models import House, Tenant, Unit
+from management.models import (
+    Community,
+    CommunityMessage,
+    GroupMessage,
+    PersonalMessage,
+    Concern,
+    Office,
+)
 from external.models import ServiceFeedback
+from management import search
 
 from api.v1.models import ProcessFeedback
 from api.v1.core.models import (
@@ -29,46 +37,67 @@ from api.v1.core.models import (
     UpdateConcern,
     NewTenantFeedback,
     TenantFeedbackDetails,
+    SearchResults,
 )
 
+from django.db.models import Exists, OuterRef, QuerySet
 from django.db.utils import IntegrityError
 
+from dataclasses import asdict
 from typing import Annotated, List
-from fastapi.encoders import jsonable_encoder
-import asyncio
 
-router = APIRouter(prefix="/core", tags=["Core"])
+router = APIRouter(prefix="/core", tags=["Core"], route_class=ThreadSensitiveRoute)
 
 
 async def get_tenant(user: Annotated[CustomUser, Depends(get_user)]) -> Tenant:
-    def tenant_finder(user: CustomUser) -> Tenant:
-        try:
-            tenant = Tenant.objects.select_related("unit").get(user=user)
-            if tenant.unit is None:
-                raise HTTPException(
-                    detail="Currently you don't have any unit under your account.",
-                    status_code=status.HTTP_412_PRECONDITION_FAILED,
-                )
-            return tenant
-        except Tenant.DoesNotExist:
-            raise HTTPException(
-                detail="You're not yet enrolled as a tenant.",
-                status_code=status.HTTP_412_PRECONDITION_FAILED,
+    try:
+        tenant = await Tenant.objects.select_related("unit__unit_group").aget(
+            user=user
+        )
+    except Tenant.DoesNotExist:
+        raise HTTPException(
+            detail="You're not yet enrolled as a tenant.",
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+    if tenant.unit is None:
+        raise HTTPException(
+            detail="Currently you don't have any unit under your account.",
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+    tenant.user = user
+    return tenant
+
+
+def annotate_is_read(queryset: QuerySet, tenant: Tenant) -> QuerySet:
+    """Annotates `is_read` for messages having `read_by` relation"""
+    through_model = queryset.model.read_by.through
+    return queryset.annotate(
+        is_read=Exists(
+            through_model.objects.filter(
+                **{f"{queryset.model._meta.model_name}_id": OuterRef("pk")},
+                tenant_id=tenant.id,
             )
-
-    return await asyncio.to_thread(tenant_finder, user)
+        )
+    )
 
 
 @router.get("/house", name="Get house info")
 def get_house_info(tenant: Annotated[Tenant, Depends(get_tenant)]) -> HouseInfoPrivate:
     """Get tenant's house information"""
-    house = tenant.unit.unit_group.house
-    house_info_dict = jsonable_encoder(house)
-    house_info_dict["communities"] = [
-        jsonable_encoder(house) for house in house.communities.all()
-    ]
-    house_info_dict["office"] = jsonable_encoder(tenant.unit.unit_group.house.office)
-    return house_info_dict
+    house_info_dict = House.objects.values(
+        "id", "name", "address", "description", "picture", "office_id"
+    ).get(unit_groups__units=tenant.unit)
+    house_info_dict["communities"] = list(
+        Community.objects.filter(house=house_info_dict["id"]).values(
+            "name", "description", "social_media_link", "created_at"
+        )
+    )
+    house_info_dict["office"] = (
+        Office.objects.filter(id=house_info_dict.pop("office_id"))
+        .values("name", "description", "address", "contact_number", "email")
+        .first()
+    )
+    return json_response(HouseInfoPrivate, house_info_dict)
 
 
 @router.get("/unit", name="Get occupied unit info")
@@ -89,7 +118,7 @@ def get_occupied_unit(tenant: Annotated[Tenant, Depends(get_tenant)]) -> UnitInf
 
 
 @router.get("/personal/messages", name="Get personal messages")
-def get_personal_messages(
+async def get_personal_messages(
     tenant: Annotated[Tenant, Depends(get_tenant)],
     is_read: Annotated[bool, Query(description="Is read filter")] = None,
     category: Annotated[
@@ -102,22 +131,29 @@ def get_personal_messages(
         search_filter["is_read"] = is_read
     if category is not None:
         search_filter["category"] = category.value
-    return [
-        jsonable_encoder(message)
-        for message in PersonalMessage.objects.filter(**search_filter)
-        .order_by("-created_at")
-        .all()[:30]
-    ]
+    return json_response(
+        List[PersonalMessageInfo],
+        [
+            message
+            async for message in PersonalMessage.objects.filter(**search_filter)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        ],
+    )
 
 
 @router.patch("/personal/message/mark-read/{id}", name="Mark personal message as read")
-def mark_personal_message_read(
+async def mark_personal_message_read(
     id: Annotated[int, Path(description="Personal message ID")],
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ProcessFeedback:
     """Mark a personal message as read"""
     try:
-        PersonalMessage.objects.filter(id=id, tenant=tenant).update(is_read=True)
+        await PersonalMessage.objects.filter(id=id, tenant=tenant).aupdate(
+            is_read=True
+        )
         return ProcessFeedback(detail="Message marked as read successfully")
     except PersonalMessage.DoesNotExist:
         raise HTTPException(
@@ -127,7 +163,7 @@ def mark_personal_message_read(
 
 
 @router.get("/group/messages", name="Get group messages")
-def get_group_messages(
+async def get_group_messages(
     tenant: Annotated[Tenant, Depends(get_tenant)],
     is_read: Annotated[bool, Query(description="Is read filter")] = None,
     category: Annotated[
@@ -135,48 +171,47 @@ def get_group_messages(
     ] = None,
 ) -> List[GroupMessageInfo]:
     """Messages from unit group that tenant is a member"""
-    message_list = []
-    search_filter = dict(groups__in=[tenant.unit.unit_group])
+    search_filter = dict(groups=tenant.unit.unit_group_id)
     if is_read is not None:
-        if is_read:
-            search_filter["read_by"] = tenant
-        elif is_read is False:
-            search_filter["read_by__isnull"] = True
+        search_filter["is_read"] = is_read
     if category is not None:
         search_filter["category"] = category.value
 
-    for message in (
-        GroupMessage.objects.prefetch_related("read_by")
-        .filter(**search_filter)
-        .order_by("-created_at")
-        .all()[:30]
-    ):
-        message_dict = message.model_dump()
-        message_dict["is_read"] = message.read_by.contains(tenant)
-        message_list.append(message_dict)
-    return message_list
+    return json_response(
+        List[GroupMessageInfo],
+        [
+            message
+            async for message in annotate_is_read(GroupMessage.objects.all(), tenant)
+            .filter(**search_filter)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        ],
+    )
 
 
 @router.patch("/group/message/mark-read/{id}", name="Mark group message as read")
-def mark_group_message_read(
+async def mark_group_message_read(
     id: Annotated[int, Path(description="Group message ID")],
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ProcessFeedback:
     """Mark a particular group message as read"""
     try:
-        GroupMessage.objects.prefetch_related("read_by").get(
-            id=id, groups__in=[tenant.unit.unit_group]
-        ).read_by.add(tenant)
+        message = await GroupMessage.objects.aget(
+            id=id, groups=tenant.unit.unit_group_id
+        )
+        await message.read_by.aadd(tenant)
         return ProcessFeedback(detail="Message marked as read successfully.")
     except GroupMessage.DoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Community message with id {id} does not exist.",
+            detail=f"Group message with id {id} does not exist.",
         )
 
 
 @router.get("/community/messages", name="Get community messages")
-def get_community_messages(
+async def get_community_messages(
     tenant: Annotated[Tenant, Depends(get_tenant)],
     is_read: Annotated[bool, Query(description="Is read filter")] = None,
     category: Annotated[
@@ -184,52 +219,54 @@ def get_community_messages(
     ] = None,
 ) -> List[CommunityMessageInfo]:
     """Messages from communities that tenant is a member"""
-    message_list = []
-    search_filter = dict(
-        communities__in=tenant.unit.unit_group.house.communities.all(),
-    )
+    search_filter = dict(communities__house=tenant.unit.unit_group.house_id)
     if is_read is not None:
-        if is_read:
-            search_filter["read_by"] = tenant
-        else:
-            search_filter["read_by__isnull"] = True
+        search_filter["is_read"] = is_read
     if category is not None:
         search_filter["category"] = category.value
 
-    for message in (
-        CommunityMessage.objects.prefetch_related("communities", "read_by")
+    message_list = [
+        message
+        async for message in annotate_is_read(CommunityMessage.objects.all(), tenant)
         .filter(**search_filter)
         .order_by("-created_at")
         .distinct()
-        .all()[:30]
+        .values("id", "category", "subject", "content", "created_at", "is_read")[:30]
+    ]
+    community_names = {message["id"]: [] for message in message_list}
+    async for message_id, community_name in (
+        CommunityMessage.communities.through.objects.filter(
+            communitymessage_id__in=community_names
+        )
+        .order_by("id")
+        .values_list("communitymessage_id", "community__name")
     ):
-        message_dict = message.model_dump()
-        message_dict["is_read"] = message.read_by.contains(tenant)
-        message_list.append(message_dict)
-    return message_list
+        community_names[message_id].append(community_name)
+    for message in message_list:
+        message["community_names"] = community_names[message["id"]]
+    return json_response(List[CommunityMessageInfo], message_list)
 
 
 @router.patch(
     "/community/message/mark-read/{id}", name="Mark community message as read"
 )
-def mark_community_message_read(
+async def mark_community_message_read(
     id: Annotated[int, Path(description="Community message ID")],
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ProcessFeedback:
     """Mark a particular community message as read"""
     try:
         message = (
-            CommunityMessage.objects.prefetch_related("communities")
-            .filter(
-                id=id, communities__in=tenant.unit.unit_group.house.communities.all()
+            await CommunityMessage.objects.filter(
+                id=id, communities__house=tenant.unit.unit_group.house_id
             )
             .distinct()
-            .first()
+            .afirst()
         )
         if not message:
             raise CommunityMessage.DoesNotExist
-        message.read_by.add(tenant)
-        message.save()
+        await message.read_by.aadd(tenant)
+        await message.asave()
         return ProcessFeedback(detail="Message marked as read successfully.")
     except CommunityMessage.DoesNotExist:
         raise HTTPException(
@@ -239,7 +276,7 @@ def mark_community_message_read(
 
 
 @router.get("/concerns", name="Get concerns")
-def get_concerns(
+async def get_concerns(
     tenant: Annotated[Tenant, Depends(get_tenant)],
     status: Annotated[
         Concern.ConcernStatus, Query(description="Concern status")
@@ -249,36 +286,37 @@ def get_concerns(
     search_filter = dict(tenant=tenant)
     if status is not None:
         search_filter["status"] = status.value
-    return [
-        jsonable_encoder(concern)
-        for concern in Concern.objects.filter(**search_filter)
-        .order_by("-created_at")
-        .all()[:30]
-    ]
+    return json_response(
+        List[ShallowConcernDetails],
+        [
+            concern
+            async for concern in Concern.objects.filter(**search_filter)
+            .order_by("-created_at")
+            .values("id", "about", "status", "created_at")[:30]
+        ],
+    )
 
 
 @router.post("/concern/new", name="Add new concern")
-def add_new_concern(
+async def add_new_concern(
     concern: NewConcern, tenant: Annotated[Tenant, Depends(get_tenant)]
 ) -> ConcernDetails:
     """Add new concern"""
     new_concern_dict = concern.model_dump()
     new_concern_dict["tenant"] = tenant
-    new_concern = Concern.objects.create(**new_concern_dict)
-    new_concern.save()
-    # new_concern.refresh_from_db()
+    new_concern = await Concern.objects.acreate(**new_concern_dict)
     return new_concern.model_dump()
 
 
 @router.patch("/concern/{id}", name="Update existing concern")
-def update_existing_concern(
+async def update_existing_concern(
     id: Annotated[int, Path(description="Concern ID")],
     concern: UpdateConcern,
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ConcernDetails:
     """Update existing concern"""
     try:
-        target_concern = Concern.objects.get(
+        target_concern = await Concern.objects.aget(
             id=id,
             tenant=tenant,
             status__in=[
@@ -288,7 +326,7 @@ def update_existing_concern(
         )
         target_concern.about = get_value(concern.about, target_concern.about)
         target_concern.details = get_value(concern.details, target_concern.details)
-        target_concern.save()
+        await target_concern.asave()
         return target_concern.model_dump()
     except Concern.DoesNotExist:
         raise HTTPException(
@@ -298,13 +336,13 @@ def update_existing_concern(
 
 
 @router.get("/concern/{id}", name="Get concern details")
-def get_concern_details(
+async def get_concern_details(
     id: Annotated[int, Path(description="Concern ID")],
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ConcernDetails:
     """Get particular concern details"""
     try:
-        target_concern = Concern.objects.get(id=id, tenant=tenant)
+        target_concern = await Concern.objects.aget(id=id, tenant=tenant)
         return target_concern.model_dump()
     except Concern.DoesNotExist:
         raise HTTPException(
@@ -314,14 +352,14 @@ def get_concern_details(
 
 
 @router.delete("/concern/{id}", name="Delete concern")
-def get_concern_details(
+async def delete_concern(
     id: Annotated[int, Path(description="Concern ID")],
     tenant: Annotated[Tenant, Depends(get_tenant)],
 ) -> ProcessFeedback:
     """Delete a particular concern"""
     try:
-        target_concern = Concern.objects.get(id=id, tenant=tenant)
-        target_concern.delete()
+        target_concern = await Concern.objects.aget(id=id, tenant=tenant)
+        await target_concern.adelete()
         return ProcessFeedback(detail="Concern deleted successfully.")
     except Concern.DoesNotExist:
         raise HTTPException(
@@ -395,3 +433,33 @@ def delete_feedback(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"You have not send a feedback yet.",
         )
+
+
+@router.get("/search", name="Search messages, concerns and FAQs")
+def search_documents(
+    tenant: Annotated[Tenant, Depends(get_tenant)],
+    q: Annotated[str, Query(min_length=2, max_length=100, description="Search terms")],
+    kind: Annotated[
+        search.SearchKind, Query(description="Search only this kind of documents")
+    ] = None,
+    page: Annotated[int, Query(ge=1, le=100, description="Page number")] = 1,
+    per_page: Annotated[int, Query(ge=1, le=50, description="Results per page")] = 10,
+) -> SearchResults:
+    """Best matching messages, concerns and FAQs that tenant can access"""
+    if not search.is_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Search is not available.",
+        )
+    scopes = search.get_tenant_scopes(tenant)
+    if kind is not None:
+        scopes = {kind: scopes[kind]}
+    # One extra match tells whether there is a next page
+    matches = search.search(
+        q, scopes, limit=per_page + 1, offset=(page - 1) * per_page
+    )
+    return SearchResults(
+        page=page,
+        has_next=len(matches) > per_page,
+        results=[asdict(match) for match in matches[:per_page]],
+    )
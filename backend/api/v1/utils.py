@@ -1,10 +1,21 @@
 """Utilities fuctions for v1
 """
 
+import asyncio
+import inspect
 import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+from asgiref.sync import SyncToAsync, ThreadSensitiveContext, sync_to_async
+from fastapi import Request, Response
+from fastapi.dependencies.models import Dependant
+from pydantic import TypeAdapter
+from api.routing import ThreadpoolRoute
 from rental_ms.utils import send_email as django_send_email
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import close_old_connections
 from django.utils import timezone
 
 
@@ -40,3 +51,93 @@ def get_document_path(path: str | None):
     if path and not path.startswith("/"):
         return os.path.join(settings.MEDIA_URL, path)
     return path
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def json_response(response_type: Any, content: dict | Iterable[dict]) -> Response:
+    """Validates `content` against `response_type` once and encodes it straight to
+    JSON bytes using pydantic's compiled serializer.
+
+    Meant to be fed with rows from `QuerySet.values()` rather than model instances.
+    Since a `Response` is returned, FastAPI skips validating it once more against
+    the route's response model.
+    """
+    adapter = get_type_adapter(response_type)
+    if not isinstance(content, dict):
+        content = list(content)
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(content)),
+        media_type="application/json",
+    )
+
+
+class ThreadSensitiveContexts:
+    """`ThreadSensitiveContext`s kept for reuse, each with a thread running the
+    async ORM calls made under it. The thread's connection is released after
+    each use. At most `API_MAX_CONCURRENCY` are used at a time, others wait on
+    the event loop. With `API_MAX_CONCURRENCY` 0, the calls run on asgiref's
+    single thread shared by all"""
+
+    def __init__(self):
+        self._semaphore: asyncio.Semaphore | None = None
+        self._contexts: list[ThreadSensitiveContext] = []
+
+    @asynccontextmanager
+    async def use(self):
+        if not settings.API_MAX_CONCURRENCY:
+            yield
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.API_MAX_CONCURRENCY)
+            self._contexts = [
+                ThreadSensitiveContext() for _ in range(settings.API_MAX_CONCURRENCY)
+            ]
+        async with self._semaphore:
+            # Last in first out, so that light traffic keeps to a few threads
+            context = self._contexts.pop()
+            # Rather than entering the context, which would stop its thread on exit
+            token = SyncToAsync.thread_sensitive_context.set(context)
+            try:
+                yield
+            finally:
+                try:
+                    # Thread sensitive, so it runs on the context's thread
+                    await sync_to_async(close_old_connections)()
+                finally:
+                    SyncToAsync.thread_sensitive_context.reset(token)
+                    self._contexts.append(context)
+
+
+thread_sensitive_contexts = ThreadSensitiveContexts()
+
+
+def is_async(dependant: Dependant) -> bool:
+    """Whether the route or dependency, or one of its own dependencies, is async.
+    Sync routes are run through an async wrapper, unwrapped here"""
+    return inspect.iscoroutinefunction(inspect.unwrap(dependant.call)) or any(
+        inspect.iscoroutinefunction(dependency.call)
+        or inspect.isasyncgenfunction(dependency.call)
+        or is_async(dependency)
+        for dependency in dependant.dependencies
+    )
+
+
+class ThreadSensitiveRoute(ThreadpoolRoute):
+    """Route running the async ORM calls of its handler and dependencies on a
+    thread of the request's own rather than on asgiref's single thread. The
+    thread is only held while they run, not while the response is sent"""
+
+    def get_route_handler(self) -> Callable:
+        handle = super().get_route_handler()
+        if not is_async(self.dependant):
+            return handle
+
+        async def handle_on_own_thread(request: Request) -> Response:
+            async with thread_sensitive_contexts.use():
+                return await handle(request)
+
+        return handle_on_own_thread
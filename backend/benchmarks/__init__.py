@@ -0,0 +1,13 @@
+"""Performance benchmarks for Rental-MS
+
+Run from the `backend` directory e.g `python -m benchmarks.encoding`
+"""
+
+import os
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+    import django
+
+    django.setup()
@@ -0,0 +1,164 @@
+"""Measures concurrent-request capacity of the tenant routes per worker
+
+Fires requests at increasing concurrency levels and reports throughput together
+with p50/p99 latency so that capacity can be compared at equal p99. With
+`--p99`, reports the highest concurrency served within that p99.
+
+Without `--url` the app is driven in-process through its ASGI interface, with
+`--threads` threads for the async ORM calls (`API_MAX_CONCURRENCY`). `0` runs
+the calls of all requests on asgiref's single thread, for comparison. The
+database being in-process, `--query-latency` adds the round trip of a database
+over the network to every query.
+
+Usage:
+    $ python -m benchmarks.concurrency --token rms_... --concurrency 10 40 80 160
+    $ python -m benchmarks.concurrency --token rms_... --query-latency 1 --p99 100
+    $ python -m benchmarks.concurrency --token rms_... --query-latency 1 --threads 0
+    $ python -m benchmarks.concurrency --url http://localhost:8000 --token rms_...
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+routes = (
+    "/api/v1/account/profile",
+    "/api/v1/account/transactions",
+    "/api/v1/core/personal/messages",
+    "/api/v1/core/group/messages?is_read=false",
+    "/api/v1/core/community/messages",
+    "/api/v1/core/concerns",
+)
+
+
+def add_query_latency(seconds: float):
+    """Has every query of the in-process database wait `seconds` first, as for
+    a round trip to a database over the network. The wait releases the GIL as
+    reading a socket does"""
+    from django.db.backends.signals import connection_created
+
+    def execute_after_round_trip(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def add_round_trip(sender, connection, **kwargs):
+        if execute_after_round_trip not in connection.execute_wrappers:
+            connection.execute_wrappers.append(execute_after_round_trip)
+
+    connection_created.connect(add_round_trip, weak=False)
+
+
+def get_client(
+    url: str | None, token: str, threads: int | None = None
+) -> httpx.AsyncClient:
+    headers = {"Authorization": f"Bearer {token}"}
+    if url:
+        return httpx.AsyncClient(base_url=url, headers=headers, timeout=60)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+    from django.conf import settings
+
+    if threads is not None:
+        settings.API_MAX_CONCURRENCY = threads
+
+    from api import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver",
+        headers=headers,
+        timeout=60,
+    )
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, requests: int):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(routes[index % len(routes)])
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            route = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(route)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return dict(
+        concurrency=concurrency,
+        throughput=len(latencies) / elapsed,
+        p50=statistics.median(latencies) * 1000,
+        p99=latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        errors=errors,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Base url of a running server")
+    parser.add_argument("--token", required=True, help="Tenant's API token")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[10, 40, 80, 160],
+        help="Concurrency levels",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="Requests per concurrency level"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Threads of the in-process app's async ORM calls, 0 - One shared",
+    )
+    parser.add_argument(
+        "--query-latency",
+        type=float,
+        default=0,
+        help="Milliseconds added to every query of the in-process app",
+    )
+    parser.add_argument(
+        "--p99", type=float, help="Milliseconds of p99 latency to be served within"
+    )
+    args = parser.parse_args()
+
+    if args.query_latency and not args.url:
+        add_query_latency(args.query_latency / 1000)
+
+    sustained = None
+    async with get_client(args.url, args.token, args.threads) as client:
+        await run_level(client, 1, len(routes))  # warm up
+        print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} errors")
+        for concurrency in args.concurrency:
+            result = await run_level(client, concurrency, args.requests)
+            print(
+                "{concurrency:>11} {throughput:>9.1f} {p50:>9.2f} {p99:>9.2f} "
+                "{errors}".format(**result)
+            )
+            if args.p99 and result["p99"] <= args.p99 and not result["errors"]:
+                sustained = result
+    if args.p99:
+        if sustained is None:
+            print(f"No concurrency level served within a p99 of {args.p99:g} ms")
+        else:
+            print(
+                "Served within a p99 of {p99:g} ms: concurrency {concurrency} at "
+                "{throughput:.1f} req/s".format(**{**sustained, "p99": args.p99})
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Compares per-item cost of encoding API responses
+
+- `jsonable_encoder` : Today's path - `jsonable_encoder` on model instances, FastAPI
+  validating the result against the response model then `json.dumps`
+- `json_response` : Rows from `QuerySet.values()` validated once and encoded with
+  pydantic's compiled serializer.
+
+Usage:
+    $ python -m benchmarks.encoding --rows 1000
+"""
+
+from benchmarks import setup_django
+
+setup_django()
+
+import argparse
+import json
+import timeit
+from decimal import Decimal
+
+from django.utils import timezone
+from fastapi.encoders import jsonable_encoder
+
+from api.v1.account.models import TransactionInfo
+from api.v1.utils import get_type_adapter, json_response
+from finance.models import Transaction
+
+fields = ("type", "amount", "means", "reference", "notes", "created_at")
+
+
+def make_transactions(total: int) -> list[Transaction]:
+    now = timezone.now()
+    return [
+        Transaction(
+            id=index,
+            user_id=1,
+            type=Transaction.TransactionType.DEPOSIT.value,
+            amount=Decimal("1250.50"),
+            means=Transaction.TransactionMeans.MPESA.value,
+            reference=f"REF{index:08d}",
+            notes="Monthly payment",
+            created_at=now,
+        )
+        for index in range(total)
+    ]
+
+
+def jsonable_encoder_path(transactions: list[Transaction]) -> bytes:
+    adapter = get_type_adapter(list[TransactionInfo])
+    content = [jsonable_encoder(transaction) for transaction in transactions]
+    validated = adapter.validate_python(content)
+    return json.dumps(
+        adapter.dump_python(validated, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def json_response_path(rows: list[dict]) -> bytes:
+    return json_response(list[TransactionInfo], rows).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Payloads to encode")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.rows)
+    rows = [{field: getattr(t, field) for field in fields} for t in transactions]
+
+    for name, func, data in (
+        ("jsonable_encoder", jsonable_encoder_path, transactions),
+        ("json_response", json_response_path, rows),
+    ):
+        func(data)  # warm up
+        best = min(timeit.repeat(lambda: func(data), number=1, repeat=args.repeat))
+        print(
+            f"{name:<18} {best * 1000:>9.3f} ms/payload "
+            f"{best / args.rows * 1_000_000:>8.3f} us/item"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Times the admin's streaming export of the transaction ledger
+
+Reads the ledger as the transaction admin's export does, newest first, with
+`.iterator()` in chunks - a server-side cursor on PostgreSQL. Times reading
+the rows alone, then writing them out as CSV and as XLSX, and projects each
+to 5M rows.
+
+Runs against the seeded in-memory SQLite database by default, with
+`--transactions` added to the ledger. With `--configured` it reads the ledger
+of the configured database instead, adding nothing.
+
+Usage:
+    $ python -m benchmarks.export
+    $ python -m benchmarks.export --configured
+"""
+
+import argparse
+import os
+import resource
+import time
+
+projected_rows = 5_000_000
+
+
+def add_transactions(count: int):
+    """Adds `count` transactions of one user to the ledger"""
+    from django.db import transaction
+
+    from finance.models import Transaction
+    from rental_ms.utils import generate_transaction_reference
+    from users.models import CustomUser
+
+    user = CustomUser.objects.first()
+    for start in range(0, count, 10_000):
+        with transaction.atomic():
+            Transaction.objects.bulk_create(
+                Transaction(
+                    user=user,
+                    type=Transaction.TransactionType.DEPOSIT.value,
+                    means=Transaction.TransactionMeans.MPESA.value,
+                    amount=15000,
+                    reference=generate_transaction_reference(),
+                    notes='Rent, "March"',
+                )
+                for _ in range(start, min(start + 10_000, count))
+            )
+
+
+def time_export(name: str, parts, rows: int):
+    started = time.perf_counter()
+    first_part = None
+    size = 0
+    for part in parts:
+        if first_part is None:
+            first_part = time.perf_counter() - started
+        size += len(part)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<6} {elapsed:>8.1f} {elapsed / rows * 1e6:>7.1f} "
+        f"{elapsed / rows * projected_rows:>8.0f} {(first_part or 0) * 1000:>9.0f} "
+        f"{size / 1e6:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the configured database rather than the seeded in-memory one",
+    )
+    parser.add_argument(
+        "--transactions",
+        type=int,
+        default=500_000,
+        help="Transactions added to the seeded ledger",
+    )
+    args = parser.parse_args()
+
+    if args.configured:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+        import django
+
+        django.setup()
+    else:
+        from benchmarks.micro import data
+
+        data.setup_database()
+        data.seed()
+        add_transactions(args.transactions)
+
+    from django.contrib.admin import site
+    from django.db import connection
+
+    from finance.models import Transaction
+    from rental_ms.utils import export
+
+    model_admin = site._registry[Transaction]
+    lookups, header = zip(*model_admin.export_fields)
+    header = [str(name) for name in header]
+    queryset = Transaction.objects.order_by("-created_at", "-id").values_list(*lookups)
+
+    def iter_rows():
+        return queryset.iterator(chunk_size=model_admin.export_chunk_size)
+
+    rows = queryset.count()
+    print(f"{rows:,} transactions on {connection.vendor}")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{'export':<6} {'s':>8} {'us/row':>7} {'5M s':>8} {'first ms':>9} {'MB':>8}")
+    time_export("read", (b"" for _ in iter_rows()), rows)
+    time_export("csv", export.iter_csv(header, iter_rows()), rows)
+    time_export("xlsx", export.iter_xlsx("Transactions", header, iter_rows()), rows)
+    print(
+        "Peak memory grew by "
+        f"{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Replays tenant and visitor sessions against a running server
+
+Sessions arrive in an open loop (Poisson arrivals at `--rate` sessions per second),
+so a slow server does not slow down the arrival of new sessions.
+
+- Tenants log in via `/account/token`, load the dashboard, poll their messages
+  and create, read, update and delete a concern.
+- Visitors fetch the landing page and its data. Tenant sessions run as
+  visitors when all `--tenants` are busy.
+
+Throughput and p50/p95/p99 latency are reported per route and written as JSON
+to `--output` so runs can be compared, e.g with `--compare <previous-run>.json`.
+
+Tenant credentials are read from the database e.g as created by
+`python manage.py generate_dataset` whose users share the password `rental-ms`.
+
+Usage:
+    $ python -m benchmarks.loadtest --url http://localhost:8000 --rate 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks import setup_django
+
+results_dir = Path(__file__).parent / "results"
+
+
+class Recorder:
+    """Latencies and errors per route"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[f"{method} {route}"].append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[f"{method} {route}"] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            routes[name] = dict(
+                requests=len(latencies),
+                errors=self.errors[name],
+                throughput=len(latencies) / elapsed,
+                p50=percentile(latencies, 50) * 1000,
+                p95=percentile(latencies, 95) * 1000,
+                p99=percentile(latencies, 99) * 1000,
+                max=latencies[-1] * 1000,
+            )
+        all_latencies = sorted(
+            latency for latencies in self.latencies.values() for latency in latencies
+        )
+        total = dict(
+            requests=len(all_latencies),
+            errors=sum(self.errors.values()),
+            throughput=len(all_latencies) / elapsed,
+            p50=percentile(all_latencies, 50) * 1000,
+            p95=percentile(all_latencies, 95) * 1000,
+            p99=percentile(all_latencies, 99) * 1000,
+            max=all_latencies[-1] * 1000 if all_latencies else 0,
+        )
+        return dict(total=total, routes=routes)
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+async def tenant_session(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    username: str,
+    password: str,
+    polls: int,
+    think_time: float,
+):
+    response = await recorder.request(
+        client,
+        "POST",
+        "/api/v1/account/token",
+        "/api/v1/account/token",
+        data=dict(grant_type="password", username=username, password=password),
+    )
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def get(route: str, url: str | None = None):
+        return await recorder.request(
+            client, "GET", route, url or route, headers=headers
+        )
+
+    # Dashboard - fetched together like the frontend does
+    dashboard = await asyncio.gather(
+        get("/api/v1/account/profile"),
+        get("/api/v1/core/house"),
+        get("/api/v1/core/unit"),
+        get("/api/v1/account/transactions"),
+        get("/api/v1/core/personal/messages"),
+        get("/api/v1/core/group/messages"),
+        get("/api/v1/core/community/messages"),
+        get("/api/v1/core/concerns"),
+    )
+
+    # Message polling
+    personal_messages = dashboard[4]
+    for _ in range(polls):
+        await asyncio.sleep(think_time)
+        personal_messages = await get("/api/v1/core/personal/messages")
+        await get(
+            "/api/v1/core/group/messages", "/api/v1/core/group/messages?is_read=false"
+        )
+    if personal_messages is not None and personal_messages.status_code == 200:
+        unread = [
+            message for message in personal_messages.json() if not message["is_read"]
+        ]
+        if unread:
+            await recorder.request(
+                client,
+                "PATCH",
+                "/api/v1/core/personal/message/mark-read/{id}",
+                f"/api/v1/core/personal/message/mark-read/{unread[0]['id']}",
+                headers=headers,
+            )
+
+    # Concern CRUD
+    await asyncio.sleep(think_time)
+    response = await recorder.request(
+        client,
+        "POST",
+        "/api/v1/core/concern/new",
+        "/api/v1/core/concern/new",
+        headers=headers,
+        json=dict(about="Load test", details="Raised by the load test"),
+    )
+    if response is None or response.status_code != 200:
+        return
+    concern_url = f"/api/v1/core/concern/{response.json()['id']}"
+    await recorder.request(
+        client, "GET", "/api/v1/core/concern/{id}", concern_url, headers=headers
+    )
+    await recorder.request(
+        client,
+        "PATCH",
+        "/api/v1/core/concern/{id}",
+        concern_url,
+        headers=headers,
+        json=dict(details="Updated by the load test"),
+    )
+    await recorder.request(
+        client, "DELETE", "/api/v1/core/concern/{id}", concern_url, headers=headers
+    )
+
+
+async def visitor_session(client: httpx.AsyncClient, recorder: Recorder):
+    await recorder.request(client, "GET", "/", "/")
+    await asyncio.gather(
+        *(
+            recorder.request(client, "GET", route, route)
+            for route in (
+                "/api/v1/business/about",
+                "/api/v1/business/houses",
+                "/api/v1/business/galleries",
+                "/api/v1/business/feedbacks",
+                "/api/v1/business/faqs",
+                "/api/v1/business/app/utilities",
+            )
+        )
+    )
+
+
+def get_usernames(limit: int) -> list[str]:
+    setup_django()
+    from rental.models import Tenant
+
+    return list(
+        Tenant.objects.order_by("id").values_list("user__username", flat=True)[:limit]
+    )
+
+
+def get_git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary: dict, previous: dict | None = None):
+    print(
+        f"{'route':<58} {'req':>7} {'err':>5} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    rows = list(summary["routes"].items()) + [("TOTAL", summary["total"])]
+    for name, result in rows:
+        line = (
+            f"{name:<58} {result['requests']:>7} {result['errors']:>5} "
+            f"{result['throughput']:>8.1f} {result['p50']:>8.1f} "
+            f"{result['p95']:>8.1f} {result['p99']:>8.1f}"
+        )
+        if previous is not None:
+            before = (
+                previous["total"]
+                if name == "TOTAL"
+                else previous["routes"].get(name)
+            )
+            if before and before["p99"]:
+                line += f"  p99 {(result['p99'] / before['p99'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url", default="http://localhost:8000", help="Base url of the server"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=10, help="Sessions started per second"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="Seconds to keep starting sessions"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=200,
+        help="Maximum sessions in progress, further arrivals wait for a slot",
+    )
+    parser.add_argument(
+        "--tenant-ratio",
+        type=float,
+        default=0.7,
+        help="Fraction of the sessions that are tenants, the rest are visitors",
+    )
+    parser.add_argument(
+        "--tenants", type=int, default=500, help="Number of tenants to log in as"
+    )
+    parser.add_argument(
+        "--password", default="rental-ms", help="Password of the tenants"
+    )
+    parser.add_argument(
+        "--polls", type=int, default=3, help="Message polls per tenant session"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=1,
+        help="Seconds between the steps of a session",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the arrivals")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=results_dir / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json",
+        help="Results file",
+    )
+    parser.add_argument("--compare", type=Path, help="Results of a previous run")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    usernames = (
+        await asyncio.to_thread(get_usernames, args.tenants)
+        if args.tenant_ratio
+        else []
+    )
+    if args.tenant_ratio and not usernames:
+        parser.error("No tenants found - generate a dataset first")
+
+    started_at = datetime.now()
+    recorder = Recorder()
+    slots = asyncio.Semaphore(args.concurrency)
+    delayed_sessions = 0
+
+    # A tenant is in one session at a time - concurrent first logins
+    # would replace each other's token
+    idle_usernames = usernames.copy()
+
+    async def run_session(is_tenant: bool):
+        nonlocal delayed_sessions
+        if slots.locked():
+            delayed_sessions += 1
+        async with slots:
+            if not is_tenant or not idle_usernames:
+                return await visitor_session(client, recorder)
+            username = idle_usernames.pop(rng.randrange(len(idle_usernames)))
+            try:
+                await tenant_session(
+                    client,
+                    recorder,
+                    username,
+                    args.password,
+                    args.polls,
+                    args.think_time,
+                )
+            finally:
+                idle_usernames.append(username)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        sessions = []
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival - start < args.duration:
+            await asyncio.sleep(max(0, next_arrival - time.perf_counter()))
+            sessions.append(
+                asyncio.create_task(run_session(rng.random() < args.tenant_ratio))
+            )
+            next_arrival += rng.expovariate(args.rate)
+        await asyncio.gather(*sessions)
+        elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed)
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    print_summary(summary, previous)
+    print(f"{len(sessions)} sessions in {elapsed:.1f}s, {delayed_sessions} delayed")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            dict(
+                started_at=started_at.isoformat(),
+                commit=get_git_commit(),
+                options={
+                    name: str(value) if isinstance(value, Path) else value
+                    for name, value in vars(args).items()
+                },
+                sessions=len(sessions),
+                delayed_sessions=delayed_sessions,
+                elapsed=elapsed,
+                **summary,
+            ),
+            indent=2,
+        )
+    )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""In-process micro-benchmarks of the model methods and response serializers
+
+Benchmarks run against a small dataset seeded into an in-memory SQLite database.
+Each sample runs in a transaction that is rolled back, so every sample sees the
+same data.
+
+Median timings are compared with the baselines stored in `baselines.json`.
+Baselines are machine specific - re-save them when the reference machine changes.
+
+Usage:
+    $ python -m benchmarks.micro
+    $ python -m benchmarks.micro --check --tolerance 0.25
+    $ python -m benchmarks.micro --save -k rent
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable
+    setup: Callable[[], tuple] | None = None
+    """Prepares the arguments of `func`, not timed"""
+    number: int = 1
+    """Calls per sample"""
+
+    def sample(self) -> float:
+        """Seconds per call, rolling back whatever the calls wrote"""
+        from django.db import transaction
+
+        with transaction.atomic():
+            args = self.setup() if self.setup is not None else ()
+            start = time.perf_counter()
+            for _ in range(self.number):
+                self.func(*args)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed / self.number
+
+    def run(self, samples: int, warmup: int = 2) -> dict:
+        for _ in range(warmup):
+            self.sample()
+        timings = sorted(self.sample() for _ in range(samples))
+        return dict(median=statistics.median(timings), min=timings[0])
+
+
+registry: dict[str, Benchmark] = {}
+"""Benchmarks by name e.g `models.process_rent_payments`"""
+
+
+def benchmark(setup: Callable[[], tuple] | None = None, number: int = 1):
+    """Registers a function as a benchmark named `<module>.<function>`"""
+
+    def decorator(func):
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        registry[name] = Benchmark(name=name, func=func, setup=setup, number=number)
+        return func
+
+    return decorator
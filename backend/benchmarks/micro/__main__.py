@@ -0,0 +1,96 @@
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+from pathlib import Path
+
+from benchmarks.micro import data, registry
+
+baselines_path = Path(__file__).parent / "baselines.json"
+
+
+def load_baselines(path: Path) -> dict:
+    if not path.exists():
+        return dict(benchmarks={})
+    return json.loads(path.read_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="In-process micro-benchmarks of model methods and serializers"
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="*",
+        help="Run benchmarks whose name matches this glob e.g '*rent*'",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=25, help="Samples taken per benchmark"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if a benchmark regressed beyond the tolerance",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Slowdown allowed over the baseline median e.g 0.25 for 25%%",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Store the timings as the new baselines"
+    )
+    parser.add_argument(
+        "--baselines", type=Path, default=baselines_path, help="Baselines file"
+    )
+    args = parser.parse_args()
+
+    data.setup_database()
+    data.seed()
+
+    # Imported for the benchmarks they add to `registry` as they load, after
+    # the database is set up
+    from benchmarks.micro import models, serializers  # noqa: F401
+
+    baselines = load_baselines(args.baselines)
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<42} {'median µs':>12} {'min µs':>12} {'baseline µs':>12}")
+    for name, benchmark in registry.items():
+        if not fnmatch.fnmatch(name, args.filter):
+            continue
+        result = results[name] = benchmark.run(args.samples)
+        line = (
+            f"{name:<42} {result['median'] * 1e6:>12.2f} {result['min'] * 1e6:>12.2f}"
+        )
+        baseline = baselines["benchmarks"].get(name)
+        if baseline is not None:
+            change = result["median"] / baseline["median"] - 1
+            line += f" {baseline['median'] * 1e6:>12.2f} {change * 100:+6.0f}%"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSED"
+        print(line)
+
+    if args.save:
+        baselines["python"] = platform.python_version()
+        baselines["machine"] = platform.machine()
+        baselines["benchmarks"].update(results)
+        baselines["benchmarks"] = dict(sorted(baselines["benchmarks"].items()))
+        args.baselines.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"Baselines written to {args.baselines}")
+
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) slower than the baseline by more "
+            f"than {args.tolerance:.0%}: {', '.join(regressions)}"
+        )
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
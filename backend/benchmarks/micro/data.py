@@ -0,0 +1,120 @@
+"""In-memory database and the dataset the micro-benchmarks run against"""
+
+import os
+from decimal import Decimal
+
+house_name = "Benchmark House"
+
+unit_group_name = "Benchmark Floor"
+
+units_per_group = 20
+"""Units of the seeded unit group, all occupied"""
+
+transactions_per_tenant = 30
+
+messages_per_tenant = 30
+
+
+def setup_database(database: dict | None = None):
+    """Sets up Django on a new database with the schema created,
+    an in-memory SQLite one by default"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+    from django.conf import settings
+
+    settings.DATABASES["default"] = database or {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+
+def seed():
+    from dateutil.relativedelta import relativedelta
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from finance.models import Transaction
+    from management.models import Community, Office, PersonalMessage
+    from rental.models import House, Tenant, UnitGroup
+    from rental_ms.utils import generate_transaction_reference
+    from users.models import CustomUser
+
+    # Hashed once, `CustomUser.save` hashes short (raw) passwords only
+    password = make_password("rental-ms")
+
+    def create_user(number: int, **kwargs) -> CustomUser:
+        return CustomUser.objects.create(
+            username=f"user{number}",
+            first_name="Benchmark",
+            last_name=f"User{number}",
+            email=f"user{number}@localhost.domain",
+            identity_number=number,
+            phone_number=f"0700{number:06d}",
+            password=password,
+            **kwargs,
+        )
+
+    manager = create_user(1, is_staff=True)
+    caretaker = create_user(2, is_staff=True)
+    office = Office.objects.create(
+        name="Benchmark Office",
+        manager=manager,
+        description="<p>Benchmark office</p>",
+        address="1 Benchmark Avenue",
+        contact_number="0711111111",
+        email="office@localhost.domain",
+    )
+    house = House.objects.create(
+        name=house_name,
+        office=office,
+        address="1 Benchmark Street",
+        description="<p>Benchmark house</p>",
+    )
+    house.communities.add(
+        Community.objects.create(
+            name="Benchmark Community",
+            description="Benchmark community",
+            social_media_link="https://t.me/",
+        )
+    )
+    unit_group = UnitGroup(
+        house=house,
+        name=unit_group_name,
+        abbreviated_name="BF",
+        description="<p>Benchmark unit group</p>",
+        number_of_units=units_per_group,
+        monthly_rent=Decimal("15000"),
+        deposit_amount=Decimal("15000"),
+    )
+    unit_group.save()
+    unit_group.caretakers.add(caretaker)
+
+    for number, unit in enumerate(unit_group.units.order_by("id"), start=100):
+        tenant = Tenant.objects.create(user=create_user(number), unit=unit)
+        for _ in range(transactions_per_tenant):
+            Transaction.objects.create(
+                user=tenant.user,
+                type=Transaction.TransactionType.DEPOSIT.value,
+                means=Transaction.TransactionMeans.MPESA.value,
+                amount=Decimal("15000"),
+                reference=generate_transaction_reference(),
+                notes="Monthly payment",
+            )
+        PersonalMessage.objects.bulk_create(
+            PersonalMessage(
+                tenant=tenant,
+                subject=f"Message {index}",
+                content="Benchmark message " * 10,
+            )
+            for index in range(messages_per_tenant)
+        )
+
+    # Rent is due for units last paid a month ago
+    last_month = timezone.now().date() - relativedelta(months=1)
+    unit_group.units.update(last_rent_payment_date=last_month)
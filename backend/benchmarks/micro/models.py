@@ -0,0 +1,68 @@
+"""Model methods on the hot paths"""
+
+from decimal import Decimal
+
+from benchmarks.micro import benchmark
+from benchmarks.micro.data import house_name, unit_group_name
+from finance.models import Transaction
+from rental.models import House, UnitGroup
+from rental_ms.utils import generate_transaction_reference
+from users.models import CustomUser
+
+
+def get_unit_group() -> tuple[UnitGroup]:
+    return (UnitGroup.objects.get(name=unit_group_name),)
+
+
+def new_unit_group() -> tuple[UnitGroup]:
+    return (
+        UnitGroup(
+            house=House.objects.get(name=house_name),
+            name="New Floor",
+            abbreviated_name="NF",
+            description="<p>New unit group</p>",
+            number_of_units=20,
+            monthly_rent=Decimal("15000"),
+            deposit_amount=Decimal("15000"),
+        ),
+    )
+
+
+def new_transaction() -> tuple[Transaction]:
+    return (
+        Transaction(
+            user=CustomUser.objects.get(username="user100"),
+            type=Transaction.TransactionType.DEPOSIT.value,
+            means=Transaction.TransactionMeans.MPESA.value,
+            amount=Decimal("15000"),
+            reference=generate_transaction_reference(),
+            notes="Monthly payment",
+        ),
+    )
+
+
+def get_user() -> tuple[CustomUser]:
+    # As fetched for the account routes
+    return (CustomUser.objects.select_related("account").get(username="user100"),)
+
+
+@benchmark(setup=get_unit_group)
+def process_rent_payments(unit_group: UnitGroup):
+    """Charges rent of the 20 occupied units of a group"""
+    unit_group.process_rent_payments()
+
+
+@benchmark(setup=new_unit_group)
+def unit_group_provisioning(unit_group: UnitGroup):
+    """Creates a unit group along with its 20 units"""
+    unit_group.save()
+
+
+@benchmark(setup=new_transaction)
+def transaction_save(transaction: Transaction):
+    transaction.save()
+
+
+@benchmark(setup=get_user, number=1000)
+def custom_user_model_dump(user: CustomUser):
+    user.model_dump()
@@ -0,0 +1,124 @@
+"""Validation and encoding of the API responses
+
+Contents are shaped the way the routes build them, and encoded through
+`json_response` like the routes do.
+"""
+
+from api.v1.account.models import TransactionInfo, UserProfile
+from api.v1.business.models import HouseInfo, UnitGroupInfo
+from api.v1.core.models import HouseInfoPrivate, PersonalMessageInfo, UnitInfo
+from api.v1.utils import get_document_path, json_response
+from benchmarks.micro import benchmark
+from benchmarks.micro.data import unit_group_name
+from finance.models import Transaction
+from management.models import Community, Office, PersonalMessage
+from rental.models import House, Tenant, UnitGroup
+from users.models import CustomUser
+
+
+def get_profile() -> tuple[dict]:
+    user = CustomUser.objects.select_related("account").get(username="user100")
+    return (user.model_dump(),)
+
+
+def get_transactions() -> tuple[list[dict]]:
+    return (
+        list(
+            Transaction.objects.filter(user__username="user100")
+            .order_by("-created_at")
+            .values("type", "amount", "means", "reference", "notes", "created_at")[:15]
+        ),
+    )
+
+
+def get_personal_messages() -> tuple[list[dict]]:
+    return (
+        list(
+            PersonalMessage.objects.filter(tenant__user__username="user100")
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        ),
+    )
+
+
+def get_house_info() -> tuple[dict]:
+    house_info_dict = House.objects.values(
+        "id", "name", "address", "description", "picture", "office_id"
+    ).get(unit_groups__name=unit_group_name)
+    house_info_dict["communities"] = list(
+        Community.objects.filter(house=house_info_dict["id"]).values(
+            "name", "description", "social_media_link", "created_at"
+        )
+    )
+    house_info_dict["office"] = (
+        Office.objects.filter(id=house_info_dict.pop("office_id"))
+        .values("name", "description", "address", "contact_number", "email")
+        .first()
+    )
+    return (house_info_dict,)
+
+
+def get_unit_info() -> tuple[dict]:
+    tenant = Tenant.objects.select_related("unit__unit_group").get(
+        user__username="user100"
+    )
+    unit_info_dict = tenant.unit.model_dump()
+    unit_group_dict = tenant.unit.unit_group.model_dump()
+    unit_group_dict["caretakers"] = [
+        caretaker.model_dump() for caretaker in tenant.unit.unit_group.caretakers.all()
+    ]
+    unit_info_dict["unit_group"] = unit_group_dict
+    return (unit_info_dict,)
+
+
+def get_houses() -> tuple[list[dict]]:
+    return ([house.model_dump() for house in House.objects.all()],)
+
+
+def get_unit_groups() -> tuple[list[dict]]:
+    return ([unit_group.model_dump() for unit_group in UnitGroup.objects.all()],)
+
+
+@benchmark(setup=get_profile, number=1000)
+def user_profile(content: dict):
+    json_response(UserProfile, content)
+
+
+@benchmark(setup=get_transactions, number=1000)
+def transactions(content: list[dict]):
+    json_response(list[TransactionInfo], content)
+
+
+@benchmark(setup=get_personal_messages, number=1000)
+def personal_messages(content: list[dict]):
+    json_response(list[PersonalMessageInfo], content)
+
+
+@benchmark(setup=get_house_info, number=1000)
+def house_info_private(content: dict):
+    json_response(HouseInfoPrivate, content)
+
+
+@benchmark(setup=get_unit_info, number=1000)
+def unit_info(content: dict):
+    json_response(UnitInfo, content)
+
+
+@benchmark(setup=get_houses, number=1000)
+def houses(content: list[dict]):
+    json_response(list[HouseInfo], content)
+
+
+@benchmark(setup=get_unit_groups, number=1000)
+def unit_groups(content: list[dict]):
+    json_response(list[UnitGroupInfo], content)
+
+
+@benchmark(number=10000)
+def document_path():
+    """Relative and absolute paths as met by the `picture` validators"""
+    get_document_path("default/apartment-2138949_1920.jpg")
+    get_document_path("/media/default/user.png")
+    get_document_path(None)
@@ -0,0 +1,235 @@
+"""Checks that the API's hot queries are served by indexes
+
+Each query is built the way its route builds it, with every filter combination
+the route accepts, and its plan is read with `EXPLAIN`. A query planned as a
+full table scan fails the check. Sorts the index could not serve are reported.
+
+Runs against the seeded in-memory SQLite database by default. With
+`--configured` it runs against the configured database instead. Sequential
+scans are then disabled on PostgreSQL, so that small tables planned as scans
+only fail the check when no index could serve the query.
+
+The tests of the apps owning the queries assert the index serving each.
+
+Usage:
+    $ python -m benchmarks.query_plans
+    $ python -m benchmarks.query_plans --configured --verbose
+"""
+
+import argparse
+import os
+import re
+import sys
+
+full_scan_patterns = {
+    # Scans through an index (`SCAN table USING INDEX ...`) stop at the limit
+    "sqlite": re.compile(r"\bSCAN (\w+)$", re.MULTILINE),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+
+sort_patterns = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+}
+
+
+def get_tenant():
+    """Tenant occupying a unit, whose queries are checked"""
+    from rental.models import Tenant
+
+    return (
+        Tenant.objects.select_related("user", "unit__unit_group")
+        .filter(unit__isnull=False)
+        .first()
+    )
+
+
+def disable_seq_scans(connection):
+    """Has PostgreSQL plan small tables as it would large ones"""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan TO off")
+
+
+def get_full_scan_tables(plan: str, vendor: str) -> list[str]:
+    """Tables `plan` scans whole"""
+    return sorted(set(full_scan_patterns[vendor].findall(plan)))
+
+
+def get_queries(tenant) -> dict:
+    """Hot queries by name, built as their routes build them"""
+    from django.db.models import Q
+    from django.utils import timezone
+
+    from api.v1.core.routes import annotate_is_read
+    from external.models import FAQ, Gallery, ServiceFeedback
+    from finance.models import Transaction
+    from management.models import CommunityMessage, Concern, GroupMessage
+    from management.models import PersonalMessage
+    from users.models import AuthToken
+
+    queries = {}
+
+    message_filters = dict(
+        plain={},
+        unread=dict(is_read=False),
+        read=dict(is_read=True),
+        category=dict(category=CommunityMessage.MessageCategory.GENERAL.value),
+    )
+    for name, search_filter in message_filters.items():
+        queries[f"personal_messages.{name}"] = (
+            PersonalMessage.objects.filter(tenant=tenant, **search_filter)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        )
+        queries[f"group_messages.{name}"] = (
+            annotate_is_read(GroupMessage.objects.all(), tenant)
+            .filter(groups=tenant.unit.unit_group_id, **search_filter)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        )
+        queries[f"community_messages.{name}"] = (
+            annotate_is_read(CommunityMessage.objects.all(), tenant)
+            .filter(
+                communities__house=tenant.unit.unit_group.house_id, **search_filter
+            )
+            .order_by("-created_at")
+            .distinct()
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        )
+
+    concern_filters = dict(
+        plain={}, status=dict(status=Concern.ConcernStatus.OPEN.value)
+    )
+    for name, search_filter in concern_filters.items():
+        queries[f"concerns.{name}"] = (
+            Concern.objects.filter(tenant=tenant, **search_filter)
+            .order_by("-created_at")
+            .values("id", "about", "status", "created_at")[:30]
+        )
+
+    transaction_filters = dict(
+        plain={},
+        means=dict(means=Transaction.TransactionMeans.MPESA.value),
+        type=dict(type=Transaction.TransactionType.DEPOSIT.value),
+        means_and_type=dict(
+            means=Transaction.TransactionMeans.MPESA.value,
+            type=Transaction.TransactionType.DEPOSIT.value,
+        ),
+    )
+    for name, search_filter in transaction_filters.items():
+        queries[f"transactions.{name}"] = (
+            Transaction.objects.filter(user=tenant.user, **search_filter)
+            .order_by("-created_at")
+            .values("type", "amount", "means", "reference", "notes", "created_at")[:15]
+        )
+
+    queries["galleries"] = (
+        Gallery.objects.filter(show_in_index=True)
+        .order_by("-created_at")
+        .values(
+            "title", "details", "location_name", "youtube_video_link", "picture", "date"
+        )[:12]
+    )
+    queries["feedbacks"] = (
+        ServiceFeedback.objects.filter(show_in_index=True)
+        .order_by("-created_at")
+        .all()[:6]
+    )
+    queries["faqs"] = (
+        FAQ.objects.filter(is_shown=True)
+        .order_by("created_at")
+        .values("question", "answer")[:10]
+    )
+
+    # Admin change lists of large tables, first and keyset pages
+    for name, model in dict(
+        transactions=Transaction, personal_messages=PersonalMessage
+    ).items():
+        after = model.objects.order_by("-created_at").values("created_at", "id")[0]
+        queries[f"admin.{name}"] = model.objects.order_by("-created_at", "-id")[:100]
+        queries[f"admin.{name}.after"] = model.objects.filter(
+            Q(created_at__lt=after["created_at"])
+            | Q(created_at=after["created_at"], id__lt=after["id"])
+        ).order_by("-created_at", "-id")[:100]
+    # Admin search of a whole reference
+    reference = Transaction.objects.values_list("reference", flat=True).first()
+    queries["admin.transactions.reference"] = Transaction.objects.filter(
+        reference=reference
+    ).exclude(reference=Transaction.CASH_REFERENCE)
+
+    # Password reset and the sweep of expired tokens
+    queries["reset_token"] = AuthToken.objects.filter_valid("TOKEN123").select_related(
+        "user"
+    )
+    queries["reset_token.expired"] = AuthToken.objects.filter(
+        expiry_datetime__lte=timezone.now()
+    ).values_list("id", flat=True)[:5_000]
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the configured database rather than the seeded in-memory one",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Print the plan of every query"
+    )
+    args = parser.parse_args()
+
+    if args.configured:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
+        import django
+
+        django.setup()
+    else:
+        from benchmarks.micro import data
+
+        data.setup_database()
+        data.seed()
+
+    from django.db import connection
+
+    vendor = connection.vendor
+    if vendor not in full_scan_patterns:
+        sys.exit(f"Query plans of {vendor} databases are not supported")
+    disable_seq_scans(connection)
+
+    tenant = get_tenant()
+    if tenant is None:
+        sys.exit("A tenant occupying a unit is required")
+
+    full_scans = []
+    print(f"{'query':<36} {'plan':<10} sort")
+    for name, queryset in get_queries(tenant).items():
+        plan = queryset.explain()
+        tables = get_full_scan_tables(plan, vendor)
+        sorted_in_memory = sort_patterns[vendor].search(plan) is not None
+        if tables:
+            full_scans.append(name)
+            verdict = "SCAN"
+        else:
+            verdict = "index"
+        line = f"{name:<36} {verdict:<10} {'yes' if sorted_in_memory else 'no'}"
+        if tables:
+            line += f"  full scan of {', '.join(tables)}"
+        print(line)
+        if args.verbose or tables:
+            print("    " + plan.replace("\n", "\n    "))
+
+    if full_scans:
+        print(f"{len(full_scans)} query(ies) planned as full table scans")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Compares transaction references before and after they were time-ordered
+
+Before - 8 distinct characters from `random.sample`, without an index.
+Random - the same under the unique index.
+After - `generate_transaction_reference` under the unique index.
+
+Each is inserted into the ledger of a seeded SQLite database on disk, then
+looked up one reference at a time, as the admin search does. Random references
+are inserted all over the index while time-ordered ones are appended to it.
+
+Usage:
+    $ python -m benchmarks.references
+    $ python -m benchmarks.references --transactions 1000000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from string import ascii_uppercase, digits
+
+batch_size = 1_000
+
+
+def previous_random_token(length: int = 8) -> str:
+    """`generate_random_token` as it was"""
+    return "".join(random.sample(ascii_uppercase + digits, length))
+
+
+def insert(references: list[str], user_ids: list[int]) -> float:
+    """Inserts transactions of `references` and returns the rows per second"""
+    from django.db import transaction
+
+    from finance.models import Transaction
+
+    started = time.perf_counter()
+    for start in range(0, len(references), batch_size):
+        with transaction.atomic():
+            Transaction.objects.bulk_create(
+                Transaction(
+                    user_id=user_ids[index % len(user_ids)],
+                    type=Transaction.TransactionType.DEPOSIT.value,
+                    means=Transaction.TransactionMeans.MPESA.value,
+                    amount=Decimal("15000"),
+                    reference=reference,
+                )
+                for index, reference in enumerate(
+                    references[start : start + batch_size], start
+                )
+            )
+    return len(references) / (time.perf_counter() - started)
+
+
+def look_up(references: list[str]) -> float:
+    """Median milliseconds to find a transaction by its reference"""
+    from finance.models import Transaction
+
+    timings = []
+    for reference in references:
+        started = time.perf_counter()
+        list(
+            Transaction.objects.filter(reference=reference)
+            .exclude(reference=Transaction.CASH_REFERENCE)
+            .values_list("id", flat=True)
+        )
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--transactions", type=int, default=200_000, help="References of each kind"
+    )
+    parser.add_argument(
+        "--lookups", type=int, default=200, help="References looked up of each kind"
+    )
+    args = parser.parse_args()
+
+    from benchmarks.micro import data
+
+    directory = tempfile.TemporaryDirectory()
+    data.setup_database(
+        {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": Path(directory.name) / "references.sqlite3",
+        }
+    )
+    data.seed()
+
+    from django.db import connection
+
+    from finance.models import Transaction
+    from rental_ms.utils import generate_transaction_reference
+    from users.models import CustomUser
+
+    user_ids = list(CustomUser.objects.values_list("id", flat=True))
+    constraint = next(
+        constraint
+        for constraint in Transaction._meta.constraints
+        if constraint.name == "transaction_reference_unique"
+    )
+    seeded_id = Transaction.objects.order_by("-id").values_list("id", flat=True)[0]
+    rng = random.Random(0)
+    is_indexed = True
+
+    print(
+        f"{'references':<12} {'index':>6} {'duplicates':>10} "
+        f"{'inserts/s':>10} {'lookup ms':>10}"
+    )
+    for name, generate, indexed in (
+        ("before", previous_random_token, False),
+        ("random", previous_random_token, True),
+        ("after", generate_transaction_reference, True),
+    ):
+        if indexed != is_indexed:
+            with connection.schema_editor() as schema_editor:
+                if indexed:
+                    schema_editor.add_constraint(Transaction, constraint)
+                else:
+                    schema_editor.remove_constraint(Transaction, constraint)
+            is_indexed = indexed
+        references = [generate() for _ in range(args.transactions)]
+        unique_references = list(dict.fromkeys(references))
+        rate = insert(unique_references, user_ids)
+        milliseconds = look_up(rng.sample(unique_references, args.lookups))
+        print(
+            f"{name:<12} {'yes' if indexed else 'no':>6} "
+            f"{len(references) - len(unique_references):>10,} "
+            f"{rate:>10,.0f} {milliseconds:>10.3f}"
+        )
+        Transaction.objects.filter(id__gt=seeded_id).delete()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Checks that password resets stay fast however many tokens have expired
+
+Adds users with expired reset tokens to the seeded in-memory database and,
+at each size, times finding a reset token the way `/password/reset` does -
+valid, expired and unknown ones. Hashing the new password, the same at any
+size, is left out. Then times deleting the expired tokens in batches.
+
+Usage:
+    $ python -m benchmarks.reset_tokens
+    $ python -m benchmarks.reset_tokens --tokens 100000 --repeat 500
+"""
+
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+batch_size = 10_000
+
+
+def add_expired_tokens(start: int, stop: int):
+    """Adds users numbered from `start` to `stop` with an expired token each"""
+    from django.db import transaction
+    from django.utils import timezone
+
+    from finance.models import UserAccount
+    from users.models import AuthToken, CustomUser
+
+    expired = timezone.now() - timedelta(days=1)
+    for batch_start in range(start, stop, batch_size):
+        numbers = range(batch_start, min(batch_start + batch_size, stop))
+        with transaction.atomic():
+            accounts = UserAccount.objects.bulk_create(UserAccount() for _ in numbers)
+            users = CustomUser.objects.bulk_create(
+                CustomUser(
+                    username=f"expired{number}",
+                    email=f"expired{number}@localhost.domain",
+                    identity_number=60_000_000 + number,
+                    phone_number=f"0788{number:06d}",
+                    password="!",
+                    account=account,
+                )
+                for number, account in zip(numbers, accounts)
+            )
+            AuthToken.objects.bulk_create(
+                AuthToken(
+                    user=user,
+                    token=AuthToken.hash_token(f"EXPIRED{number}"),
+                    expiry_datetime=expired,
+                )
+                for number, user in zip(numbers, users)
+            )
+
+
+def find_token(token: str):
+    """Finds `token` as `/password/reset` does"""
+    from users.models import AuthToken
+
+    try:
+        return AuthToken.objects.filter_valid(token).select_related("user").get()
+    except AuthToken.DoesNotExist:
+        return AuthToken.objects.filter(token=AuthToken.hash_token(token)).exists()
+
+
+def time_lookup(token: str, repeat: int) -> float:
+    """Median milliseconds to find `token`"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        find_token(token)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--tokens", type=int, default=1_000_000, help="Expired tokens at the end"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=200, help="Lookups timed of each kind"
+    )
+    args = parser.parse_args()
+
+    from benchmarks.micro import data
+
+    data.setup_database()
+    data.seed()
+
+    from users.models import AuthToken, CustomUser
+
+    auth_token = AuthToken(user=CustomUser.objects.get(username="user1"))
+    auth_token.set_token("VALID123")
+    auth_token.save()
+
+    sizes = []
+    size = 1_000
+    while size < args.tokens:
+        sizes.append(size)
+        size *= 10
+    sizes.append(args.tokens)
+
+    print(f"{'expired':>10} {'valid ms':>9} {'expired ms':>11} {'unknown ms':>11}")
+    added = 0
+    for size in sizes:
+        add_expired_tokens(added, size)
+        added = size
+        print(
+            f"{size:>10,} {time_lookup('VALID123', args.repeat):>9.3f} "
+            f"{time_lookup(f'EXPIRED{size // 2}', args.repeat):>11.3f} "
+            f"{time_lookup('UNKNOWN1', args.repeat):>11.3f}"
+        )
+
+    started = time.perf_counter()
+    deleted = AuthToken.objects.delete_expired()
+    print(
+        f"Deleted {deleted:,} expired tokens in {time.perf_counter() - started:.1f}s,"
+        f" {AuthToken.objects.count():,} left"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Compares the read/write mix sustained by the stock and tuned SQLite backends
+
+Threads run a mix of the API's reads (message and transaction lists) and writes
+(`Transaction.save` within a transaction like the admin does, and marking a
+message read) against a database file. Each backend runs in a fresh interpreter
+on its own file.
+
+Usage:
+    $ python -m benchmarks.sqlite --threads 16 --write-ratio 0.2 --duration 10
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+engines = {
+    "stock": "django.db.backends.sqlite3",
+    "tuned": "rental_ms.backends.sqlite3",
+}
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0
+    return sorted_values[round(percent / 100 * (len(sorted_values) - 1))]
+
+
+def run(engine: str, threads: int, write_ratio: float, duration: float) -> dict:
+    """Runs the mix on the current interpreter"""
+    from benchmarks.micro import data
+
+    directory = tempfile.mkdtemp()
+    data.setup_database(
+        dict(ENGINE=engines[engine], NAME=str(Path(directory) / "db.sqlite3"))
+    )
+    data.seed()
+
+    from django.db import OperationalError, connection, transaction
+
+    from finance.models import Transaction
+    from management.models import PersonalMessage
+    from rental.models import Tenant
+    from rental_ms.utils import generate_transaction_reference
+
+    tenants = list(Tenant.objects.select_related("user__account"))
+    message_ids = list(PersonalMessage.objects.values_list("id", flat=True))
+    connection.close()
+
+    latencies = dict(read=[], write=[])
+    errors = dict(read=0, write=0)
+    deadline = time.perf_counter() + duration
+
+    def read(tenant: Tenant):
+        list(
+            PersonalMessage.objects.filter(tenant=tenant)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        )
+        list(
+            Transaction.objects.filter(user_id=tenant.user_id)
+            .order_by("-created_at")
+            .values("type", "amount", "means", "reference", "notes", "created_at")[:15]
+        )
+
+    def write(tenant: Tenant, rng: random.Random):
+        if rng.random() < 0.5:
+            with transaction.atomic():
+                Transaction(
+                    user=tenant.user,
+                    type=Transaction.TransactionType.DEPOSIT.value,
+                    means=Transaction.TransactionMeans.CASH.value,
+                    amount=Decimal("100"),
+                    reference=generate_transaction_reference(),
+                ).save()
+        else:
+            PersonalMessage.objects.filter(id=rng.choice(message_ids)).update(
+                is_read=True
+            )
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < write_ratio else "read"
+            tenant = rng.choice(tenants)
+            start = time.perf_counter()
+            try:
+                if kind == "write":
+                    write(tenant, rng)
+                else:
+                    read(tenant)
+            except OperationalError:
+                errors[kind] += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+        connection.close()
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(directory, ignore_errors=True)
+
+    result = {}
+    for kind, values in latencies.items():
+        values.sort()
+        result[kind] = dict(
+            throughput=len(values) / elapsed,
+            errors=errors[kind],
+            p50=percentile(values, 50) * 1000,
+            p99=percentile(values, 99) * 1000,
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent threads")
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.2, help="Fraction of writes in the mix"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10, help="Seconds each backend runs"
+    )
+    parser.add_argument("--engine", choices=engines, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        result = run(args.engine, args.threads, args.write_ratio, args.duration)
+        return print(json.dumps(result))
+
+    print(
+        f"{args.threads} threads, {args.write_ratio:.0%} writes, "
+        f"{args.duration:g}s per backend"
+    )
+    print(
+        f"{'backend':<8} {'op':<6} {'ops/s':>9} {'errors':>7} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for engine in engines:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite", *sys.argv[1:]]
+            + ["--engine", engine],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(output.stdout.splitlines()[-1])
+        for kind, stats in result.items():
+            print(
+                f"{engine:<8} {kind:<6} {stats['throughput']:>9.1f} "
+                f"{stats['errors']:>7} {stats['p50']:>8.2f} {stats['p99']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
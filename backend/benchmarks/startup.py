@@ -0,0 +1,62 @@
+"""Reports import time and resident memory of an API worker per settings profile
+
+Each sample imports `api` in a fresh interpreter, the way a worker process does.
+
+Usage:
+    $ python -m benchmarks.startup --samples 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+profiles = {
+    "full": "rental_ms.settings",
+    "api": "rental_ms.settings.api",
+}
+
+probe = """
+import json, resource, sys, time
+start = time.perf_counter()
+import api
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps(dict(import_time=elapsed, rss=rss_kb / 1024, apps=len(
+    __import__("django.apps").apps.apps.get_app_configs()))))
+"""
+
+
+def sample(settings_module: str) -> dict:
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5, help="Samples per profile")
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'apps':>5} {'import s':>9} {'rss MiB':>9}")
+    for name, settings_module in profiles.items():
+        results = [sample(settings_module) for _ in range(args.samples)]
+        print(
+            f"{name:<8} {results[0]['apps']:>5} "
+            f"{statistics.median(r['import_time'] for r in results):>9.3f} "
+            f"{statistics.median(r['rss'] for r in results):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Reports requests/sec and memory per worker as `python -m api serve` scales
+
+For every worker count, a server is started, loaded for `--duration` seconds by
+`--clients` client processes and then measured. Memory is reported as RSS and as
+PSS (proportional set size) - the latter splits pages shared copy-on-write with
+the master between the processes sharing them. Linux only.
+
+Usage:
+    $ python -m benchmarks.workers --workers 1 2 4 8 --route /api/v1/business/faqs
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+
+def read_memory(pid: int) -> dict:
+    """RSS and PSS of a process in MiB"""
+    memory = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("Rss", "Pss"):
+            memory[key.lower()] = int(value.split()[0]) / 1024
+    return memory
+
+
+def get_children(pid: int) -> list[int]:
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children.extend(map(int, (task / "children").read_text().split()))
+    return children
+
+
+def client(url: str, duration: float, concurrency: int, counter) -> None:
+    async def worker(session: httpx.AsyncClient, deadline: float):
+        completed = 0
+        while time.monotonic() < deadline:
+            response = await session.get(url)
+            completed += response.status_code < 400
+        return completed
+
+    async def main():
+        deadline = time.monotonic() + duration
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as session:
+            results = await asyncio.gather(
+                *(worker(session, deadline) for _ in range(concurrency))
+            )
+        with counter.get_lock():
+            counter.value += sum(results)
+
+    asyncio.run(main())
+
+
+def wait_until_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.5)
+    raise TimeoutError(f"Server at {url} did not come up")
+
+
+def measure(workers: int, args) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "api", "serve", "--port", str(args.port)]
+        + ["--workers", str(workers), "--log-level", "warning"],
+    )
+    url = f"http://127.0.0.1:{args.port}{args.route}"
+    try:
+        wait_until_ready(url)
+        time.sleep(1)  # Let every worker finish starting up
+        counter = multiprocessing.Value("i", 0)
+        clients = [
+            multiprocessing.Process(
+                target=client, args=(url, args.duration, args.concurrency, counter)
+            )
+            for _ in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        for process in clients:
+            process.join()
+        worker_memory = [read_memory(pid) for pid in get_children(server.pid)]
+        return dict(
+            workers=workers,
+            throughput=counter.value / args.duration,
+            master_rss=read_memory(server.pid)["rss"],
+            rss=sum(memory["rss"] for memory in worker_memory) / len(worker_memory),
+            pss=sum(memory["pss"] for memory in worker_memory) / len(worker_memory),
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cpu_count = os.cpu_count() or 1
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, max(cpu_count // 2, 1), cpu_count}),
+        help="Worker counts to measure",
+    )
+    parser.add_argument("--route", default="/api/v1/business/faqs", help="Route to hit")
+    parser.add_argument("--port", type=int, default=8765, help="Port to serve on")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per run")
+    parser.add_argument("--clients", type=int, default=cpu_count, help="Client processes")
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Connections per client process"
+    )
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>9} {'master MiB':>10} {'rss MiB':>8} {'pss MiB':>8}")
+    for workers in args.workers:
+        result = measure(workers, args)
+        print(
+            "{workers:>7} {throughput:>9.1f} {master_rss:>10.1f} {rss:>8.1f} "
+            "{pss:>8.1f}".format(**result)
+        )
+
+
+if __name__ == "__main__":
+    main()
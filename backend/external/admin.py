@@ -1,6 +1,7 @@
 from django.contrib import admin
 from external.models import About, ServiceFeedback, Message, Gallery, FAQ, Document
 from django.utils.translation import gettext_lazy as _
+from management.search import SearchIndexAdminMixin
 
 # from unfold.admin import ModelAdmin
 from rental_ms.utils.admin import (
@@ -81,6 +82,7 @@ class ServiceFeedbackAdmin(DevelopmentImportExportModelAdmin):
     list_filter = ("rate", "sender_role", "show_in_index", "updated_at", "created_at")
     list_editable = ("show_in_index",)
     ordering = ("-created_at",)
+    autocomplete_fields = ("sender",)
     fieldsets = (
         (None, {"fields": ("sender", "message")}),
         (_("Details"), {"fields": ("sender_role", "rate"), "classes": ["tab"]}),
@@ -113,10 +115,11 @@ class MessageAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(FAQ)
-class FAQAdmin(CustomImportExportModelAdmin):
+class FAQAdmin(SearchIndexAdminMixin, CustomImportExportModelAdmin):
     list_display = ("question", "is_shown", "created_at")
     list_filter = ("is_shown", "created_at")
-    search_fields = ("question", "answer")
+    search_fields = ("question",)
+    search_index_fields = ("answer",)
     list_editable = ("is_shown",)
     ordering = ("-created_at",)
 
@@ -177,6 +177,18 @@ class ServiceFeedback(models.Model):
     class Meta:
         verbose_name = _("Feedback")
         verbose_name_plural = _("Feedbacks")
+        indexes = [
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(show_in_index=True),
+                name="feedback_shown_idx",
+            ),
+            # MySQL doesn't create partial indexes
+            models.Index(
+                fields=["show_in_index", "-created_at"],
+                name="feedback_show_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.rate} feedback from {self.sender}"
@@ -227,6 +239,17 @@ class FAQ(models.Model):
     class Meta:
         verbose_name = _("FAQ")
         verbose_name_plural = _("FAQs")
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_shown=True),
+                name="faq_is_shown_idx",
+            ),
+            # MySQL doesn't create partial indexes
+            models.Index(
+                fields=["is_shown", "created_at"], name="faq_shown_created_idx"
+            ),
+        ]
 
 
 class Gallery(models.Model):
@@ -265,6 +288,18 @@ class Gallery(models.Model):
     class Meta:
         verbose_name = _("Gallery")
         verbose_name_plural = _("Galleries")
+        indexes = [
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(show_in_index=True),
+                name="gallery_shown_idx",
+            ),
+            # MySQL doesn't create partial indexes
+            models.Index(
+                fields=["show_in_index", "-created_at"],
+                name="gallery_show_created_idx",
+            ),
+        ]
 
 
 class Document(models.Model):
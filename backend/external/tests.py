@@ -1,3 +1,45 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from external.models import FAQ, Gallery, ServiceFeedback
+from rental_ms.utils.testing import AdminPageTestCase, QueryPlanTestCase
+
+
+class ShownEntriesQueryPlanTests(QueryPlanTestCase):
+    """Queries of the entries shown on the site, as the business routes make
+    them"""
+
+    def test_galleries_use_shown_index(self):
+        self.assertUsesIndex(
+            Gallery.objects.filter(show_in_index=True)
+            .order_by("-created_at")
+            .values(
+                "title",
+                "details",
+                "location_name",
+                "youtube_video_link",
+                "picture",
+                "date",
+            )[:12],
+            "gallery_shown_idx",
+        )
+
+    def test_feedbacks_use_shown_index(self):
+        self.assertUsesIndex(
+            ServiceFeedback.objects.filter(show_in_index=True).order_by("-created_at")[
+                :6
+            ],
+            "feedback_shown_idx",
+        )
+
+    def test_faqs_use_shown_index(self):
+        self.assertUsesIndex(
+            FAQ.objects.filter(is_shown=True)
+            .order_by("created_at")
+            .values("question", "answer")[:10],
+            "faq_is_shown_idx",
+        )
+
+
+class AdminPageTests(AdminPageTestCase):
+    def test_feedback_form_is_small(self):
+        self.assertPageSmall(reverse("admin:external_servicefeedback_add"))
@@ -1,10 +1,16 @@
+import re
+
 from django.contrib import admin
 
 # Register your models here.
 from finance.models import Account, UserAccount, Transaction, ExtraFee
 from finance.forms import TransactionForm
 from django.utils.translation import gettext_lazy as _
-from rental_ms.utils.admin import DevelopmentImportExportModelAdmin
+from rental_ms.utils.admin import (
+    DevelopmentImportExportModelAdmin,
+    LargeTableAdminMixin,
+    StreamingExportAdminMixin,
+)
 
 
 @admin.register(Account)
@@ -42,7 +48,9 @@ class UserAccountAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(Transaction)
-class TransactionAdmin(DevelopmentImportExportModelAdmin):
+class TransactionAdmin(
+    LargeTableAdminMixin, StreamingExportAdminMixin, DevelopmentImportExportModelAdmin
+):
     form = TransactionForm
     list_display = (
         "user",
@@ -55,6 +63,17 @@ class TransactionAdmin(DevelopmentImportExportModelAdmin):
     search_fields = ("user__username", "reference", "type")
     list_filter = ("type", "means", "created_at")
     ordering = ("-created_at",)
+    autocomplete_fields = ("user",)
+    # Ledger
+    export_fields = (
+        ("created_at", _("Date")),
+        ("reference", _("Reference")),
+        ("user__username", _("Username")),
+        ("type", _("Type")),
+        ("means", _("Means")),
+        ("amount", _("Amount")),
+        ("notes", _("Notes")),
+    )
 
     fieldsets = (
         (
@@ -92,6 +111,18 @@ class TransactionAdmin(DevelopmentImportExportModelAdmin):
 
     readonly_fields = ("created_at",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # A whole reference is matched on its unique index, sparing a scan of
+        # the ledger
+        reference = search_term.strip()
+        if re.fullmatch(r"[\w-]{4,}", reference):
+            matches = queryset.filter(reference=reference).exclude(
+                reference=Transaction.CASH_REFERENCE
+            )
+            if matches.exists():
+                return matches, False
+        return super().get_search_results(request, queryset, search_term)
+
     def has_delete_permission(self, request, obj=...):
         return False
 
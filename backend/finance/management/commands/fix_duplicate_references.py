@@ -0,0 +1,65 @@
+"""Gives transactions sharing a reference references of their own
+
+`Transaction.reference` is unique (cash transactions' `--` aside), which fails
+to migrate while references are shared - e.g random tokens that collided or an
+M-PESA reference entered twice. The oldest transaction of each keeps the
+reference, the others get one from `generate_transaction_reference` with the
+former noted. Run before `migrate`, it does nothing on a new database.
+
+Usage:
+    $ python manage.py fix_duplicate_references
+    $ python manage.py fix_duplicate_references --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from finance.models import Transaction
+from rental_ms.utils import generate_transaction_reference
+
+
+class Command(BaseCommand):
+    help = "Gives transactions sharing a reference references of their own"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the shared references without changing them",
+        )
+
+    def handle(self, *args, **options):
+        if Transaction._meta.db_table not in connection.introspection.table_names():
+            return
+        queryset = Transaction.objects.exclude(
+            reference=Transaction.CASH_REFERENCE
+        ).only("id", "reference", "notes")
+        references = list(
+            queryset.values("reference")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .values_list("reference", flat=True)
+        )
+        changed_transactions = []
+        for reference in references:
+            # The oldest keeps it
+            for entry in queryset.filter(reference=reference).order_by("id")[1:]:
+                if options["dry_run"]:
+                    self.stdout.write(f"Transaction {entry.id}: {reference}")
+                    continue
+                entry.reference = generate_transaction_reference()
+                entry.notes = "\n".join(
+                    filter(None, [entry.notes, f"Former reference: {reference}"])
+                )
+                changed_transactions.append(entry)
+        with transaction.atomic():
+            Transaction.objects.bulk_update(
+                changed_transactions, ["reference", "notes"], batch_size=1_000
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(references):,} shared references, "
+                f"{len(changed_transactions):,} transactions given new ones"
+            )
+        )
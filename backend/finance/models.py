@@ -63,6 +63,10 @@ class UserAccount(models.Model):
         return str(self.balance)
 
 
+CASH_REFERENCE = "--"
+"""Reference of cash transactions, the only one shared"""
+
+
 class Transaction(models.Model):
     class TransactionMeans(EnumWithChoices):
         CASH = "Cash"
@@ -76,6 +80,8 @@ class Transaction(models.Model):
         RENT_PAYMENT = "Rent Payment"
         FEE_PAYMENT = "Fee Payment"
 
+    CASH_REFERENCE = CASH_REFERENCE
+
     user = models.ForeignKey(
         "users.CustomUser",
         verbose_name=_("User"),
@@ -104,7 +110,9 @@ class Transaction(models.Model):
         help_text=_("Select means of transaxtion"),
     )
     reference = models.CharField(
-        max_length=100, help_text=_("Transaction ID or -- for cash."), default="--"
+        max_length=100,
+        help_text=_("Transaction ID or -- for cash."),
+        default=CASH_REFERENCE,
     )
     notes = models.TextField(
         verbose_name="Notes",
@@ -118,6 +126,38 @@ class Transaction(models.Model):
         help_text=_("Date and time when the entry was created"),
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="transaction_user_created_idx"
+            ),
+            models.Index(
+                fields=["user", "type", "-created_at"], name="transaction_user_type_idx"
+            ),
+            models.Index(
+                fields=["user", "means", "-created_at"],
+                name="transaction_user_means_idx",
+            ),
+            # Admin change list order, paged by keyset
+            models.Index(fields=["-created_at", "-id"], name="transaction_created_idx"),
+            # MySQL doesn't create partial indexes, nor enforce the constraint below
+            models.Index(fields=["reference"], name="transaction_reference_idx"),
+        ]
+        constraints = [
+            # Lookups repeat the condition, e.g
+            # `.filter(reference=...).exclude(reference=CASH_REFERENCE)`, for
+            # SQLite to use the index
+            models.UniqueConstraint(
+                fields=["reference"],
+                condition=~models.Q(reference=CASH_REFERENCE),
+                name="transaction_reference_unique",
+                violation_error_message=_(
+                    "A transaction with this reference already exists."
+                ),
+            ),
+        ]
+        permissions = [("export_transaction", _("Can export transactions"))]
+
     def __str__(self):
         return (
             f"Amount {CURRENCY}. {self.amount} via {self.means} (Ref: {self.reference})"
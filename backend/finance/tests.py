@@ -1,3 +1,171 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Permission
+from django.db.models import Q
 from django.test import TestCase
+from django.urls import reverse
+
+from finance.models import Transaction
+from rental_ms.utils import generate_transaction_reference
+from rental_ms.utils.admin import EstimatedCountPaginator
+from rental_ms.utils.testing import (
+    AdminPageTestCase,
+    AdminTestCase,
+    QueryPlanTestCase,
+    create_user,
+)
+
+
+class TransactionQueryPlanTests(QueryPlanTestCase):
+    """Queries of the user's transactions, as `get_financial_transactions` makes them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(100)
+
+    def get_transactions(self, **search_filter):
+        return (
+            Transaction.objects.filter(user=self.user, **search_filter)
+            .order_by("-created_at")
+            .values("type", "amount", "means", "reference", "notes", "created_at")[:15]
+        )
+
+    def test_transactions_use_user_index(self):
+        self.assertUsesIndex(self.get_transactions(), "transaction_user_created_idx")
+
+    def test_transactions_of_a_type_use_type_index(self):
+        self.assertUsesIndex(
+            self.get_transactions(type=Transaction.TransactionType.DEPOSIT.value),
+            "transaction_user_type_idx",
+        )
+
+    def test_admin_pages_use_created_index(self):
+        transaction = Transaction.objects.create(
+            user=self.user, amount=15000, reference=generate_transaction_reference()
+        )
+        self.assertUsesIndex(
+            Transaction.objects.order_by("-created_at", "-id")[:100],
+            "transaction_created_idx",
+        )
+        self.assertUsesIndex(
+            Transaction.objects.filter(
+                Q(created_at__lt=transaction.created_at)
+                | Q(created_at=transaction.created_at, id__lt=transaction.id)
+            ).order_by("-created_at", "-id")[:100],
+            "transaction_created_idx",
+        )
+
+    def test_reference_search_uses_reference_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(reference="ABCD1234").exclude(
+                reference=Transaction.CASH_REFERENCE
+            ),
+            "transaction_reference_unique",
+        )
+
+    def test_transactions_of_a_means_use_means_index(self):
+        self.assertUsesIndex(
+            self.get_transactions(means=Transaction.TransactionMeans.MPESA.value),
+            "transaction_user_means_idx",
+        )
+
+
+class AdminPageTests(AdminPageTestCase):
+    def test_transaction_form_is_small(self):
+        self.assertPageSmall(reverse("admin:finance_transaction_add"))
+
+    def test_user_autocomplete_is_paged(self):
+        response = self.assertPageSmall(
+            reverse("admin:autocomplete")
+            + "?app_label=finance&model_name=transaction&field_name=user&term=extra"
+        )
+        self.assertTrue(response.json()["pagination"]["more"])
+
+
+@patch.object(EstimatedCountPaginator, "exact_count_limit", 200)
+class TransactionChangeListTests(AdminTestCase):
+    """Pages of the ledger, counted up to 200 transactions and past them
+    paged by keyset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        user = create_user(100)
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=user, amount=15000, reference=generate_transaction_reference()
+            )
+            for _ in range(450)
+        )
+        cls.ids = list(
+            Transaction.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def test_numbered_pages_stop_at_the_count_limit(self):
+        url = reverse("admin:finance_transaction_changelist")
+        changelist = self.get_changelist(url, 8)
+        self.assertEqual(
+            [transaction.id for transaction in changelist.result_list],
+            self.ids[:100],
+        )
+        self.assertTrue(changelist.paginator.is_estimated)
+        self.assertEqual(changelist.paginator.num_pages, 2)
+        self.assertIsNone(changelist.keyset_next_url)
+
+    def test_keyset_pages_follow_the_last_numbered_one(self):
+        url = reverse("admin:finance_transaction_changelist")
+        changelist = self.get_changelist(url + "?p=2", 8)
+        for page in range(2, 4):
+            changelist = self.get_changelist(url + changelist.keyset_next_url, 7)
+            self.assertEqual(
+                [transaction.id for transaction in changelist.result_list],
+                self.ids[page * 100 : (page + 1) * 100],
+            )
+        changelist = self.get_changelist(url + changelist.keyset_next_url, 7)
+        self.assertEqual(
+            [transaction.id for transaction in changelist.result_list],
+            self.ids[400:],
+        )
+        self.assertIsNone(changelist.keyset_next_url)
+
+
+class TransactionExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_user(3, is_staff=True)
+        # Import-export's change list (`DEBUG`) has tools for those who can add
+        cls.staff.user_permissions.add(
+            *Permission.objects.filter(
+                codename__in=["view_transaction", "add_transaction"]
+            )
+        )
+        cls.transaction = Transaction.objects.create(
+            user=create_user(100),
+            amount=15000,
+            reference=generate_transaction_reference(),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.changelist_url = reverse("admin:finance_transaction_changelist")
+        self.export_url = reverse(
+            "admin:finance_transaction_stream_export", args=["csv"]
+        )
+
+    def test_viewing_doesnt_allow_exporting(self):
+        self.assertNotContains(self.client.get(self.changelist_url), self.export_url)
+        self.assertEqual(self.client.get(self.export_url).status_code, 403)
 
-# Create your tests here.
+    def test_export_permission_allows_exporting(self):
+        self.staff.user_permissions.add(
+            Permission.objects.get(codename="export_transaction")
+        )
+        self.assertContains(self.client.get(self.changelist_url), self.export_url)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            self.transaction.reference,
+            b"".join(response.streaming_content).decode(),
+        )
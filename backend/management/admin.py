@@ -8,7 +8,12 @@ from management.models import (
     PersonalMessage,
     AppUtility,
 )
-from rental_ms.utils.admin import DevelopmentImportExportModelAdmin
+from management.search import SearchIndexAdminMixin
+from rental_ms.utils.admin import (
+    AutocompleteListFilter,
+    DevelopmentImportExportModelAdmin,
+    LargeTableAdminMixin,
+)
 from django.utils.translation import gettext_lazy as _
 from management.forms import AppUtilityForm
 from django.contrib.admin.models import LogEntry
@@ -18,7 +23,7 @@ from django.contrib.admin.models import LogEntry
 
 
 @admin.register(LogEntry)
-class CustomLogEntryAdmin(admin.ModelAdmin):
+class CustomLogEntryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("action_time", "user", "content_type", "object_id", "action_flag")
     search_fields = [
         "user__username",
@@ -27,12 +32,15 @@ class CustomLogEntryAdmin(admin.ModelAdmin):
         "object_repr",
     ]
     list_filter = (
-        "user",
+        ("user", AutocompleteListFilter),
         "action_flag",
         "content_type",
         "action_time",
     )
     date_hierarchy = "action_time"
+    # Ids follow the action time, and unlike it have an index
+    ordering = ("-id",)
+    keyset_field = "id"
 
     def has_add_permission(self, request):
         return False
@@ -52,7 +60,8 @@ class OfficeAdmin(DevelopmentImportExportModelAdmin):
         "created_at",
     )
     search_fields = ("name", "address", "manager__username", "contact_number", "email")
-    list_filter = ("manager", "created_at", "updated_at")
+    list_filter = (("manager", AutocompleteListFilter), "created_at", "updated_at")
+    autocomplete_fields = ("manager",)
     fieldsets = (
         (
             None,
@@ -82,11 +91,13 @@ class OfficeAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(Concern)
-class ConcernAdmin(DevelopmentImportExportModelAdmin):
+class ConcernAdmin(SearchIndexAdminMixin, DevelopmentImportExportModelAdmin):
     list_display = ("tenant", "about", "status", "updated_at", "created_at")
     list_editable_fields = ("status",)
-    search_fields = ("tenant__user__username", "about", "details", "response", "status")
+    search_fields = ("tenant__user__username", "status")
+    search_index_fields = ("about", "details", "response")
     list_filter = ("status", "updated_at", "created_at")
+    autocomplete_fields = ("tenant",)
     fieldsets = (
         (
             None,
@@ -141,11 +152,17 @@ class CommunityAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(GroupMessage)
-class GroupMessageAdmin(DevelopmentImportExportModelAdmin):
+class GroupMessageAdmin(SearchIndexAdminMixin, DevelopmentImportExportModelAdmin):
     list_display = ("subject", "category", "created_at", "updated_at")
-    search_fields = ("subject", "category", "groups__name")
-    list_filter = ("category", "groups", "created_at", "updated_at")
-    filter_horizontal = ("groups",)
+    search_fields = ("category", "groups__name")
+    search_index_fields = ("subject", "content")
+    list_filter = (
+        "category",
+        ("groups", AutocompleteListFilter),
+        "created_at",
+        "updated_at",
+    )
+    autocomplete_fields = ("groups",)
     fieldsets = (
         (
             None,
@@ -174,7 +191,9 @@ class GroupMessageAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(PersonalMessage)
-class PersonalMessageAdmin(DevelopmentImportExportModelAdmin):
+class PersonalMessageAdmin(
+    LargeTableAdminMixin, SearchIndexAdminMixin, DevelopmentImportExportModelAdmin
+):
     list_display = (
         "tenant",
         "category",
@@ -183,8 +202,12 @@ class PersonalMessageAdmin(DevelopmentImportExportModelAdmin):
         "created_at",
         "updated_at",
     )
-    search_fields = ("tenant__user__username", "subject", "content", "category")
+    # Rendered by `Tenant.__str__`
+    list_select_related = ("tenant__user", "tenant__unit")
+    search_fields = ("tenant__user__username", "category")
+    search_index_fields = ("subject", "content")
     list_filter = ("category", "is_read", "created_at", "updated_at")
+    autocomplete_fields = ("tenant",)
     fieldsets = (
         (
             None,
@@ -216,9 +239,10 @@ class PersonalMessageAdmin(DevelopmentImportExportModelAdmin):
 
 
 @admin.register(CommunityMessage)
-class CommunityMessageAdmin(DevelopmentImportExportModelAdmin):
+class CommunityMessageAdmin(SearchIndexAdminMixin, DevelopmentImportExportModelAdmin):
     list_display = ("subject", "category", "created_at", "updated_at")
-    search_fields = ("subject", "category", "communities__name")
+    search_fields = ("category", "communities__name")
+    search_index_fields = ("subject", "content")
     list_filter = ("category", "created_at", "updated_at")
     filter_horizontal = ("communities",)
     fieldsets = (
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ManagementConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "management"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_migrate, post_save
+
+        from management import search
+
+        # Full-text index of messages, concerns and FAQs
+        post_migrate.connect(search.create_index_table_after_migrate, sender=self)
+        for model_label in search.kinds_by_label:
+            post_save.connect(search.update_index, sender=model_label)
+            post_delete.connect(search.remove_from_index, sender=model_label)
@@ -0,0 +1,42 @@
+"""Indexes every message, concern and FAQ afresh in the full-text index
+
+Needed once after upgrading, and after rows are written around the models
+e.g by `generate_dataset`.
+
+Usage:
+    $ python manage.py rebuild_search_index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from management import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text index of messages, concerns and FAQs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database whose index is rebuilt",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=2_000, help="Rows written at once"
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_enabled(options["database"]):
+            raise CommandError("Full-text search needs a SQLite or PostgreSQL database")
+        start_time = time.perf_counter()
+        counts = search.rebuild(options["database"], options["batch_size"])
+        for kind, count in counts.items():
+            self.stdout.write(f"  {kind.value}: {count:,}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Search index rebuilt in %.1fs" % (time.perf_counter() - start_time)
+            )
+        )
@@ -144,6 +144,15 @@ class Concern(models.Model):
     class Meta:
         verbose_name = _("Tenant Concern")
         verbose_name_plural = _("Tenant Concerns")
+        indexes = [
+            models.Index(
+                fields=["tenant", "-created_at"], name="concern_tenant_created_idx"
+            ),
+            models.Index(
+                fields=["tenant", "status", "-created_at"],
+                name="concern_tenant_status_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.about} - {self.tenant} - {self.status}"
@@ -371,6 +380,31 @@ class PersonalMessage(models.Model):
     class Meta:
         verbose_name = _("Personal Message")
         verbose_name_plural = _("Personal Messages")
+        indexes = [
+            models.Index(
+                fields=["tenant", "-created_at"], name="personal_msg_tenant_idx"
+            ),
+            # Boolean filters are rendered as bare conditions e.g
+            # `WHERE NOT is_read`, which SQLite only serves from partial indexes
+            models.Index(
+                fields=["tenant", "-created_at"],
+                condition=models.Q(is_read=False),
+                name="personal_msg_unread_idx",
+            ),
+            # MySQL doesn't create partial indexes
+            models.Index(
+                fields=["tenant", "is_read", "-created_at"],
+                name="personal_msg_read_idx",
+            ),
+            models.Index(
+                fields=["tenant", "category", "-created_at"],
+                name="personal_msg_category_idx",
+            ),
+            # Admin change list order, paged by keyset
+            models.Index(
+                fields=["-created_at", "-id"], name="personal_msg_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.subject} ({self.category}) - {self.tenant}"
@@ -0,0 +1,331 @@
+"""Full-text search over messages, concerns and FAQs
+
+Subject/content of messages, about/details/response of concerns and
+question/answer of FAQs are kept in a single full-text index,
+`management_searchindex`, chosen by the database backend:
+
+- SQLite - an FTS5 virtual table, ranked with bm25.
+- PostgreSQL - a table with a weighted `tsvector` column under a GIN index,
+  ranked with `ts_rank`.
+
+The index is created after `migrate` and kept in sync as the indexed models
+are saved and deleted. Rows written around the models (bulk inserts,
+`QuerySet.update`) are indexed with `python manage.py rebuild_search_index`.
+Other databases have no index - the admin keeps searching with `icontains`
+and the API reports search as unavailable.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Model, QuerySet
+from django.utils.html import strip_tags
+
+from rental_ms.utils import EnumWithChoices
+
+table_name = "management_searchindex"
+
+kind_bits = 3
+"""Index rows are keyed `object id << kind_bits | kind code`. Unique across
+kinds and, unlike the text columns, looked up by key on FTS5 too"""
+
+admin_match_limit = 1_000
+"""Most matches of the admin search, best ranked first"""
+
+snippet_words = 24
+
+
+class SearchKind(EnumWithChoices):
+    PERSONAL_MESSAGE = "personal_message"
+    GROUP_MESSAGE = "group_message"
+    COMMUNITY_MESSAGE = "community_message"
+    CONCERN = "concern"
+    FAQ = "faq"
+
+
+@dataclass(frozen=True)
+class Source:
+    code: int
+    model_label: str
+    title_field: str
+    body_fields: tuple[str, ...]
+
+    @property
+    def model(self) -> type[Model]:
+        return apps.get_model(self.model_label)
+
+    def get_key(self, object_id: int) -> int:
+        return object_id << kind_bits | self.code
+
+    def get_document(self, title: str | None, *bodies: str | None) -> tuple[str, str]:
+        """Title and body of an object as plain text"""
+        return to_text(title), "\n".join(to_text(body) for body in bodies if body)
+
+
+sources = {
+    SearchKind.PERSONAL_MESSAGE: Source(
+        1, "management.PersonalMessage", "subject", ("content",)
+    ),
+    SearchKind.GROUP_MESSAGE: Source(
+        2, "management.GroupMessage", "subject", ("content",)
+    ),
+    SearchKind.COMMUNITY_MESSAGE: Source(
+        3, "management.CommunityMessage", "subject", ("content",)
+    ),
+    SearchKind.CONCERN: Source(
+        4, "management.Concern", "about", ("details", "response")
+    ),
+    SearchKind.FAQ: Source(5, "external.FAQ", "question", ("answer",)),
+}
+"""Indexed models by kind"""
+
+kinds_by_code = {source.code: kind for kind, source in sources.items()}
+
+kinds_by_label = {source.model_label: kind for kind, source in sources.items()}
+
+statements = {
+    "sqlite": dict(
+        key="rowid",
+        create=[
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table_name} USING fts5("
+            "title, body, tokenize = 'porter unicode61 remove_diacritics 2')"
+        ],
+        upsert=f"INSERT OR REPLACE INTO {table_name} (rowid, title, body) "
+        "VALUES (%s, %s, %s)",
+        delete=f"DELETE FROM {table_name} WHERE rowid = %s",
+        # bm25 - lower is better. Title matches weigh 10 times body ones.
+        search=f"SELECT rowid, title, snippet({table_name}, 1, '', '', '…', "
+        f"{snippet_words}), -bm25({table_name}, 10.0, 1.0) AS score "
+        f"FROM {table_name} WHERE {table_name} MATCH %s AND ({{scope}}) "
+        "ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s",
+    ),
+    "postgresql": dict(
+        key="id",
+        create=[
+            f"CREATE TABLE IF NOT EXISTS {table_name} ("
+            "id bigint PRIMARY KEY, title text NOT NULL, body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', body), 'B')) STORED)",
+            f"CREATE INDEX IF NOT EXISTS {table_name}_document_idx "
+            f"ON {table_name} USING gin (document)",
+        ],
+        upsert=f"INSERT INTO {table_name} (id, title, body) VALUES (%s, %s, %s) "
+        "ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body",
+        delete=f"DELETE FROM {table_name} WHERE id = %s",
+        search=f"SELECT id, title, ts_headline('english', body, query, "
+        f'\'StartSel="", StopSel="", MaxWords={snippet_words}, MinWords=8\'), '
+        "ts_rank(document, query) AS score "
+        f"FROM {table_name}, websearch_to_tsquery('english', %s) AS query "
+        "WHERE document @@ query AND ({scope}) "
+        "ORDER BY score DESC, id DESC LIMIT %s OFFSET %s",
+    ),
+}
+"""SQL of the index by database vendor"""
+
+
+@dataclass
+class Match:
+    kind: SearchKind
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+
+def to_text(value: str | None) -> str:
+    """Plain text of a rich text (HTML) value"""
+    return html.unescape(strip_tags(value or "")).strip()
+
+
+def is_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return connections[using].vendor in statements
+
+
+def to_match_query(vendor: str, text: str) -> str | None:
+    """Search terms of `text` as a query of the backend, `None` if there
+    are none. Every term must match, the last one as a prefix on SQLite"""
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    if vendor == "sqlite":
+        # Quoted so that FTS5 operators in the text are matched as words
+        return " ".join(f'"{term}"' for term in terms) + "*"
+    return " ".join(terms)
+
+
+def create_index_table(using: str = DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if not is_enabled(using):
+        return
+    with connection.cursor() as cursor:
+        for sql in statements[connection.vendor]["create"]:
+            cursor.execute(sql)
+
+
+def index_object(instance: Model, using: str = DEFAULT_DB_ALIAS):
+    source = sources[kinds_by_label[instance._meta.label]]
+    title, body = source.get_document(
+        getattr(instance, source.title_field),
+        *(getattr(instance, field) for field in source.body_fields),
+    )
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            statements[connections[using].vendor]["upsert"],
+            [source.get_key(instance.pk), title, body],
+        )
+
+
+def remove_object(instance: Model, using: str = DEFAULT_DB_ALIAS):
+    source = sources[kinds_by_label[instance._meta.label]]
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            statements[connections[using].vendor]["delete"],
+            [source.get_key(instance.pk)],
+        )
+
+
+def rebuild(using: str = DEFAULT_DB_ALIAS, batch_size: int = 2_000) -> dict:
+    """Indexes every object afresh and returns the count per kind"""
+    connection = connections[using]
+    vendor_statements = statements[connection.vendor]
+    create_index_table(using)
+    counts = {}
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table_name}")
+        for kind, source in sources.items():
+            counts[kind] = 0
+            batch = []
+            for object_id, title, *bodies in (
+                source.model._base_manager.using(using)
+                .values_list("id", source.title_field, *source.body_fields)
+                .iterator(chunk_size=batch_size)
+            ):
+                batch.append(
+                    (source.get_key(object_id), *source.get_document(title, *bodies))
+                )
+                if len(batch) == batch_size:
+                    cursor.executemany(vendor_statements["upsert"], batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(vendor_statements["upsert"], batch)
+                counts[kind] += len(batch)
+    return counts
+
+
+def search(
+    text: str,
+    scopes: dict[SearchKind, QuerySet | None],
+    limit: int,
+    offset: int = 0,
+    using: str | None = None,
+) -> list[Match]:
+    """Best ranked matches of `text` among objects of the `scopes` kinds.
+    A kind's queryset, when not `None`, restricts the matches to its objects"""
+    if not scopes:
+        return []
+    if using is None:
+        using = router.db_for_read(sources[next(iter(scopes))].model)
+    connection = connections[using]
+    match_query = to_match_query(connection.vendor, text)
+    if match_query is None:
+        return []
+    vendor_statements = statements[connection.vendor]
+    key = vendor_statements["key"]
+    clauses, scope_params = [], []
+    for kind, queryset in scopes.items():
+        clause = f"{key} & {(1 << kind_bits) - 1} = %s"
+        scope_params.append(sources[kind].code)
+        if queryset is not None:
+            sql, params = queryset.values("id").query.get_compiler(using=using).as_sql()
+            clause += f" AND {key} >> {kind_bits} IN ({sql})"
+            scope_params.extend(params)
+        clauses.append(f"({clause})")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            vendor_statements["search"].format(scope=" OR ".join(clauses)),
+            [match_query, *scope_params, limit, offset],
+        )
+        return [
+            Match(
+                kind=kinds_by_code[key & (1 << kind_bits) - 1],
+                id=key >> kind_bits,
+                title=title,
+                snippet=snippet,
+                score=score,
+            )
+            for key, title, snippet, score in cursor.fetchall()
+        ]
+
+
+def matching_ids(
+    model: type[Model], text: str, using: str, limit: int = admin_match_limit
+) -> list[int]:
+    """Ids of the `model` objects best matching `text`"""
+    kind = kinds_by_label[model._meta.label]
+    return [match.id for match in search(text, {kind: None}, limit, using=using)]
+
+
+def get_tenant_scopes(tenant) -> dict[SearchKind, QuerySet | None]:
+    """Objects a tenant can search by kind"""
+    from external.models import FAQ
+    from management.models import (
+        CommunityMessage,
+        Concern,
+        GroupMessage,
+        PersonalMessage,
+    )
+
+    return {
+        SearchKind.PERSONAL_MESSAGE: PersonalMessage.objects.filter(tenant=tenant),
+        SearchKind.GROUP_MESSAGE: GroupMessage.objects.filter(
+            groups=tenant.unit.unit_group_id
+        ),
+        SearchKind.COMMUNITY_MESSAGE: CommunityMessage.objects.filter(
+            communities__house=tenant.unit.unit_group.house_id
+        ),
+        SearchKind.CONCERN: Concern.objects.filter(tenant=tenant),
+        SearchKind.FAQ: FAQ.objects.filter(is_shown=True),
+    }
+
+
+def update_index(sender, instance, using, **kwargs):
+    if is_enabled(using):
+        index_object(instance, using)
+
+
+def remove_from_index(sender, instance, using, **kwargs):
+    if is_enabled(using):
+        remove_object(instance, using)
+
+
+def create_index_table_after_migrate(sender, using, **kwargs):
+    create_index_table(using)
+
+
+class SearchIndexAdminMixin:
+    """Admin search matching the full-text index besides `search_fields`,
+    which leave out the indexed (long) columns"""
+
+    search_index_fields = ()
+    """Indexed fields, searched with `icontains` when there is no index"""
+
+    def get_search_fields(self, request):
+        search_fields = super().get_search_fields(request)
+        if is_enabled(router.db_for_read(self.model)):
+            return search_fields
+        return (*search_fields, *self.search_index_fields)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term.strip() and is_enabled(queryset.db):
+            results |= queryset.filter(
+                id__in=matching_ids(self.model, search_term, using=queryset.db)
+            )
+        return results, may_have_duplicates
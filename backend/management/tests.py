@@ -1,3 +1,157 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+
+from management.models import CommunityMessage, Concern, PersonalMessage
+from rental_ms.utils.admin import EstimatedCountPaginator
+from rental_ms.utils.testing import (
+    AdminPageTestCase,
+    AdminTestCase,
+    QueryPlanTestCase,
+    create_tenant,
+)
+
+
+class PersonalMessageQueryPlanTests(QueryPlanTestCase):
+    """Queries of the tenant's messages, as `get_personal_messages` makes them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = create_tenant()
+
+    def get_messages(self, **search_filter):
+        return (
+            PersonalMessage.objects.filter(tenant=self.tenant, **search_filter)
+            .order_by("-created_at")
+            .values("id", "category", "subject", "content", "created_at", "is_read")[
+                :30
+            ]
+        )
+
+    def test_messages_use_tenant_index(self):
+        self.assertUsesIndex(self.get_messages(), "personal_msg_tenant_idx")
+
+    def test_unread_messages_use_unread_index(self):
+        self.assertUsesIndex(
+            self.get_messages(is_read=False), "personal_msg_unread_idx"
+        )
+
+    def test_read_messages_use_read_index(self):
+        # SQLite uses no index on the bare `WHERE is_read` but the tenant's
+        index_name = "personal_msg_read_idx"
+        if connection.vendor == "sqlite":
+            index_name = "personal_msg_tenant_idx"
+        self.assertUsesIndex(self.get_messages(is_read=True), index_name)
+
+    def test_messages_of_a_category_use_category_index(self):
+        self.assertUsesIndex(
+            self.get_messages(category=CommunityMessage.MessageCategory.GENERAL.value),
+            "personal_msg_category_idx",
+        )
+
+    def test_admin_pages_use_created_index(self):
+        message = PersonalMessage.objects.create(
+            tenant=self.tenant, subject="Subject", content="Content"
+        )
+        self.assertUsesIndex(
+            PersonalMessage.objects.order_by("-created_at", "-id")[:100],
+            "personal_msg_created_idx",
+        )
+        self.assertUsesIndex(
+            PersonalMessage.objects.filter(
+                Q(created_at__lt=message.created_at)
+                | Q(created_at=message.created_at, id__lt=message.id)
+            ).order_by("-created_at", "-id")[:100],
+            "personal_msg_created_idx",
+        )
+
+
+class ConcernQueryPlanTests(QueryPlanTestCase):
+    """Queries of the tenant's concerns, as `get_concerns` makes them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = create_tenant()
+
+    def get_concerns(self, **search_filter):
+        return (
+            Concern.objects.filter(tenant=self.tenant, **search_filter)
+            .order_by("-created_at")
+            .values("id", "about", "status", "created_at")[:30]
+        )
+
+    def test_concerns_use_tenant_index(self):
+        self.assertUsesIndex(self.get_concerns(), "concern_tenant_created_idx")
+
+    def test_concerns_of_a_status_use_status_index(self):
+        self.assertUsesIndex(
+            self.get_concerns(status=Concern.ConcernStatus.OPEN.value),
+            "concern_tenant_status_idx",
+        )
+
+
+@patch.object(EstimatedCountPaginator, "exact_count_limit", 200)
+class PersonalMessageChangeListTests(AdminTestCase):
+    """Pages of the tenants' messages, counted up to 200 messages and past them
+    paged by keyset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        tenant = create_tenant()
+        PersonalMessage.objects.bulk_create(
+            PersonalMessage(tenant=tenant, subject=f"Message {index}", content="")
+            for index in range(450)
+        )
+        cls.ids = list(
+            PersonalMessage.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def test_numbered_pages_stop_at_the_count_limit(self):
+        url = reverse("admin:management_personalmessage_changelist")
+        changelist = self.get_changelist(url, 8)
+        self.assertEqual(
+            [message.id for message in changelist.result_list], self.ids[:100]
+        )
+        self.assertTrue(changelist.paginator.is_estimated)
+        self.assertEqual(changelist.paginator.num_pages, 2)
+        self.assertIsNone(changelist.keyset_next_url)
+
+    def test_keyset_pages_follow_the_last_numbered_one(self):
+        url = reverse("admin:management_personalmessage_changelist")
+        changelist = self.get_changelist(url + "?p=2", 8)
+        for page in range(2, 4):
+            changelist = self.get_changelist(url + changelist.keyset_next_url, 7)
+            self.assertEqual(
+                [message.id for message in changelist.result_list],
+                self.ids[page * 100 : (page + 1) * 100],
+            )
+        changelist = self.get_changelist(url + changelist.keyset_next_url, 7)
+        self.assertEqual(
+            [message.id for message in changelist.result_list], self.ids[400:]
+        )
+        self.assertIsNone(changelist.keyset_next_url)
+
+
+class AdminPageTests(AdminPageTestCase):
+    def test_log_entry_list_is_small(self):
+        self.assertPageSmall(reverse("admin:admin_logentry_changelist"))
+
+    def test_office_pages_are_small(self):
+        office = self.tenant.unit.unit_group.house.office
+        self.assertPageSmall(reverse("admin:management_office_changelist"))
+        self.assertPageSmall(
+            reverse("admin:management_office_change", args=[office.pk])
+        )
+
+    def test_group_message_pages_are_small(self):
+        self.assertPageSmall(reverse("admin:management_groupmessage_changelist"))
+        self.assertPageSmall(reverse("admin:management_groupmessage_add"))
+
+    def test_tenant_message_and_concern_forms_are_small(self):
+        self.assertPageSmall(reverse("admin:management_personalmessage_add"))
+        self.assertPageSmall(reverse("admin:management_concern_add"))
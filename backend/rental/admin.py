@@ -1,8 +1,11 @@
 from django.contrib import admin
+from rental import lookup
 from rental.models import House, UnitGroup, Unit, Tenant
 from django.utils.translation import gettext_lazy as _
 from rental_ms.utils.admin import (
+    AutocompleteListFilter,
     DevelopmentImportExportModelAdmin,
+    StreamingExportAdminMixin,
 )
 from rental_ms import settings
 
@@ -144,6 +147,7 @@ class UnitGroupAdmin(DevelopmentImportExportModelAdmin):
     )
     search_fields = ("name", "house__name", "caretakers__username")
     list_filter = ("created_at", "updated_at", "house")
+    autocomplete_fields = ("caretakers",)
     fieldsets = (
         (
             None,
@@ -213,7 +217,7 @@ class UnitAdmin(DevelopmentImportExportModelAdmin):
     )
     list_filter = (
         "occupied_status",
-        "unit_group",
+        ("unit_group", AutocompleteListFilter),
         "unit_group__house",
         "updated_at",
         "created_at",
@@ -250,10 +254,11 @@ class UnitAdmin(DevelopmentImportExportModelAdmin):
     )
     readonly_fields = ("tenant", "last_rent_payment_date", "created_at", "updated_at")
     ordering = ("-created_at",)
+    autocomplete_fields = ("unit_group",)
 
 
 @admin.register(Tenant)
-class TenantAdmin(DevelopmentImportExportModelAdmin):
+class TenantAdmin(StreamingExportAdminMixin, DevelopmentImportExportModelAdmin):
 
     def debt_amount(self, obj: Tenant) -> int:
         return obj.user.account.debt_amount
@@ -270,9 +275,16 @@ class TenantAdmin(DevelopmentImportExportModelAdmin):
         "created_at",
         "updated_at",
     )
-    search_fields = ("user__username", "user__email")
+    # Searched when there is no lookup index or the term is too short for it
+    search_fields = (
+        "user__username",
+        "user__email",
+        "user__phone_number",
+        "user__identity_number",
+        "unit__abbreviated_name",
+    )
     list_filter = (
-        "unit__unit_group",
+        ("unit__unit_group", AutocompleteListFilter),
         "unit__unit_group__house",
         "lease_start_date",
         "lease_end_date",
@@ -309,3 +321,29 @@ class TenantAdmin(DevelopmentImportExportModelAdmin):
         "updated_at",
     )
     ordering = ("-created_at",)
+    autocomplete_fields = ("user", "unit", "extra_fees")
+    # Rent roll
+    export_fields = (
+        ("unit__unit_group__house__name", _("House")),
+        ("unit__unit_group__name", _("Unit group")),
+        ("unit__abbreviated_name", _("Unit")),
+        ("user__username", _("Username")),
+        ("user__first_name", _("First name")),
+        ("user__last_name", _("Last name")),
+        ("user__phone_number", _("Phone number")),
+        ("unit__unit_group__monthly_rent", _("Monthly rent")),
+        ("user__account__balance", _("Balance")),
+        ("unit__last_rent_payment_date", _("Last rent payment date")),
+        ("lease_start_date", _("Lease start date")),
+        ("lease_end_date", _("Lease end date")),
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Also serves the autocomplete widgets of fields referencing tenants
+        if lookup.is_enabled(queryset.db):
+            tenant_ids = lookup.lookup(
+                search_term, lookup.admin_match_limit, using=queryset.db
+            )
+            if tenant_ids is not None:
+                return queryset.filter(id__in=tenant_ids), False
+        return super().get_search_results(request, queryset, search_term)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class RentalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "rental"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_migrate, post_save
+
+        from rental import lookup
+
+        # Tenant lookup index
+        post_migrate.connect(lookup.create_index_table_after_migrate, sender=self)
+        post_save.connect(lookup.update_tenant, sender="rental.Tenant")
+        post_save.connect(lookup.update_unit_tenant, sender="rental.Unit")
+        post_save.connect(lookup.update_user_tenant, sender="users.CustomUser")
+        post_delete.connect(lookup.remove_deleted_tenant, sender="rental.Tenant")
@@ -0,0 +1,253 @@
+"""Substring lookup of tenants for staff
+
+Each tenant has a lookup document in `rental_tenantlookup` combining the names,
+username, email, phone number (digits, as entered and in international form),
+ID number and unit abbreviated name. Documents are matched by substring with a
+trigram index, newest tenants first. Unlike ranking, that order lets a broad
+term (e.g a surname) stop at the limit rather than score every match:
+
+- SQLite - an FTS5 virtual table with the trigram tokenizer.
+- PostgreSQL - a table under a `pg_trgm` GIN index, matched with `LIKE`.
+
+Documents are kept in sync as tenants, their users and units are saved.
+Terms shorter than 3 characters can't use trigrams and are ignored. Other
+databases have no index - the admin keeps searching with `search_fields`.
+"""
+
+import re
+from collections.abc import Iterable
+
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+from rental_ms.utils import normalize_phone_number
+
+table_name = "rental_tenantlookup"
+
+min_term_length = 3
+"""Characters of a trigram, shorter terms are ignored"""
+
+admin_match_limit = 500
+"""Most matches of the admin search and autocomplete"""
+
+statements = {
+    "sqlite": dict(
+        create=[
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table_name} USING fts5("
+            "document, tokenize = 'trigram')"
+        ],
+        select=f"SELECT document FROM {table_name} WHERE rowid = %s",
+        upsert=f"INSERT OR REPLACE INTO {table_name} (rowid, document) "
+        "VALUES (%s, %s)",
+        delete=f"DELETE FROM {table_name} WHERE rowid = %s",
+        lookup=f"SELECT rowid FROM {table_name} WHERE {table_name} MATCH %s "
+        "ORDER BY rowid DESC LIMIT %s",
+    ),
+    "postgresql": dict(
+        create=[
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f"CREATE TABLE IF NOT EXISTS {table_name} ("
+            "id bigint PRIMARY KEY, document text NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {table_name}_document_idx "
+            f"ON {table_name} USING gin (document gin_trgm_ops)",
+        ],
+        select=f"SELECT document FROM {table_name} WHERE id = %s",
+        upsert=f"INSERT INTO {table_name} (id, document) VALUES (%s, %s) "
+        "ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+        delete=f"DELETE FROM {table_name} WHERE id = %s",
+        lookup=f"SELECT id FROM {table_name} WHERE {{conditions}} "
+        "ORDER BY id DESC LIMIT %s",
+    ),
+}
+"""SQL of the index by database vendor"""
+
+document_fields = (
+    "id",
+    "user__first_name",
+    "user__last_name",
+    "user__username",
+    "user__email",
+    "user__phone_number",
+    "user__identity_number",
+    "unit__abbreviated_name",
+)
+"""Tenant values making up the document, `id` first"""
+
+# Fields whose saves change the documents, by model
+tenant_fields = frozenset(("user", "user_id", "unit", "unit_id"))
+user_fields = frozenset(
+    ("first_name", "last_name", "username", "email", "phone_number", "identity_number")
+)
+unit_fields = frozenset(("abbreviated_name",))
+
+
+def is_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return connections[using].vendor in statements
+
+
+def to_digits(value) -> str:
+    return re.sub(r"\D", "", str(value))
+
+
+def get_document(
+    first_name, last_name, username, email, phone_number, identity_number, unit
+) -> str:
+    values = (
+        first_name,
+        last_name,
+        username,
+        email,
+        to_digits(phone_number or ""),
+        # International form, e.g `254712...` for `0712...`
+        to_digits(normalize_phone_number(phone_number) or ""),
+        identity_number,
+        unit,
+    )
+    return " ".join(str(value) for value in values if value).lower()
+
+
+def get_terms(text: str) -> list[str]:
+    """Lowercase terms of `text` long enough for trigrams. Phone numbers are
+    reduced to their digits e.g `+254-712` to `254712`"""
+    terms = []
+    for term in text.lower().split():
+        if re.fullmatch(r"[\d+()\-.]+", term):
+            term = to_digits(term)
+        if len(term) >= min_term_length:
+            terms.append(term)
+    return terms
+
+
+def create_index_table(using: str = DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if not is_enabled(using):
+        return
+    with connection.cursor() as cursor:
+        for sql in statements[connection.vendor]["create"]:
+            cursor.execute(sql)
+
+
+def index_tenants(tenant_ids: Iterable[int], using: str = DEFAULT_DB_ALIAS):
+    """Writes the documents of tenants that changed"""
+    from rental.models import Tenant
+
+    vendor_statements = statements[connections[using].vendor]
+    with connections[using].cursor() as cursor:
+        for tenant_id, *values in (
+            Tenant.objects.using(using)
+            .filter(id__in=tenant_ids)
+            .values_list(*document_fields)
+        ):
+            document = get_document(*values)
+            cursor.execute(vendor_statements["select"], [tenant_id])
+            row = cursor.fetchone()
+            if row is None or row[0] != document:
+                cursor.execute(vendor_statements["upsert"], [tenant_id, document])
+
+
+def remove_tenant(tenant_id: int, using: str = DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(statements[connections[using].vendor]["delete"], [tenant_id])
+
+
+def rebuild(using: str = DEFAULT_DB_ALIAS, batch_size: int = 2_000) -> int:
+    """Writes the document of every tenant afresh and returns their count"""
+    from rental.models import Tenant
+
+    connection = connections[using]
+    upsert = statements[connection.vendor]["upsert"]
+    create_index_table(using)
+    count = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table_name}")
+        batch = []
+        for tenant_id, *values in (
+            Tenant.objects.using(using)
+            .values_list(*document_fields)
+            .iterator(chunk_size=batch_size)
+        ):
+            batch.append((tenant_id, get_document(*values)))
+            if len(batch) == batch_size:
+                cursor.executemany(upsert, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(upsert, batch)
+            count += len(batch)
+    return count
+
+
+def lookup(text: str, limit: int, using: str | None = None) -> list[int] | None:
+    """Ids of the tenants matching every term of `text`, newest first. `None`
+    if `text` has no term long enough"""
+    from rental.models import Tenant
+
+    terms = get_terms(text)
+    if not terms:
+        return None
+    if using is None:
+        using = router.db_for_read(Tenant)
+    connection = connections[using]
+    vendor_statements = statements[connection.vendor]
+    if connection.vendor == "sqlite":
+        # Quoted so that FTS5 operators in the text are matched as is
+        match_query = " ".join('"%s"' % term.replace('"', '""') for term in terms)
+        sql, params = vendor_statements["lookup"], [match_query, limit]
+    else:
+        sql = vendor_statements["lookup"].format(
+            conditions=" AND ".join(["document LIKE %s"] * len(terms))
+        )
+        # Escaped so that `%` and `_` in the terms are matched as is
+        patterns = ["%%%s%%" % re.sub(r"([\\%_])", r"\\\1", term) for term in terms]
+        params = [*patterns, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [tenant_id for (tenant_id,) in cursor.fetchall()]
+
+
+def is_document_changed(update_fields, fields: frozenset) -> bool:
+    """Whether a save may have changed some of `fields`. Saves limited to
+    others by `update_fields`, e.g of `last_login` on login, haven't"""
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+def update_tenant(sender, instance, using, update_fields, **kwargs):
+    if is_enabled(using) and is_document_changed(update_fields, tenant_fields):
+        index_tenants([instance.pk], using)
+
+
+def update_user_tenant(sender, instance, using, update_fields, **kwargs):
+    from rental.models import Tenant
+
+    if is_enabled(using) and is_document_changed(update_fields, user_fields):
+        index_tenants(
+            Tenant.objects.using(using)
+            .filter(user_id=instance.pk)
+            .values_list("id", flat=True),
+            using,
+        )
+
+
+def update_unit_tenant(sender, instance, using, created, update_fields, **kwargs):
+    from rental.models import Tenant
+
+    # New units are vacant, tenants are indexed as they move in
+    if (
+        is_enabled(using)
+        and not created
+        and is_document_changed(update_fields, unit_fields)
+    ):
+        index_tenants(
+            Tenant.objects.using(using)
+            .filter(unit_id=instance.pk)
+            .values_list("id", flat=True),
+            using,
+        )
+
+
+def remove_deleted_tenant(sender, instance, using, **kwargs):
+    if is_enabled(using):
+        remove_tenant(instance.pk, using)
+
+
+def create_index_table_after_migrate(sender, using, **kwargs):
+    create_index_table(using)
@@ -0,0 +1,731 @@
+"""Generates a portfolio of houses, units, tenants, ledgers and messages
+for performance testing.
+
+Rows are written with multi-row inserts rather than through the models, skipping
+the slow per-object paths such as `CustomUser.save` (password hashing) and
+`UnitGroup.save` (unit provisioning), so the full-text search index and the
+tenant lookup are rebuilt at the end. The data is deterministic for a given
+`--seed` and `--until` date.
+
+Usage:
+    $ python manage.py generate_dataset --profile large
+"""
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from finance.models import Transaction, UserAccount
+from management import search
+from rental import lookup
+from management.models import (
+    Community,
+    CommunityMessage,
+    Concern,
+    GroupMessage,
+    Office,
+    PersonalMessage,
+)
+from rental.models import House, Tenant, Unit, UnitGroup
+from rental_ms.utils import normalize_phone_number
+from users.models import CustomUser
+
+profiles = {
+    "small": dict(
+        houses=10, units=1_000, tenants=800, transactions=100_000, messages=50_000
+    ),
+    "medium": dict(
+        houses=100,
+        units=10_000,
+        tenants=8_000,
+        transactions=1_000_000,
+        messages=500_000,
+    ),
+    "large": dict(
+        houses=1_000,
+        units=100_000,
+        tenants=80_000,
+        transactions=10_000_000,
+        messages=5_000_000,
+    ),
+}
+"""Scales selectable with `--profile`"""
+
+units_per_group = 10
+houses_per_office = 50
+houses_per_community = 10
+monthly_rents = [Decimal(amount) for amount in range(5_000, 40_001, 2_500)]
+message_categories = [category.value for category in CommunityMessage.MessageCategory]
+concern_statuses = [status.value for status in Concern.ConcernStatus]
+password = "rental-ms"
+"""Password of every generated user"""
+
+
+class Command(BaseCommand):
+    help = "Generates a deterministic dataset at a chosen scale for performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            choices=profiles.keys(),
+            default="small",
+            help="Dataset scale",
+        )
+        for name in profiles["small"]:
+            parser.add_argument(
+                f"--{name}", type=int, help=f"Number of {name} - overrides the profile"
+            )
+        parser.add_argument(
+            "--seed", type=int, default=42, help="Seed of the random generator"
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            default=timezone.now().date().replace(day=1),
+            help="Date of the latest records (YYYY-MM-DD) - first of the month by default",
+        )
+
+    def handle(self, *args, **options):
+        scale = {
+            name: options[name] if options[name] is not None else count
+            for name, count in profiles[options["profile"]].items()
+        }
+        if scale["tenants"] > scale["units"]:
+            scale["tenants"] = scale["units"]
+        self.random = random.Random(options["seed"])
+        self.until = datetime.combine(
+            options["until"], datetime.min.time(), tzinfo=dt_timezone.utc
+        )
+        self.stdout.write(
+            "Generating " + ", ".join(f"{count:,} {name}" for name, count in scale.items())
+        )
+        start_time = time.perf_counter()
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+
+        self.generate_portfolio(**scale)
+        self.generate_transactions(scale["transactions"])
+        self.generate_messages(scale["messages"])
+        self.reset_sequences()
+        if search.is_enabled():
+            call_command("rebuild_search_index")
+        if lookup.is_enabled():
+            call_command("rebuild_tenant_lookup")
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Dataset generated in %.1fs" % (time.perf_counter() - start_time)
+            )
+        )
+
+    # Helpers
+
+    def next_id(self, model) -> int:
+        last_id = model.objects.order_by("-id").values_list("id", flat=True).first()
+        return (last_id or 0) + 1
+
+    def timestamp(self, days_ago: int):
+        return adapt_datetime(self.until - timedelta(days=days_ago))
+
+    def insert(self, model_or_table, columns: list[str], rows) -> int:
+        """Inserts `rows` (iterable of tuples) in batches and returns the count"""
+        table = (
+            model_or_table
+            if isinstance(model_or_table, str)
+            else model_or_table._meta.db_table
+        )
+        quote_name = connection.ops.quote_name
+        placeholders = "(%s)" % ", ".join(["%s"] * len(columns))
+        sql = "INSERT INTO %s (%s) VALUES " % (
+            quote_name(table),
+            ", ".join(map(quote_name, columns)),
+        )
+        if connection.vendor == "sqlite":
+            # The C loop of executemany beats multi-row statements on SQLite
+            batch_size = 50_000
+        else:
+            batch_size = max(1, min(1_000, 65_535 // len(columns)))
+        total = 0
+        start_time = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    self.insert_batch(cursor, sql, placeholders, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.insert_batch(cursor, sql, placeholders, batch)
+                total += len(batch)
+        self.stdout.write(
+            f"  {table}: {total:,} rows in {time.perf_counter() - start_time:.1f}s"
+        )
+        return total
+
+    def insert_batch(self, cursor, sql: str, placeholders: str, batch: list[tuple]):
+        if connection.vendor == "sqlite":
+            cursor.executemany(sql + placeholders, batch)
+        else:
+            cursor.execute(
+                sql + ", ".join([placeholders] * len(batch)),
+                [value for row in batch for value in row],
+            )
+
+    def reset_sequences(self):
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(),
+            [
+                UserAccount,
+                CustomUser,
+                Office,
+                Community,
+                House,
+                UnitGroup,
+                Unit,
+                Tenant,
+                Transaction,
+                Concern,
+                PersonalMessage,
+                GroupMessage,
+                CommunityMessage,
+            ],
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+    def insert_users(
+        self, count: int, is_staff: bool = False
+    ) -> list[tuple[int, int]]:
+        """Inserts users with their finance accounts and returns their
+        `(user id, account id)`"""
+        first_account_id = self.next_id(UserAccount)
+        first_user_id = self.next_id(CustomUser)
+        now = self.timestamp(0)
+        hashed_password = make_password(password)
+        self.insert(
+            UserAccount,
+            ["id", "balance", "updated_at", "created_at"],
+            ((first_account_id + n, adapt_decimal(0), now, now) for n in range(count)),
+        )
+        role = "staff" if is_staff else "tenant"
+        genders = [gender.value for gender in CustomUser.UserGender]
+        phone_numbers = [
+            "07%08d" % ((first_user_id + n) % 100_000_000) for n in range(count)
+        ]
+        rng = self.random
+        self.insert(
+            CustomUser,
+            [
+                "id",
+                "password",
+                "is_superuser",
+                "username",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "is_active",
+                "date_joined",
+                "gender",
+                "identity_number",
+                "occupation",
+                "phone_number",
+                "phone_number_e164",
+                "profile",
+                "account_id",
+            ],
+            (
+                (
+                    first_user_id + n,
+                    hashed_password,
+                    False,
+                    f"{role}{first_user_id + n}",
+                    role.title(),
+                    str(first_user_id + n),
+                    f"{role}{first_user_id + n}@example.com",
+                    is_staff,
+                    True,
+                    self.timestamp(rng.randint(30, 2_000)),
+                    rng.choice(genders),
+                    10_000_000 + first_user_id + n,
+                    role.title(),
+                    phone_numbers[n],
+                    normalize_phone_number(phone_numbers[n]),
+                    "default/user.png",
+                    first_account_id + n,
+                )
+                for n in range(count)
+            ),
+        )
+        return [(first_user_id + n, first_account_id + n) for n in range(count)]
+
+    # Generators
+
+    def generate_portfolio(self, houses: int, units: int, tenants: int, **kwargs):
+        rng = self.random
+        now = self.timestamp(0)
+        house_count = max(1, houses)
+        office_count = -(-house_count // houses_per_office)
+        community_count = -(-house_count // houses_per_community)
+
+        managers = self.insert_users(office_count, is_staff=True)
+        caretakers = self.insert_users(house_count, is_staff=True)
+
+        first_office_id = self.next_id(Office)
+        self.insert(
+            Office,
+            [
+                "id",
+                "name",
+                "manager_id",
+                "description",
+                "address",
+                "updated_at",
+                "created_at",
+            ],
+            (
+                (
+                    first_office_id + n,
+                    f"Office {first_office_id + n}",
+                    managers[n][0],
+                    "<p>Generated office</p>",
+                    f"{first_office_id + n} Generated Avenue",
+                    now,
+                    now,
+                )
+                for n in range(office_count)
+            ),
+        )
+        first_community_id = self.next_id(Community)
+        self.community_ids = list(
+            range(first_community_id, first_community_id + community_count)
+        )
+        self.insert(
+            Community,
+            [
+                "id",
+                "name",
+                "description",
+                "social_media_link",
+                "created_at",
+                "updated_at",
+            ],
+            (
+                (
+                    community_id,
+                    f"Community {community_id}",
+                    "<p>Generated community</p>",
+                    f"https://chat.example.com/{community_id}",
+                    now,
+                    now,
+                )
+                for community_id in self.community_ids
+            ),
+        )
+
+        first_house_id = self.next_id(House)
+        house_ids = list(range(first_house_id, first_house_id + house_count))
+        self.insert(
+            House,
+            [
+                "id",
+                "name",
+                "office_id",
+                "address",
+                "description",
+                "picture",
+                "updated_at",
+                "created_at",
+            ],
+            (
+                (
+                    house_id,
+                    f"House {house_id}",
+                    first_office_id + n // houses_per_office,
+                    f"{house_id} Generated Street",
+                    "<p>Generated house</p>",
+                    "default/apartment-2138949_1920.jpg",
+                    now,
+                    now,
+                )
+                for n, house_id in enumerate(house_ids)
+            ),
+        )
+        self.insert(
+            House.communities.through,
+            ["house_id", "community_id"],
+            (
+                (house_id, self.community_ids[n // houses_per_community])
+                for n, house_id in enumerate(house_ids)
+            ),
+        )
+
+        # Unit groups of `units_per_group` units spread evenly across the houses
+        group_sizes = []
+        for n in range(house_count):
+            house_units = units // house_count + (1 if n < units % house_count else 0)
+            sizes = [units_per_group] * (house_units // units_per_group)
+            if house_units % units_per_group:
+                sizes.append(house_units % units_per_group)
+            group_sizes.append(sizes)
+
+        first_group_id = self.next_id(UnitGroup)
+        groups = []
+        """(group id, house index, number of units, monthly rent)"""
+        for house_index, sizes in enumerate(group_sizes):
+            for size in sizes:
+                groups.append(
+                    (
+                        first_group_id + len(groups),
+                        house_index,
+                        size,
+                        rng.choice(monthly_rents),
+                    )
+                )
+        last_month = adapt_date(
+            (self.until - timedelta(days=15)).date().replace(day=1)
+        )
+        self.insert(
+            UnitGroup,
+            [
+                "id",
+                "house_id",
+                "name",
+                "abbreviated_name",
+                "description",
+                "number_of_units",
+                "picture",
+                "monthly_rent",
+                "deposit_amount",
+                "unit_name_format",
+                "unit_abbreviated_name_format",
+                "last_rent_payment_date",
+                "created_at",
+                "updated_at",
+            ],
+            (
+                (
+                    group_id,
+                    house_ids[house_index],
+                    f"Floor {group_id}",
+                    f"F{group_id}",
+                    "<p>Generated unit group</p>",
+                    size,
+                    "default/house-7124141_1920.jpg",
+                    adapt_decimal(rent),
+                    adapt_decimal(rent),
+                    "%(name)s Room %(unit_number)s",
+                    "%(abbreviated_name)sR%(unit_number)s",
+                    last_month,
+                    now,
+                    now,
+                )
+                for group_id, house_index, size, rent in groups
+            ),
+        )
+        self.insert(
+            UnitGroup.caretakers.through,
+            ["unitgroup_id", "customuser_id"],
+            (
+                (group_id, caretakers[house_index][0])
+                for group_id, house_index, _, _ in groups
+            ),
+        )
+
+        first_unit_id = self.next_id(Unit)
+        unit_groups = []
+        """Group index of every unit"""
+        for group_index, (_, _, size, _) in enumerate(groups):
+            unit_groups.extend([group_index] * size)
+        occupied = set(rng.sample(range(len(unit_groups)), tenants))
+        self.insert(
+            Unit,
+            [
+                "id",
+                "unit_group_id",
+                "name",
+                "abbreviated_name",
+                "occupied_status",
+                "last_rent_payment_date",
+                "updated_at",
+                "created_at",
+            ],
+            (
+                (
+                    first_unit_id + n,
+                    groups[group_index][0],
+                    f"Floor {groups[group_index][0]} Room {first_unit_id + n}",
+                    f"F{groups[group_index][0]}R{first_unit_id + n}",
+                    (
+                        Unit.OccupiedStatus.OCCUPIED.value
+                        if n in occupied
+                        else Unit.OccupiedStatus.VACANT.value
+                    ),
+                    last_month,
+                    now,
+                    now,
+                )
+                for n, group_index in enumerate(unit_groups)
+            ),
+        )
+
+        tenant_users = self.insert_users(tenants)
+        first_tenant_id = self.next_id(Tenant)
+        occupied_units = sorted(occupied)
+        self.tenants = []
+        """(tenant id, user id, account id, group index)"""
+        self.group_tenants: dict[int, list[int]] = {}
+        for n, unit_index in enumerate(occupied_units):
+            tenant_id = first_tenant_id + n
+            group_index = unit_groups[unit_index]
+            self.tenants.append((tenant_id, *tenant_users[n], group_index))
+            self.group_tenants.setdefault(group_index, []).append(tenant_id)
+        self.groups = groups
+        self.insert(
+            Tenant,
+            [
+                "id",
+                "user_id",
+                "unit_id",
+                "lease_start_date",
+                "updated_at",
+                "created_at",
+            ],
+            (
+                (
+                    tenant_id,
+                    tenant_users[n][0],
+                    first_unit_id + occupied_units[n],
+                    adapt_date(
+                        (self.until - timedelta(days=rng.randint(30, 2_000))).date()
+                    ),
+                    now,
+                    now,
+                )
+                for n, (tenant_id, _, _, _) in enumerate(self.tenants)
+            ),
+        )
+        first_concern_id = self.next_id(Concern)
+        self.insert(
+            Concern,
+            [
+                "id",
+                "tenant_id",
+                "about",
+                "details",
+                "status",
+                "updated_at",
+                "created_at",
+            ],
+            (
+                (
+                    first_concern_id + n,
+                    tenant_id,
+                    f"Concern {first_concern_id + n}",
+                    "Generated concern",
+                    rng.choice(concern_statuses),
+                    now,
+                    self.timestamp(rng.randint(0, 365)),
+                )
+                for n, (tenant_id, _, _, _) in enumerate(self.tenants[::4])
+            ),
+        )
+
+    def generate_transactions(self, count: int):
+        """Monthly deposits and rent payments going back from `--until`,
+        updating the account balances accordingly"""
+        if not self.tenants:
+            return
+        rng = self.random
+        balances = {}
+        first_transaction_id = self.next_id(Transaction)
+        deposit = Transaction.TransactionType.DEPOSIT.value
+        rent_payment = Transaction.TransactionType.RENT_PAYMENT.value
+        means = [mean.value for mean in Transaction.TransactionMeans]
+
+        def rows():
+            transaction_id = first_transaction_id
+            per_tenant, remainder = divmod(count, len(self.tenants))
+            for n, (_, user_id, account_id, group_index) in enumerate(self.tenants):
+                rent = self.groups[group_index][3]
+                balance = Decimal(0)
+                tenant_count = per_tenant + (1 if n < remainder else 0)
+                for k in range(tenant_count):
+                    # Pairs of deposit then rent payment, a month apart
+                    months_ago = (tenant_count - k + 1) // 2
+                    days_ago = months_ago * 30 + rng.randint(0, 4)
+                    if k % 2 == 0:
+                        transaction_type = deposit
+                        amount = rent + rng.choice((0, 0, 0, 500, -500))
+                        balance += amount
+                    else:
+                        transaction_type = rent_payment
+                        amount = rent
+                        balance -= amount
+                    yield (
+                        transaction_id,
+                        user_id,
+                        transaction_type,
+                        adapt_decimal(amount),
+                        rng.choice(means),
+                        "GEN%010d" % transaction_id,
+                        self.timestamp(days_ago),
+                    )
+                    transaction_id += 1
+                balances[account_id] = balance
+
+        self.insert(
+            Transaction,
+            ["id", "user_id", "type", "amount", "means", "reference", "created_at"],
+            rows(),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                "UPDATE %s SET balance = %%s WHERE id = %%s"
+                % connection.ops.quote_name(UserAccount._meta.db_table),
+                [
+                    (adapt_decimal(balance), account_id)
+                    for account_id, balance in balances.items()
+                ],
+            )
+
+    def generate_messages(self, count: int):
+        """Personal (80%), group (15%) and community (5%) messages"""
+        if not self.tenants:
+            return
+        rng = self.random
+        personal_count = count * 80 // 100
+        group_count = count * 15 // 100
+        community_count = count - personal_count - group_count
+
+        first_message_id = self.next_id(PersonalMessage)
+
+        def personal_rows():
+            for n in range(personal_count):
+                tenant_id = self.tenants[n % len(self.tenants)][0]
+                yield (
+                    first_message_id + n,
+                    tenant_id,
+                    rng.choice(message_categories),
+                    f"Message {first_message_id + n}",
+                    "<p>Generated message</p>",
+                    rng.random() < 0.7,
+                    self.timestamp(rng.randint(0, 1_000)),
+                    self.timestamp(0),
+                )
+
+        self.insert(
+            PersonalMessage,
+            [
+                "id",
+                "tenant_id",
+                "category",
+                "subject",
+                "content",
+                "is_read",
+                "created_at",
+                "updated_at",
+            ],
+            personal_rows(),
+        )
+
+        group_indexes = list(self.group_tenants.keys())
+        all_tenant_ids = [tenant_id for tenant_id, _, _, _ in self.tenants]
+        for model, message_count, target_column, targets in (
+            (
+                GroupMessage,
+                group_count,
+                "unitgroup_id",
+                lambda: rng.choice(group_indexes),
+            ),
+            (
+                CommunityMessage,
+                community_count,
+                "community_id",
+                lambda: rng.choice(self.community_ids),
+            ),
+        ):
+            first_id = self.next_id(model)
+            message_targets = [targets() for _ in range(message_count)]
+            self.insert(
+                model,
+                [
+                    "id",
+                    "category",
+                    "subject",
+                    "content",
+                    "created_at",
+                    "updated_at",
+                ],
+                (
+                    (
+                        first_id + n,
+                        rng.choice(message_categories),
+                        f"Message {first_id + n}",
+                        "<p>Generated message</p>",
+                        self.timestamp(rng.randint(0, 1_000)),
+                        self.timestamp(0),
+                    )
+                    for n in range(message_count)
+                ),
+            )
+            if model is GroupMessage:
+                self.insert(
+                    GroupMessage.groups.through,
+                    ["groupmessage_id", target_column],
+                    (
+                        (first_id + n, self.groups[group_index][0])
+                        for n, group_index in enumerate(message_targets)
+                    ),
+                )
+                readers = lambda n: self.group_tenants[message_targets[n]]
+            else:
+                self.insert(
+                    CommunityMessage.communities.through,
+                    ["communitymessage_id", target_column],
+                    (
+                        (first_id + n, community_id)
+                        for n, community_id in enumerate(message_targets)
+                    ),
+                )
+                readers = lambda n: all_tenant_ids
+            message_column = f"{model._meta.model_name}_id"
+            self.insert(
+                model.read_by.through,
+                [message_column, "tenant_id"],
+                (
+                    (first_id + n, tenant_id)
+                    for n in range(message_count)
+                    for tenant_id in set(
+                        rng.choices(readers(n), k=rng.randint(0, 2))
+                    )
+                ),
+            )
+
+
+@lru_cache(maxsize=None)
+def adapt_datetime(value: datetime):
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+@lru_cache(maxsize=None)
+def adapt_date(value: date):
+    return connection.ops.adapt_datefield_value(value)
+
+
+@lru_cache(maxsize=None)
+def adapt_decimal(value) -> str:
+    return connection.ops.adapt_decimalfield_value(Decimal(value), 10, 2)
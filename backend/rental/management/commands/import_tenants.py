@@ -0,0 +1,72 @@
+"""Onboards tenants in bulk from a CSV file, see `rental.onboarding` for its
+columns
+
+Nothing is imported if any row is invalid - every error is listed with its
+line. Rows are imported in batches, a transaction each, so a batch failing
+past validation (e.g a unit let meanwhile) leaves the earlier ones imported.
+
+Usage:
+    $ python manage.py import_tenants tenants.csv
+    $ python manage.py import_tenants tenants.csv --dry-run
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rental import onboarding
+
+
+class Command(BaseCommand):
+    help = "Creates users, their accounts and tenants of vacant units from a CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to the CSV file")
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows inserted at once"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes hashing passwords, defaults to the number of CPUs",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate the file only"
+        )
+
+    def report_progress(self, stage: str, done: int, total: int):
+        action = "Hashed passwords" if stage == "hash" else "Imported tenants"
+        self.stdout.write(f"{action}: {done:,}/{total:,}")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options["file"], newline="", encoding="utf-8-sig") as file:
+                rows = onboarding.read_rows(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        records, errors = onboarding.validate(rows)
+        if errors:
+            for error in errors:
+                self.stderr.write(str(error))
+            raise CommandError(
+                f"{len({error.line for error in errors}):,} of {len(rows):,} rows "
+                "are invalid, nothing imported"
+            )
+        self.stdout.write(f"Validated {len(records):,} rows")
+        if options["dry_run"]:
+            return
+
+        onboarding.hash_passwords(records, options["workers"], self.report_progress)
+        try:
+            onboarding.insert(records, options["batch_size"], self.report_progress)
+        except onboarding.BatchError as e:
+            raise CommandError(e)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(records):,} tenants in "
+                f"{time.monotonic() - started:.1f}s"
+            )
+        )
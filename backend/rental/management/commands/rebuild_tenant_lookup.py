@@ -0,0 +1,41 @@
+"""Writes the lookup document of every tenant afresh
+
+Needed once after upgrading, and after rows are written around the models
+e.g by `generate_dataset`.
+
+Usage:
+    $ python manage.py rebuild_tenant_lookup
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from rental import lookup
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the index of the staff lookup of tenants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database whose index is rebuilt",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=2_000, help="Rows written at once"
+        )
+
+    def handle(self, *args, **options):
+        if not lookup.is_enabled(options["database"]):
+            raise CommandError("Tenant lookup needs a SQLite or PostgreSQL database")
+        start_time = time.perf_counter()
+        count = lookup.rebuild(options["database"], options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Lookup documents of %s tenants written in %.1fs"
+                % (f"{count:,}", time.perf_counter() - start_time)
+            )
+        )
@@ -5,7 +5,7 @@ from finance.models import Transaction
 from rental_ms.utils import (
     EnumWithChoices,
     generate_document_filepath,
-    generate_random_token,
+    generate_transaction_reference,
 )
 from management.models import Community
 from django.utils.translation import gettext_lazy as _
@@ -278,7 +278,7 @@ class UnitGroup(models.Model):
                 type=Transaction.TransactionType.RENT_PAYMENT.value,
                 means=Transaction.TransactionMeans.CASH.value,
                 amount=self.monthly_rent,
-                reference=generate_random_token(),
+                reference=generate_transaction_reference(),
                 notes="Monthly payment",
             ).save()
             unit.last_rent_payment_date = timezone.now().date()
@@ -409,6 +409,7 @@ class Tenant(models.Model):
     class Meta:
         verbose_name = _("Tenant")
         verbose_name_plural = _("Tenants")
+        permissions = [("export_tenant", _("Can export tenants"))]
 
     def __str__(self):
         return f"{self.user} - {self.unit.abbreviated_name if self.unit else '[No Unit Assigned]'}"
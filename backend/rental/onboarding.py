@@ -0,0 +1,294 @@
+"""Bulk onboarding of tenants from a CSV file
+
+Each row creates a user, their finance account holding the opening balance and
+a tenant occupying a vacant unit. The columns are:
+
+    username, first_name, last_name, email, identity_number, phone_number,
+    occupation, house, unit, gender, password, lease_start_date,
+    lease_end_date, opening_balance
+
+`house` is the house name and `unit` the abbreviated name of one of its units.
+The last five columns may be left out or blank - users without a password
+set theirs with a password reset. Dates are `YYYY-MM-DD`.
+
+Every row is validated, against the file and the database, before anything is
+written. Passwords are then hashed on a process pool and the rows inserted in
+batches of multi-row inserts, a transaction each, rather than through
+`CustomUser.save` and `Tenant.save` one object at a time.
+"""
+
+import csv
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import IO
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from finance.models import UserAccount
+from rental import lookup
+from rental.models import Tenant, Unit
+from rental_ms.utils import normalize_phone_number
+from users.models import CustomUser
+
+required_columns = (
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "identity_number",
+    "phone_number",
+    "occupation",
+    "house",
+    "unit",
+)
+
+optional_columns = (
+    "gender",
+    "password",
+    "lease_start_date",
+    "lease_end_date",
+    "opening_balance",
+)
+
+user_fields = (
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "identity_number",
+    "phone_number",
+    "occupation",
+)
+"""Columns taken as they are by `CustomUser`"""
+
+unvalidated_user_fields = ("password", "account", "profile", "token")
+"""Set by the import rather than the file"""
+
+unique_user_fields = ("username", "identity_number")
+
+lookup_chunk_size = 1_000
+"""Values per `IN (...)` of the checks against the database"""
+
+hash_chunk_size = 16
+"""Passwords sent to a hashing process at a time"""
+
+Progress = Callable[[str, int, int], None]
+"""Called with the stage, `"hash"` or `"insert"`, and the rows done and due"""
+
+
+@dataclass
+class Record:
+    line: int
+    user: CustomUser
+    account: UserAccount
+    tenant: Tenant
+    password: str
+    """Raw password, blank for none"""
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+    def __str__(self):
+        return f"Line {self.line}: {self.message}"
+
+
+class BatchError(Exception):
+    """A batch failed to insert. Earlier batches are imported"""
+
+    def __init__(self, line: int, imported: int, error: Exception):
+        self.line = line
+        self.imported = imported
+        super().__init__(
+            f"Rows from line {line} not imported, {imported:,} imported: {error}"
+        )
+
+
+def read_rows(file: IO[str]) -> list[tuple[int, dict]]:
+    """Line number and values of each row"""
+    reader = csv.DictReader(file)
+    columns = [name.strip() for name in reader.fieldnames or ()]
+    missing_columns = [name for name in required_columns if name not in columns]
+    if missing_columns:
+        raise ValueError("Missing columns: " + ", ".join(missing_columns))
+    reader.fieldnames = columns
+    return [
+        (
+            reader.line_num,
+            {
+                name: (row.get(name) or "").strip()
+                for name in required_columns + optional_columns
+            },
+        )
+        for row in reader
+    ]
+
+
+def in_chunks(values: list, size: int = lookup_chunk_size) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def get_vacant_units(rows: list[tuple[int, dict]]) -> dict[tuple[str, str], int]:
+    """Ids of the vacant units of the rows by house name and unit"""
+    houses = list({row["house"] for _, row in rows})
+    unit_names = list({row["unit"] for _, row in rows})
+    units = {}
+    for house_chunk in in_chunks(houses):
+        for unit_chunk in in_chunks(unit_names):
+            units.update(
+                ((house, unit), unit_id)
+                for house, unit, unit_id in Unit.objects.filter(
+                    unit_group__house__name__in=house_chunk,
+                    abbreviated_name__in=unit_chunk,
+                    occupied_status=Unit.OccupiedStatus.VACANT.value,
+                    tenant__isnull=True,
+                ).values_list("unit_group__house__name", "abbreviated_name", "id")
+            )
+    return units
+
+
+def get_field_errors(instance: models.Model, exclude: Iterable[str]) -> dict:
+    """Messages of the invalid fields of `instance` by field name"""
+    try:
+        instance.clean_fields(exclude=exclude)
+    except ValidationError as e:
+        return e.message_dict
+    return {}
+
+
+def validate(rows: list[tuple[int, dict]]) -> tuple[list[Record], list[RowError]]:
+    """Records of the rows and the errors found in them. The rows are only to
+    be imported if there are no errors"""
+    records, errors = [], []
+    vacant_units = get_vacant_units(rows)
+    today = timezone.localdate()
+    lines_by_value = {field: {} for field in (*unique_user_fields, "unit")}
+
+    for line, row in rows:
+        user = CustomUser(
+            **{field: row[field] for field in user_fields},
+            gender=row["gender"] or CustomUser.UserGender.OTHER.value,
+        )
+        account = UserAccount(balance=row["opening_balance"] or 0)
+        tenant = Tenant(
+            lease_start_date=row["lease_start_date"] or today,
+            lease_end_date=row["lease_end_date"] or None,
+            unit_id=vacant_units.get((row["house"], row["unit"])),
+        )
+        field_errors = {
+            **get_field_errors(user, unvalidated_user_fields),
+            **{
+                "opening_balance": field_messages
+                for field_messages in get_field_errors(account, ()).values()
+            },
+            **get_field_errors(tenant, ("user", "unit")),
+        }
+        messages = [
+            "%s - %s" % (field, " ".join(field_messages))
+            for field, field_messages in field_errors.items()
+        ]
+        if tenant.unit_id is None:
+            messages.append(f"No vacant unit {row['unit']} in house {row['house']}")
+        values = {field: getattr(user, field) for field in unique_user_fields}
+        values["unit"] = tenant.unit_id
+        for field, value in values.items():
+            if value is None or field in field_errors:
+                continue
+            first_line = lines_by_value[field].setdefault(value, line)
+            if first_line != line:
+                messages.append(f"{field} - same as on line {first_line}")
+        if messages:
+            errors.extend(RowError(line, message) for message in messages)
+            continue
+        user.phone_number_e164 = normalize_phone_number(user.phone_number)
+        records.append(Record(line, user, account, tenant, row["password"]))
+
+    for field in unique_user_fields:
+        taken = []
+        for chunk in in_chunks(list(lines_by_value[field])):
+            taken.extend(
+                CustomUser.objects.filter(**{f"{field}__in": chunk}).values_list(
+                    field, flat=True
+                )
+            )
+        errors.extend(
+            RowError(lines_by_value[field][value], f"{field} - {value} is taken")
+            for value in taken
+        )
+    errors.sort(key=lambda error: error.line)
+    return records, errors
+
+
+def hash_passwords(
+    records: list[Record], workers: int | None = None, progress: Progress = None
+):
+    """Sets the password of the users, hashed on `workers` processes. Users
+    without a password get an unusable one"""
+    with_password = [record for record in records if record.password]
+    for record in records:
+        if not record.password:
+            record.user.password = make_password(None)
+    if not with_password:
+        return
+    # Forked processes mustn't share the connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        hashes = pool.map(
+            make_password,
+            [record.password for record in with_password],
+            chunksize=hash_chunk_size,
+        )
+        for count, (record, password) in enumerate(zip(with_password, hashes), 1):
+            record.user.password = password
+            if progress is not None and (
+                count % 100 == 0 or count == len(with_password)
+            ):
+                progress("hash", count, len(with_password))
+
+
+def create_objects(model: type[models.Model], objects: list[models.Model]):
+    """Inserts `objects`, setting their primary keys, without calling their
+    `save`"""
+    if connections[model.objects.db].features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objects)
+    else:
+        for obj in objects:
+            models.Model.save(obj, force_insert=True)
+
+
+def insert(records: list[Record], batch_size: int = 500, progress: Progress = None):
+    """Inserts the records in batches, a transaction each"""
+    today = timezone.localdate()
+    for start in range(0, len(records), batch_size):
+        batch = records[start : start + batch_size]
+        try:
+            with transaction.atomic():
+                create_objects(UserAccount, [record.account for record in batch])
+                for record in batch:
+                    record.user.account = record.account
+                create_objects(CustomUser, [record.user for record in batch])
+                for record in batch:
+                    record.tenant.user = record.user
+                create_objects(Tenant, [record.tenant for record in batch])
+                # As `Tenant.save` does for a new tenant
+                Unit.objects.filter(
+                    id__in=[record.tenant.unit_id for record in batch]
+                ).update(
+                    occupied_status=Unit.OccupiedStatus.OCCUPIED.value,
+                    last_rent_payment_date=today,
+                    updated_at=timezone.now(),
+                )
+                if lookup.is_enabled():
+                    lookup.index_tenants([record.tenant.id for record in batch])
+        except Exception as e:
+            raise BatchError(batch[0].line, start, e) from e
+        if progress is not None:
+            progress("insert", start + len(batch), len(records))
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection, connections, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from fastapi.testclient import TestClient
+
+from api import app
+from management.models import Concern
+from rental import lookup
+from rental_ms import db_router
+from rental_ms.utils.testing import AdminPageTestCase, create_tenant
+
+primary_about = "From the primary"
+
+replica_about = "From the replica"
+
+if not db_router.is_replica_enabled():
+    # A mirror of the primary, as a configured replica is in tests
+    connections.settings[db_router.replica_alias] = {
+        **connections.settings[db_router.primary_alias],
+        "TEST": {"MIRROR": db_router.primary_alias},
+    }
+
+
+@skipUnless(connection.vendor == "sqlite", "The replica is a copy of SQLite's file")
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routes reads between the primary and a replica copied from it, whose
+    concerns are marked so that responses tell which database served them"""
+
+    databases = {db_router.primary_alias, db_router.replica_alias}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.replica_path = Path(cls.directory.name) / "replica.sqlite3"
+        cls.mirror_settings = connections.settings[db_router.replica_alias]
+        connections.settings[db_router.replica_alias] = {
+            **connections.settings[db_router.primary_alias],
+            "NAME": cls.replica_path,
+        }
+        connections[db_router.replica_alias].close()
+        del connections[db_router.replica_alias]
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[db_router.replica_alias].close()
+        del connections[db_router.replica_alias]
+        connections.settings[db_router.replica_alias] = cls.mirror_settings
+        cls.directory.cleanup()
+
+    def setUp(self):
+        tenant = create_tenant(is_staff=True, is_superuser=True, token="rms_test")
+        Concern.objects.create(tenant=tenant, about=primary_about, details="Details")
+        self.headers = {"Authorization": f"Bearer {tenant.user.token}"}
+        self.admin_client = Client()
+        # Before the copy, the replica has the session
+        self.admin_client.force_login(tenant.user)
+
+        connections[db_router.replica_alias].close()
+        connection.ensure_connection()
+        with closing(sqlite3.connect(self.replica_path)) as replica:
+            connection.connection.backup(replica)
+            replica.execute(
+                f"UPDATE {Concern._meta.db_table} SET about = ?", [replica_about]
+            )
+            replica.commit()
+
+    def read_concerns(self, client: TestClient) -> set[str]:
+        response = client.get("/api/v1/core/concerns", headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        return {concern["about"] for concern in response.json()}
+
+    def test_api_get_reads_from_the_replica(self):
+        self.assertEqual(self.read_concerns(TestClient(app)), {replica_about})
+
+    def test_admin_get_reads_from_the_replica(self):
+        response = self.admin_client.get("/admin/management/concern/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {concern.about for concern in response.context["cl"].result_list},
+            {replica_about},
+        )
+
+    def test_get_after_a_write_reads_from_the_primary(self):
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/core/concern/new",
+            headers=self.headers,
+            json={"about": "New concern", "details": "Details"},
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertIn(db_router.cookie_name, response.headers.get("set-cookie", ""))
+        self.assertEqual(self.read_concerns(client), {primary_about, "New concern"})
+        # Other clients still read from the replica
+        self.assertEqual(self.read_concerns(TestClient(app)), {replica_about})
+
+    def test_reads_within_atomic_go_to_the_primary(self):
+        token = db_router.current_state.set(db_router.RoutingState(use_replica=True))
+        try:
+            abouts = set(Concern.objects.values_list("about", flat=True))
+            with transaction.atomic():
+                atomic_abouts = set(Concern.objects.values_list("about", flat=True))
+        finally:
+            db_router.current_state.reset(token)
+        self.assertEqual(abouts, {replica_about})
+        self.assertEqual(atomic_abouts, {primary_about})
+
+
+class AdminPageTests(AdminPageTestCase):
+    def test_unit_pages_are_small(self):
+        unit = self.tenant.unit
+        self.assertPageSmall(reverse("admin:rental_unit_changelist"))
+        self.assertPageSmall(reverse("admin:rental_unit_change", args=[unit.pk]))
+        self.assertPageSmall(
+            reverse("admin:rental_unitgroup_change", args=[unit.unit_group.pk])
+        )
+
+    def test_tenant_pages_are_small(self):
+        self.assertPageSmall(reverse("admin:rental_tenant_changelist"))
+        self.assertPageSmall(reverse("admin:rental_tenant_add"))
+        self.assertPageSmall(
+            reverse("admin:rental_tenant_change", args=[self.tenant.pk])
+        )
+
+
+@skipUnless(lookup.is_enabled(), f"No lookup index on {connection.vendor}")
+class TenantLookupTests(TestCase):
+    def setUp(self):
+        self.tenant = create_tenant()
+
+    def test_saves_changing_the_document_update_it(self):
+        self.assertEqual(lookup.lookup("0700000100", 10), [self.tenant.pk])
+        user = self.tenant.user
+        user.phone_number = "0798765432"
+        user.save(update_fields=["phone_number"])
+        self.assertEqual(lookup.lookup("0700000100", 10), [])
+        self.assertEqual(lookup.lookup("0798765432", 10), [self.tenant.pk])
+        unit = self.tenant.unit
+        unit.abbreviated_name = "NEW1"
+        unit.save()
+        self.assertEqual(lookup.lookup("new1", 10), [self.tenant.pk])
+
+    def test_saves_of_other_fields_skip_the_document(self):
+        user = self.tenant.user
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login"])
+        unit = self.tenant.unit
+        with self.assertNumQueries(1):
+            unit.save(update_fields=["last_rent_payment_date"])
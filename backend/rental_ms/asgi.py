@@ -7,10 +7,42 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rental_ms.settings")
 
+
+class ConcurrencyLimitedASGIHandler:
+    """Caps the number of Django requests handled at a time.
+
+    Django runs the sync parts of every request (middleware, views, ORM) on a
+    thread of its own rather than on the threadpool serving the FastAPI routes.
+    The cap bounds those threads so that heavy admin traffic such as exports
+    cannot starve the API, while extra requests wait on the event loop.
+    """
+
+    def __init__(self, application, max_concurrency: int):
+        self.application = application
+        self.max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.application(scope, receive, send)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            await self.application(scope, receive, send)
+
+
 application = get_asgi_application()
+
+from django.conf import settings
+
+if settings.DJANGO_MAX_CONCURRENCY:
+    application = ConcurrencyLimitedASGIHandler(
+        application, settings.DJANGO_MAX_CONCURRENCY
+    )
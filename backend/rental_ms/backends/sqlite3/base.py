@@ -0,0 +1,126 @@
+"""SQLite tuned for serving concurrent requests
+
+Enabled with `DATABASE_SQLITE_PRODUCTION`. On top of Django's SQLite backend:
+
+- Every connection switches to WAL, so readers no longer block on the writer
+  and the writer no longer blocks on readers. It also sets `synchronous=NORMAL`
+  (durable in WAL mode, minus the fsync per commit), memory-mapped I/O and a
+  larger page cache.
+- Transactions begin `IMMEDIATE`. A deferred transaction that reads and then
+  writes fails with `database is locked` when another write is in progress,
+  without waiting for it.
+- Writes of a process go through a single writer, one at a time. Whole
+  transactions are serialized, as are statements outside of transactions. A write no longer spins on SQLite's busy handler while
+  another thread of the process writes. Reads are never serialized.
+
+Writers of separate processes (workers of the production server) are still
+serialized by SQLite itself, waiting up to `timeout` seconds.
+"""
+
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+default_mmap_size = 256 * 1024 * 1024
+"""Bytes of the database file memory-mapped"""
+
+default_cache_size = 64 * 1024
+"""KiB of page cache per connection"""
+
+default_timeout = 20
+"""Seconds a write waits for the database before failing"""
+
+read_statements = ("SELECT", "EXPLAIN", "PRAGMA")
+
+writer_locks: dict[str, threading.Lock] = {}
+writer_locks_guard = threading.Lock()
+
+
+def get_writer_lock(name: str) -> threading.Lock:
+    """The process-wide lock serializing writes to the `name` database"""
+    with writer_locks_guard:
+        return writer_locks.setdefault(str(name), threading.Lock())
+
+
+def serialize_writes(execute, sql, params, many, context):
+    """Database `execute_wrapper` passing writes made outside of
+    transactions through the writer"""
+    connection = context["connection"]
+    if connection.holds_writer_lock or sql.lstrip()[:7].upper().startswith(
+        read_statements
+    ):
+        return execute(sql, params, many, context)
+    connection.acquire_writer_lock()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        connection.release_writer_lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.holds_writer_lock = False
+        self.writer_lock = get_writer_lock(self.settings_dict["NAME"])
+        self.writer_timeout = self.settings_dict["OPTIONS"].get(
+            "timeout", default_timeout
+        )
+        self.execute_wrappers.append(serialize_writes)
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        mmap_size = kwargs.pop("mmap_size", default_mmap_size)
+        cache_size = kwargs.pop("cache_size", default_cache_size)
+        kwargs.setdefault("timeout", default_timeout)
+        if self.transaction_mode is None:
+            self.transaction_mode = "IMMEDIATE"
+        self.init_commands = [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            "PRAGMA temp_store=MEMORY",
+            f"PRAGMA mmap_size={int(mmap_size)}",
+            # Negative - size in KiB rather than pages
+            f"PRAGMA cache_size=-{int(cache_size)}",
+            *self.init_commands,
+        ]
+        return kwargs
+
+    def acquire_writer_lock(self):
+        if not self.writer_lock.acquire(timeout=self.writer_timeout):
+            raise OperationalError("database is locked")
+        self.holds_writer_lock = True
+
+    def release_writer_lock(self):
+        if self.holds_writer_lock:
+            self.holds_writer_lock = False
+            self.writer_lock.release()
+
+    def _start_transaction_under_autocommit(self):
+        # Transactions begin IMMEDIATE i.e as writes, so they hold the writer
+        # from BEGIN to COMMIT/ROLLBACK
+        self.acquire_writer_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except BaseException:
+            self.release_writer_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_writer_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_writer_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_writer_lock()
@@ -0,0 +1,237 @@
+"""On-demand CPU profiler
+
+Wraps requests in a statistical profiler (`pyinstrument`) and stores the result
+in the speedscope format (flamegraph, viewable at https://www.speedscope.app)
+under `CPU_PROFILER_DIR`, keyed by route and request id.
+
+A request is profiled when it carries a valid signed token in the `X-CPU-Profile`
+header or is picked by the `CPU_PROFILER_SAMPLE_RATE` sample. Generate the token
+with `$ python -m api cpu-profile-token`. Profiles are listed and downloaded from
+the internal endpoints `/api/internal/profiles`.
+
+Nothing is imported or measured for requests that are not profiled.
+"""
+
+import random
+import re
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from anyio import to_thread
+from django.conf import settings
+from django.core import signing
+from starlette.datastructures import MutableHeaders
+
+header_name = "X-CPU-Profile"
+"""Request header carrying the signed profiling token"""
+
+asgi_header_name = header_name.lower().encode()
+
+request_id_header_name = b"x-request-id"
+
+response_header_name = "X-CPU-Profile-Id"
+"""Response header with the id of the profile stored"""
+
+signer_salt = "rental_ms.cpu_profiler"
+
+token_value = "cpu-profile"
+
+profile_suffix = ".speedscope.json"
+
+unsafe_characters_pattern = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def generate_token() -> str:
+    """Value of the `X-CPU-Profile` header enabling profiling of a request"""
+    return signing.TimestampSigner(salt=signer_salt).sign(token_value)
+
+
+def is_valid_token(token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        value = signing.TimestampSigner(salt=signer_salt).unsign(
+            token, max_age=settings.CPU_PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == token_value
+
+
+def should_profile(token: str | None) -> bool:
+    if token is not None and is_valid_token(token):
+        return True
+    sample_rate = settings.CPU_PROFILER_SAMPLE_RATE
+    return bool(sample_rate) and random.random() < sample_rate
+
+
+def start_profiler(async_mode: str = "disabled"):
+    from pyinstrument import Profiler
+
+    profiler = Profiler(
+        interval=settings.CPU_PROFILER_INTERVAL_MS / 1000, async_mode=async_mode
+    )
+    profiler.start()
+    return profiler
+
+
+@dataclass
+class CPUProfile:
+    """Profiler sessions recorded while handling a request"""
+
+    request_id: str
+    sessions: list = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def id(self) -> str:
+        return "%s-%s" % (
+            self.created_at.strftime("%Y%m%d%H%M%S"),
+            unsafe_characters_pattern.sub("", self.request_id)[:64],
+        )
+
+    def save(self, method: str, route: str) -> Path:
+        """Saves the sessions in the speedscope format and drops the oldest
+        profiles beyond `CPU_PROFILER_KEEP`"""
+        from pyinstrument.renderers import SpeedscopeRenderer
+        from pyinstrument.session import Session
+
+        session = self.sessions[0]
+        for other_session in self.sessions[1:]:
+            session = Session.combine(session, other_session)
+
+        directory: Path = settings.CPU_PROFILER_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        route_slug = unsafe_characters_pattern.sub("_", route).strip("_")
+        file_path = directory / f"{self.id}__{method}__{route_slug}{profile_suffix}"
+        file_path.write_text(SpeedscopeRenderer().render(session))
+
+        for stale_profile in list_profiles()[settings.CPU_PROFILER_KEEP :]:
+            stale_profile.unlink(missing_ok=True)
+        return file_path
+
+
+current_profile: ContextVar[CPUProfile | None] = ContextVar(
+    "current_cpu_profile", default=None
+)
+"""Profile of the request being handled. Context variables are copied to
+the threads running sync code so their sessions join their request's profile"""
+
+
+def list_profiles() -> list[Path]:
+    """Stored profiles, most recent first"""
+    directory: Path = settings.CPU_PROFILER_DIR
+    if not directory.is_dir():
+        return []
+    return sorted(
+        directory.glob(f"*{profile_suffix}"),
+        key=lambda file_path: file_path.stat().st_mtime_ns,
+        reverse=True,
+    )
+
+
+def get_profile_info(file_path: Path) -> dict:
+    profile_id, method, route = file_path.name.removesuffix(profile_suffix).split(
+        "__", 2
+    )
+    stat = file_path.stat()
+    return dict(
+        name=file_path.name,
+        id=profile_id,
+        method=method,
+        route=route,
+        size=stat.st_size,
+        created_at=datetime.fromtimestamp(stat.st_mtime),
+    )
+
+
+def profile_thread_call(func):
+    """Wraps a callable about to run on a thread so that its time joins
+    the current request's profile. Returns `func` itself when not profiling."""
+    profile = current_profile.get()
+    if profile is None:
+        return func
+
+    def profiled_func(*args, **kwargs):
+        profiler = start_profiler()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.sessions.append(profiler.stop())
+
+    return profiled_func
+
+
+class CPUProfilerMiddleware:
+    """Profiles Django requests (admin etc).
+
+    When the request is already profiled (admin served through the API),
+    the time of the thread running the view joins that profile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if current_profile.get() is not None:
+            return profile_thread_call(self.get_response)(request)
+        if not should_profile(request.headers.get(header_name)):
+            return self.get_response(request)
+        profile = CPUProfile(
+            request_id=request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        )
+        token = current_profile.set(profile)
+        profiler = start_profiler()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.sessions.append(profiler.stop())
+            current_profile.reset(token)
+        resolver_match = request.resolver_match
+        route = resolver_match.route if resolver_match else request.path
+        profile.save(request.method, route)
+        response[response_header_name] = profile.id
+        return response
+
+
+class CPUProfilerASGIMiddleware:
+    """Profiles requests to an ASGI app (the API and Django mounted in it)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = request_id = None
+        for name, value in scope["headers"]:
+            if name == asgi_header_name:
+                token = value.decode("latin1")
+            elif name == request_id_header_name:
+                request_id = value.decode("latin1")
+        if not should_profile(token):
+            return await self.app(scope, receive, send)
+
+        profile = CPUProfile(request_id=request_id or uuid.uuid4().hex)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[response_header_name] = profile.id
+            await send(message)
+
+        context_token = current_profile.set(profile)
+        profiler = start_profiler(async_mode="enabled")
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.sessions.append(profiler.stop())
+            current_profile.reset(context_token)
+            route = scope.get("route")
+            await to_thread.run_sync(
+                profile.save,
+                scope["method"],
+                route.path_format if route is not None else scope["path"],
+            )
@@ -0,0 +1,154 @@
+"""Routes reads of requests to the read replica
+
+Enabled when a `replica` database is configured (`DATABASE_REPLICA_NAME` or
+`DATABASE_REPLICA_HOST`). Reads made while handling `GET`/`HEAD`/`OPTIONS`
+requests of the API and Django (admin changelists etc) go to the replica.
+Everything else uses the primary (`default`):
+
+- Writes, and reads made after a write within the same request.
+- Requests of other methods e.g token issuance, mark-read, new concern.
+- Requests from a client that wrote within the last
+  `DATABASE_REPLICA_STICKY_SECONDS`, so it reads what it just wrote while
+  the replica catches up. A cookie set on the write pins the client.
+- Transactions, management commands and other work done outside requests.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import parse_cookie
+from starlette.datastructures import MutableHeaders
+
+primary_alias = DEFAULT_DB_ALIAS
+
+replica_alias = "replica"
+
+cookie_name = "rms_use_primary"
+"""Cookie pinning a client that just wrote to the primary"""
+
+safe_methods = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+@dataclass
+class RoutingState:
+    use_replica: bool
+    wrote: bool = False
+
+
+current_state: ContextVar[RoutingState | None] = ContextVar(
+    "current_db_routing_state", default=None
+)
+"""Routing state of the request being handled. Mutated in place so that writes
+made on the threads running the ORM reach their request"""
+
+
+def is_replica_enabled() -> bool:
+    return replica_alias in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or connections[primary_alias].in_atomic_block
+            or not is_replica_enabled()
+        ):
+            return primary_alias
+        return replica_alias
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.use_replica = False
+            state.wrote = True
+        return primary_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {primary_alias, replica_alias}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db == primary_alias
+
+
+def new_state(method: str, cookies: dict) -> RoutingState:
+    return RoutingState(
+        use_replica=method in safe_methods
+        and cookie_name not in cookies
+        and is_replica_enabled()
+    )
+
+
+def get_cookie_header() -> str:
+    """`Set-Cookie` value pinning the client to the primary"""
+    return "%s=1; Max-Age=%d; Path=/; HttpOnly; SameSite=Lax" % (
+        cookie_name,
+        settings.DATABASE_REPLICA_STICKY_SECONDS,
+    )
+
+
+class ReplicaRoutingMiddleware:
+    """Routes reads of Django requests (admin etc)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if current_state.get() is not None:
+            # Already routed e.g admin requests passing through the API
+            return self.get_response(request)
+        state = new_state(request.method, request.COOKIES)
+        token = current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_state.reset(token)
+        if state.wrote and is_replica_enabled():
+            response.set_cookie(
+                cookie_name,
+                "1",
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class ReplicaRoutingASGIMiddleware:
+    """Routes reads of requests to an ASGI app (the API and Django mounted in it)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        cookies = {}
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                cookies = parse_cookie(value.decode("latin1"))
+                break
+        state = new_state(scope["method"], cookies)
+
+        async def send_with_cookie(message):
+            if (
+                message["type"] == "http.response.start"
+                and state.wrote
+                and is_replica_enabled()
+            ):
+                MutableHeaders(scope=message).append("Set-Cookie", get_cookie_header())
+            await send(message)
+
+        token = current_state.set(state)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_state.reset(token)
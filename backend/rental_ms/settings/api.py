@@ -0,0 +1,26 @@
+"""Lean configs for API-only workers
+
+Loads only the apps needed by the FastAPI routes. The admin and other Django views
+(`/d/...`) are expected to be served by their own process e.g
+`uvicorn rental_ms.asgi:application`.
+
+Usage:
+    $ DJANGO_SETTINGS_MODULE=rental_ms.settings.api python -m fastapi run api
+"""
+
+from rental_ms.settings import *
+
+INSTALLED_APPS = [
+    "users.apps.UsersConfig",
+    "finance.apps.FinanceConfig",
+    "external.apps.ExternalConfig",
+    "rental.apps.RentalConfig",
+    "management.apps.ManagementConfig",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+]
+
+MIDDLEWARE = []
+
+MOUNT_DJANGO_APP = False
+"""Django views are served by a separate process"""
@@ -53,6 +53,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "rental_ms.cpu_profiler.CPUProfilerMiddleware",
+    "rental_ms.sql_profiler.SQLProfilerMiddleware",
+    "rental_ms.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -84,6 +87,25 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "rental_ms.wsgi.application"
 
+ASGI_APPLICATION = "rental_ms.asgi.application"
+
+DJANGO_MAX_CONCURRENCY = env_setting.DJANGO_MAX_CONCURRENCY
+"""Django requests (admin etc) handled at a time when mounted in the API. `0` - No limit"""
+
+API_MAX_CONCURRENCY = env_setting.API_MAX_CONCURRENCY
+"""Tenant API routes running their async ORM calls at a time per worker, each on a
+thread of its own. Others wait for a thread. `0` - No limit, all share one thread"""
+
+MOUNT_DJANGO_APP = True
+"""Serve Django views (admin etc) from the API under `/d`"""
+
+INTERNAL_API_TOKEN = env_setting.INTERNAL_API_TOKEN
+"""Token required by the internal endpoints (metrics etc). Not served when not set"""
+
+INTERNAL_API_ALLOW_LOOPBACK = env_setting.INTERNAL_API_ALLOW_LOOPBACK
+"""Serve the internal endpoints to loopback clients without a token. Never behind a
+reverse proxy on the same host"""
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -104,9 +126,53 @@ DATABASES = {
         "PASSWORD": env_setting.DATABASE_PASSWORD,
         "HOST": env_setting.DATABASE_HOST,
         "PORT": str(env_setting.DATABASE_PORT),
+        "CONN_MAX_AGE": env_setting.DATABASE_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": env_setting.DATABASE_CONN_HEALTH_CHECKS,
     }
 }
 
+if (
+    env_setting.DATABASE_POOL_MAX_SIZE
+    and env_setting.DATABASE_ENGINE == "django.db.backends.postgresql"
+):
+    # Driver level pool (psycopg 3) - connections are returned to the pool
+    # rather than persisted, hence no CONN_MAX_AGE.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": env_setting.DATABASE_POOL_MIN_SIZE,
+            "max_size": env_setting.DATABASE_POOL_MAX_SIZE,
+            "timeout": env_setting.DATABASE_POOL_TIMEOUT,
+        }
+    }
+
+if (
+    env_setting.DATABASE_SQLITE_PRODUCTION
+    and env_setting.DATABASE_ENGINE == "django.db.backends.sqlite3"
+):
+    # WAL, tuned pragmas and a single writer per process
+    DATABASES["default"]["ENGINE"] = "rental_ms.backends.sqlite3"
+    DATABASES["default"]["OPTIONS"] = {
+        "mmap_size": env_setting.DATABASE_SQLITE_MMAP_SIZE,
+        "cache_size": env_setting.DATABASE_SQLITE_CACHE_SIZE,
+        "timeout": env_setting.DATABASE_SQLITE_TIMEOUT,
+    }
+
+if env_setting.DATABASE_REPLICA_NAME or env_setting.DATABASE_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": env_setting.DATABASE_REPLICA_NAME or env_setting.DATABASE_NAME,
+        "HOST": env_setting.DATABASE_REPLICA_HOST or env_setting.DATABASE_HOST,
+        "PORT": str(env_setting.DATABASE_REPLICA_PORT or env_setting.DATABASE_PORT),
+        "OPTIONS": dict(DATABASES["default"].get("OPTIONS", {})),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["rental_ms.db_router.PrimaryReplicaRouter"]
+
+DATABASE_REPLICA_STICKY_SECONDS = env_setting.DATABASE_REPLICA_STICKY_SECONDS
+"""Seconds a client reads from the primary after writing to it"""
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -173,6 +239,38 @@ STATIC_ROOT = files_root / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = files_root / "media"
 
+# SQL profiler
+
+SQL_PROFILER_ENABLED = env_setting.SQL_PROFILER_ENABLED
+"""Profile SQL of every request. Otherwise only requests with a valid `X-SQL-Profile` header"""
+
+SQL_PROFILER_REPEAT_THRESHOLD = env_setting.SQL_PROFILER_REPEAT_THRESHOLD
+"""Statement shapes repeated more than this in a request are flagged as N+1"""
+
+SQL_PROFILER_SLOW_QUERY_MS = env_setting.SQL_PROFILER_SLOW_QUERY_MS
+"""Statements taking longer than this are logged with their `EXPLAIN` plan"""
+
+SQL_PROFILER_TOKEN_MAX_AGE = 60 * 60 * 24
+"""Seconds a `X-SQL-Profile` header token remains valid"""
+
+SQL_PROFILER_LOG = files_root / "logs" / "sql-profiler.log"
+
+# CPU profiler
+
+CPU_PROFILER_SAMPLE_RATE = env_setting.CPU_PROFILER_SAMPLE_RATE
+"""Fraction of requests to profile e.g `0.01`. Others only with a valid `X-CPU-Profile` header"""
+
+CPU_PROFILER_INTERVAL_MS = env_setting.CPU_PROFILER_INTERVAL_MS
+"""Sampling interval of the profiler"""
+
+CPU_PROFILER_KEEP = env_setting.CPU_PROFILER_KEEP
+"""Number of most recent profiles kept"""
+
+CPU_PROFILER_TOKEN_MAX_AGE = 60 * 60 * 24
+"""Seconds a `X-CPU-Profile` header token remains valid"""
+
+CPU_PROFILER_DIR = files_root / "profiles"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -201,6 +299,10 @@ SITE_ADDRESS = env_setting.SITE_ADDRESS
 
 CURRENCY = env_setting.CURRENCY
 """Transaction currency"""
+PHONE_NUMBER_COUNTRY_CODE = env_setting.PHONE_NUMBER_COUNTRY_CODE
+"""Calling code of phone numbers entered in local format e.g 07..."""
+PHONE_NUMBER_NATIONAL_LENGTH = env_setting.PHONE_NUMBER_NATIONAL_LENGTH
+"""Digits of a local phone number without the trunk prefix e.g 712345678"""
 DEMO = env_setting.DEMO
 
 # ADMIN
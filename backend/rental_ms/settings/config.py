@@ -17,6 +17,19 @@ class EnvSettings(BaseModel):
     DATABASE_PASSWORD: str = "development"
     DATABASE_HOST: Optional[str] = "localhost"
     DATABASE_PORT: Optional[int] = 3306
+    DATABASE_CONN_MAX_AGE: Optional[int] = 60
+    DATABASE_CONN_HEALTH_CHECKS: Optional[bool] = True
+    DATABASE_POOL_MIN_SIZE: Optional[int] = 2
+    DATABASE_POOL_MAX_SIZE: Optional[int] = None
+    DATABASE_POOL_TIMEOUT: Optional[float] = 10
+    DATABASE_SQLITE_PRODUCTION: Optional[bool] = False
+    DATABASE_SQLITE_MMAP_SIZE: Optional[int] = 256 * 1024 * 1024
+    DATABASE_SQLITE_CACHE_SIZE: Optional[int] = 64 * 1024
+    DATABASE_SQLITE_TIMEOUT: Optional[float] = 20
+    DATABASE_REPLICA_NAME: Optional[str] = None
+    DATABASE_REPLICA_HOST: Optional[str] = None
+    DATABASE_REPLICA_PORT: Optional[int] = None
+    DATABASE_REPLICA_STICKY_SECONDS: Optional[int] = 10
 
     # APPLICATION
     SECRET_KEY: Optional[str] = (
@@ -29,6 +42,18 @@ class EnvSettings(BaseModel):
     SITE_NAME: Optional[str] = "Rental MS"
     SITE_ADDRESS: Annotated[str, HttpUrl] = "http://localhost:8000"
     FRONTEND_DIR: Optional[str] = None
+    DJANGO_MAX_CONCURRENCY: Optional[int] = 10
+    API_MAX_CONCURRENCY: Optional[int] = 40
+    INTERNAL_API_TOKEN: Optional[str] = None
+    INTERNAL_API_ALLOW_LOOPBACK: Optional[bool] = False
+
+    # PROFILING
+    SQL_PROFILER_ENABLED: Optional[bool] = False
+    SQL_PROFILER_REPEAT_THRESHOLD: Optional[int] = 5
+    SQL_PROFILER_SLOW_QUERY_MS: Optional[float] = 100
+    CPU_PROFILER_SAMPLE_RATE: Optional[float] = 0
+    CPU_PROFILER_INTERVAL_MS: Optional[float] = 1
+    CPU_PROFILER_KEEP: Optional[int] = 100
 
     # E-MAIL
     EMAIL_BACKEND: Optional[str] = "django.core.mail.backends.smtp.EmailBackend"
@@ -52,6 +77,8 @@ class EnvSettings(BaseModel):
 
     # UTILS
     CURRENCY: Optional[str] = "Ksh"
+    PHONE_NUMBER_COUNTRY_CODE: Optional[str] = "254"
+    PHONE_NUMBER_NATIONAL_LENGTH: Optional[int] = 9
 
     DEMO: Optional[bool] = False
 
@@ -0,0 +1,265 @@
+"""Per-request SQL profiler
+
+Captures the SQL statements executed while handling a request, groups them by
+their normalized shape and logs a report to a rotating log file:
+
+- Shapes repeated more than `SQL_PROFILER_REPEAT_THRESHOLD` times in a request
+  are flagged as suspected N+1 queries.
+- Statements slower than `SQL_PROFILER_SLOW_QUERY_MS` are logged with their `EXPLAIN` plan.
+
+Profiling is opt-in, either for every request (`SQL_PROFILER_ENABLED`) or
+per request by passing a signed token in the `X-SQL-Profile` header.
+Generate the token with `$ python -m api sql-profile-token`.
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+
+from anyio import to_thread
+from django.conf import settings
+from django.core import signing
+from django.db.backends.signals import connection_created
+
+header_name = "X-SQL-Profile"
+"""Request header carrying the signed profiling token"""
+
+asgi_header_name = header_name.lower().encode()
+
+signer_salt = "rental_ms.sql_profiler"
+
+token_value = "sql-profile"
+
+string_literal_pattern = re.compile(r"'(?:[^']|'')*'")
+number_pattern = re.compile(r"\b\d+(?:\.\d+)?\b")
+placeholder_list_pattern = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+whitespace_pattern = re.compile(r"\s+")
+
+logger = logging.getLogger("rental_ms.sql_profiler")
+
+
+def get_logger() -> logging.Logger:
+    """Logger writing to the rotating `SQL_PROFILER_LOG` file"""
+    if not logger.handlers:
+        settings.SQL_PROFILER_LOG.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            settings.SQL_PROFILER_LOG, maxBytes=5 * 1024 * 1024, backupCount=5
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def normalize_sql(sql: str) -> str:
+    """Reduces a statement to its shape e.g
+    `SELECT ... WHERE id IN (%s, %s)` -> `SELECT ... WHERE id IN (?)`"""
+    shape = sql.replace("%s", "?")
+    shape = string_literal_pattern.sub("?", shape)
+    shape = number_pattern.sub("?", shape)
+    shape = placeholder_list_pattern.sub("(?)", shape)
+    return whitespace_pattern.sub(" ", shape).strip()
+
+
+def generate_token() -> str:
+    """Value of the `X-SQL-Profile` header enabling profiling of a request"""
+    return signing.TimestampSigner(salt=signer_salt).sign(token_value)
+
+
+def is_valid_token(token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        value = signing.TimestampSigner(salt=signer_salt).unsign(
+            token, max_age=settings.SQL_PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == token_value
+
+
+@dataclass
+class StatementShape:
+    count: int = 0
+    duration: float = 0
+    example: str = ""
+
+
+@dataclass
+class SQLProfile:
+    """SQL statements executed while handling a request"""
+
+    label: str
+    shapes: dict[str, StatementShape] = field(default_factory=dict)
+    slow_statements: list[tuple[float, str, str]] = field(default_factory=list)
+    queries: int = 0
+    duration: float = 0
+
+    def record(self, connection, sql: str, params, many: bool, duration: float):
+        shape = normalize_sql(sql)
+        statement = self.shapes.get(shape)
+        if statement is None:
+            statement = self.shapes[shape] = StatementShape(example=sql)
+        statement.count += 1
+        statement.duration += duration
+        self.queries += 1
+        self.duration += duration
+        if not many and duration * 1000 >= settings.SQL_PROFILER_SLOW_QUERY_MS:
+            self.slow_statements.append(
+                (duration, sql, explain(connection, sql, params))
+            )
+
+    @property
+    def repeated_shapes(self) -> list[tuple[str, StatementShape]]:
+        """Shapes executed more times than the N+1 threshold"""
+        return [
+            (shape, statement)
+            for shape, statement in self.shapes.items()
+            if statement.count > settings.SQL_PROFILER_REPEAT_THRESHOLD
+        ]
+
+    def report(self):
+        log = get_logger()
+        log.info(
+            "%s - %d queries (%d shapes) in %.2fms",
+            self.label,
+            self.queries,
+            len(self.shapes),
+            self.duration * 1000,
+        )
+        for shape, statement in self.repeated_shapes:
+            log.warning(
+                "%s - Suspected N+1: %d x (%.2fms) %s",
+                self.label,
+                statement.count,
+                statement.duration * 1000,
+                shape,
+            )
+        for duration, sql, plan in self.slow_statements:
+            log.warning(
+                "%s - Slow query (%.2fms): %s\n%s",
+                self.label,
+                duration * 1000,
+                sql,
+                plan,
+            )
+
+
+current_profile: ContextVar[SQLProfile | None] = ContextVar(
+    "current_sql_profile", default=None
+)
+"""Profile of the request being handled. Context variables are copied to
+the threads running the ORM so statements are accounted to their request"""
+
+
+def explain(connection, sql: str, params) -> str:
+    """`EXPLAIN` plan of a select statement. Within a transaction, it is run in
+    a savepoint so that failing doesn't break the transaction"""
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    savepoint_id = None
+    if connection.in_atomic_block and connection.features.uses_savepoints:
+        savepoint_id = "sql_profiler_explain"
+    try:
+        # A cursor of its own, bypassing the execute wrappers
+        cursor = connection.create_cursor()
+        try:
+            if savepoint_id:
+                cursor.execute(connection.ops.savepoint_create_sql(savepoint_id))
+            try:
+                cursor.execute(
+                    f"{connection.ops.explain_query_prefix()} {sql}", params or ()
+                )
+                plan = "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+            except Exception:
+                if savepoint_id:
+                    cursor.execute(connection.ops.savepoint_rollback_sql(savepoint_id))
+                raise
+            if savepoint_id:
+                cursor.execute(connection.ops.savepoint_commit_sql(savepoint_id))
+            return plan
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"EXPLAIN failed - {e}"
+
+
+def profile_statement(execute, sql, params, many, context):
+    """Database `execute_wrapper` recording statements of profiled requests"""
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(
+            context["connection"],
+            sql,
+            params,
+            many,
+            time.perf_counter() - start_time,
+        )
+
+
+def install_statement_profiler(sender, connection, **kwargs):
+    if profile_statement not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_statement)
+
+
+connection_created.connect(install_statement_profiler)
+
+
+def should_profile(token: str | None) -> bool:
+    if current_profile.get() is not None:
+        # Already profiled e.g admin requests passing through the API
+        return False
+    return settings.SQL_PROFILER_ENABLED or is_valid_token(token)
+
+
+class SQLProfilerMiddleware:
+    """Profiles Django requests (admin etc)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request.headers.get(header_name)):
+            return self.get_response(request)
+        profile = SQLProfile(label=f"{request.method} {request.path}")
+        token = current_profile.set(profile)
+        try:
+            return self.get_response(request)
+        finally:
+            current_profile.reset(token)
+            profile.report()
+
+
+class SQLProfilerASGIMiddleware:
+    """Profiles requests to an ASGI app (the API and Django mounted in it)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = None
+        for name, value in scope["headers"]:
+            if name == asgi_header_name:
+                token = value.decode("latin1")
+                break
+        if not should_profile(token):
+            return await self.app(scope, receive, send)
+        profile = SQLProfile(label=f"{scope['method']} {scope['path']}")
+        context_token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(context_token)
+            # Writes to the log file, off the event loop
+            await to_thread.run_sync(profile.report)
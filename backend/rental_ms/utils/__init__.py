@@ -8,7 +8,8 @@ from django.core.mail import send_mail
 from django.utils import timezone
 from datetime import datetime, timedelta
 from rental_ms import settings
-import random
+import secrets
+import time
 from string import ascii_lowercase, ascii_uppercase, digits
 
 headers = {"Accept": "*/*"}
@@ -16,17 +17,51 @@ headers = {"Accept": "*/*"}
 url = "https://developer.safaricom.co.ke/api/v1/APIs/API/Simulate/MpesaExpressSimulate/"
 
 
+def normalize_phone_number(
+    phone_number: str | None,
+    country_code: str | None = None,
+    national_length: int | None = None,
+) -> str | None:
+    """Phone number in E.164 format e.g `+254712345678` for `0712 345 678`,
+    `712345678`, `254712345678` and `+254712345678`. Numbers entered in local
+    format take `country_code` (`PHONE_NUMBER_COUNTRY_CODE` by default). Without
+    a prefix, only numbers of `national_length` digits
+    (`PHONE_NUMBER_NATIONAL_LENGTH` by default) are local - others are foreign
+    numbers missing their `+`, which can't be told apart.
+    `None` when it isn't a phone number"""
+    if not phone_number:
+        return None
+    country_code = country_code or settings.PHONE_NUMBER_COUNTRY_CODE
+    national_length = national_length or settings.PHONE_NUMBER_NATIONAL_LENGTH
+    number = re.sub(r"[\s().-]", "", phone_number)
+    if number.startswith("+"):
+        number = number[1:]
+    elif number.startswith("00"):
+        # International call prefix
+        number = number[2:]
+    elif number.startswith("0"):
+        # Trunk prefix
+        number = country_code + number[1:]
+    elif len(number) == national_length:
+        number = country_code + number
+    elif not (
+        number.startswith(country_code)
+        and len(number) == len(country_code) + national_length
+    ):
+        return None
+    if not re.fullmatch(r"[1-9]\d{7,14}", number):
+        return None
+    return "+" + number
+
+
 def send_payment_push(phone_number: str, amount: int, account_reference: str):
     if settings.MPESA_AUTHORIZATION is None:
         return
-    if re.match(r"(^07|^011)", phone_number):
-        phone_number = int(phone_number)
-    elif re.match(r"^\+254", phone_number):
-        phone_number = int(phone_number[4:])
-    else:
+    phone_number = normalize_phone_number(phone_number)
+    if phone_number is None or not phone_number.startswith("+254"):
         raise ValueError(f"Invalid phone number.")
 
-    phone_number = f"254{phone_number}"
+    phone_number = phone_number[1:]
     payload = {
         "token": settings.MPESA_TOKEN,
         "authorization": settings.MPESA_AUTHORIZATION,
@@ -69,8 +104,25 @@ def get_expiry_datetime(minutes: float = 30) -> datetime:
 
 
 def generate_random_token(length: int = 8) -> str:
-    population = list(ascii_uppercase + digits)
-    return "".join(random.sample(population, length))
+    population = ascii_uppercase + digits
+    return "".join(secrets.choice(population) for _ in range(length))
+
+
+reference_alphabet = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+"""Crockford's base32, without I, L, O and U to be misread"""
+
+
+def generate_transaction_reference() -> str:
+    """Unique reference ordered by time, as a ULID - 48 bits of milliseconds
+    since the epoch then 80 random bits, as 26 characters. References from
+    any number of workers don't collide and are inserted at the end of the
+    index rather than all over it"""
+    value = (time.time_ns() // 1_000_000) << 80 | secrets.randbits(80)
+    characters = []
+    for _ in range(26):
+        value, index = divmod(value, 32)
+        characters.append(reference_alphabet[index])
+    return "".join(reversed(characters))
 
 
 class EnumWithChoices(Enum):
@@ -0,0 +1,319 @@
+"""Writing rows out as CSV and XLSX files in bounded memory"""
+
+import csv
+import re
+import zipfile
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import IO
+from xml.sax.saxutils import quoteattr
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+content_types = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+"""Content type by export format"""
+
+xlsx_sheet_rows = 1_048_575
+"""Rows of an Excel sheet, besides the header. Sheets are added past them"""
+
+batch_size = 1_000
+"""CSV and XLSX rows per part of the response"""
+
+excel_epoch = datetime(1899, 12, 30)
+"""Day 0 of Excel's times, as it counts 1900 as a leap year"""
+
+xml_special_characters = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f&<>]")
+
+xml_text_translation = {
+    **{code: None for code in (*range(0x09), 0x0B, 0x0C, *range(0x0E, 0x20))},
+    ord("&"): "&amp;",
+    ord("<"): "&lt;",
+    ord(">"): "&gt;",
+}
+"""Escapes text for XML, dropping the control characters it cannot hold"""
+
+illegal_sheet_title_characters = re.compile(r"[\[\]:*?/\\]")
+
+xlsx_declaration = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+xlsx_main_namespace = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+xlsx_relationships_namespace = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+)
+
+xlsx_sheet_head = (
+    f'{xlsx_declaration}<worksheet xmlns="{xlsx_main_namespace}"><sheetData>'
+)
+
+xlsx_sheet_tail = "</sheetData></worksheet>"
+
+xlsx_content_types = (
+    f"{xlsx_declaration}"
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "%s</Types>"
+)
+
+xlsx_sheet_content_type = (
+    '<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+
+xlsx_package_relationships = (
+    f"{xlsx_declaration}"
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships"><Relationship Id="rId1" '
+    f'Type="{xlsx_relationships_namespace}/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+
+xlsx_workbook = (
+    f'{xlsx_declaration}<workbook xmlns="{xlsx_main_namespace}" '
+    f'xmlns:r="{xlsx_relationships_namespace}"><sheets>%s</sheets></workbook>'
+)
+
+xlsx_workbook_sheet = '<sheet name=%s sheetId="%d" r:id="rId%d"/>'
+
+xlsx_workbook_relationships = (
+    f"{xlsx_declaration}"
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">%s<Relationship Id="rId%d" '
+    f'Type="{xlsx_relationships_namespace}/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+xlsx_sheet_relationship = (
+    '<Relationship Id="rId%d" '
+    f'Type="{xlsx_relationships_namespace}/worksheet" '
+    'Target="worksheets/sheet%d.xml"/>'
+)
+
+xlsx_styles = (
+    f'{xlsx_declaration}<styleSheet xmlns="{xlsx_main_namespace}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/>'
+    "</border></borders>"
+    '<cellStyleXfs count="1">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    # Date and time, then date
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles></styleSheet>"
+)
+
+
+class Echo:
+    """File-like object returning what is written to it, for `csv.writer`"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_row_converter() -> Callable[[tuple], list]:
+    """Converter of rows to cell values. Times are in the current time zone,
+    without it as Excel has no time zones"""
+    tz = timezone.get_current_timezone()
+
+    def convert(row: tuple) -> list:
+        return [
+            (
+                value.astimezone(tz).replace(tzinfo=None)
+                if isinstance(value, datetime) and value.tzinfo is not None
+                else value
+            )
+            for value in row
+        ]
+
+    return convert
+
+
+def iter_csv(header: Iterable[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """Parts of a CSV file of `rows`"""
+    writer = csv.writer(Echo())
+    convert = get_row_converter()
+    # Byte order mark, for Excel to read the file as UTF-8
+    yield ("\ufeff" + writer.writerow(header)).encode()
+    batch = []
+    for row in rows:
+        batch.append(convert(row))
+        if len(batch) == batch_size:
+            yield "".join(map(writer.writerow, batch)).encode()
+            batch = []
+    if batch:
+        yield "".join(map(writer.writerow, batch)).encode()
+
+
+class ZipSink:
+    """Unseekable file-like object keeping what is written to it until taken,
+    for `zipfile` to write a ZIP file as a stream"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def get_text_cell(value) -> str:
+    text = str(value)
+    if xml_special_characters.search(text):
+        text = text.translate(xml_text_translation)
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def get_number_cell(value: int | float | Decimal) -> str:
+    return f"<c><v>{value}</v></c>"
+
+
+def get_xlsx_cell_getters() -> dict[type, Callable[..., str]]:
+    """Getters of the cell of a value in a sheet's XML, by the value's type.
+    Strings are inlined. Times are in the current time zone, numbered in days
+    from Excel's epoch and styled to show as such"""
+    tz = timezone.get_current_timezone()
+
+    def get_datetime_cell(value: datetime) -> str:
+        if value.tzinfo is not None:
+            value = value.astimezone(tz).replace(tzinfo=None)
+        return f'<c s="1"><v>{(value - excel_epoch) / timedelta(days=1)}</v></c>'
+
+    return {
+        type(None): lambda value: "<c/>",
+        str: get_text_cell,
+        bool: lambda value: f'<c t="b"><v>{int(value)}</v></c>',
+        int: get_number_cell,
+        float: get_number_cell,
+        Decimal: get_number_cell,
+        datetime: get_datetime_cell,
+        date: lambda value: (
+            f'<c s="2"><v>{(value - excel_epoch.date()).days}</v></c>'
+        ),
+    }
+
+
+def get_xlsx_row_converter() -> Callable[[Iterable], str]:
+    """Converter of rows to a sheet's XML. Values of other types than the
+    getters' are written as text"""
+    getters = get_xlsx_cell_getters()
+
+    def get_getter(value) -> Callable[..., str]:
+        # Of the type subclassed, as by string enumerations
+        for cls, get_cell in getters.items():
+            if isinstance(value, cls):
+                return get_cell
+        return get_text_cell
+
+    def convert(row: Iterable) -> str:
+        return "<row>%s</row>" % "".join(
+            [(getters.get(type(value)) or get_getter(value))(value) for value in row]
+        )
+
+    return convert
+
+
+def iter_xlsx(title: str, header: list[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """Parts of an XLSX file of `rows`, taken from its ZIP file as it is
+    written. Rows are compressed into the sheets as they are read, and the
+    parts describing the sheets are written after them"""
+    sink = ZipSink()
+    convert = get_xlsx_row_converter()
+    title = illegal_sheet_title_characters.sub("", title)[:31]
+    header_row = convert(header)
+    titles = []
+    # The fastest compression, about 3 times as fast as the default
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+
+        def open_sheet() -> IO[bytes]:
+            number = len(titles) + 1
+            titles.append(title if number == 1 else f"{title} ({number})")
+            sheet = archive.open(
+                f"xl/worksheets/sheet{number}.xml", "w", force_zip64=True
+            )
+            sheet.write((xlsx_sheet_head + header_row).encode())
+            return sheet
+
+        sheet = None
+        batch = []
+        for count, row in enumerate(rows):
+            if count % xlsx_sheet_rows == 0:
+                if sheet is not None:
+                    sheet.write(("".join(batch) + xlsx_sheet_tail).encode())
+                    sheet.close()
+                    batch = []
+                sheet = open_sheet()
+            batch.append(convert(row))
+            if len(batch) == batch_size:
+                sheet.write("".join(batch).encode())
+                batch = []
+                if part := sink.take():
+                    yield part
+        if sheet is None:
+            sheet = open_sheet()
+        sheet.write(("".join(batch) + xlsx_sheet_tail).encode())
+        sheet.close()
+
+        archive.writestr(
+            "[Content_Types].xml",
+            xlsx_content_types
+            % "".join(
+                xlsx_sheet_content_type % number for number in range(1, len(titles) + 1)
+            ),
+        )
+        archive.writestr("_rels/.rels", xlsx_package_relationships)
+        archive.writestr(
+            "xl/workbook.xml",
+            xlsx_workbook
+            % "".join(
+                xlsx_workbook_sheet % (quoteattr(sheet_title), number, number)
+                for number, sheet_title in enumerate(titles, 1)
+            ),
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            xlsx_workbook_relationships
+            % (
+                "".join(
+                    xlsx_sheet_relationship % (number, number)
+                    for number in range(1, len(titles) + 1)
+                ),
+                len(titles) + 1,
+            ),
+        )
+        archive.writestr("xl/styles.xml", xlsx_styles)
+    yield sink.take()
+
+
+async def aiter_sync(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Parts of `iterator`, read one at a time on the thread running the ORM.
+    Served over ASGI, Django reads synchronous iterators whole before sending
+    the first part"""
+    next_part = sync_to_async(next, thread_sensitive=True)
+    while (part := await next_part(iterator, None)) is not None:
+        yield part
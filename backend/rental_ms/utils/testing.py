@@ -0,0 +1,179 @@
+"""Data and assertions shared by the tests of the apps"""
+
+import re
+from decimal import Decimal
+from unittest import SkipTest
+
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from finance.models import UserAccount
+from management.models import Community, Office
+from rental.models import House, Tenant, UnitGroup
+from users.models import CustomUser
+
+password = make_password("rental-ms")
+"""Hashed once, `CustomUser.save` hashes short (raw) passwords only"""
+
+
+def create_user(number: int, **kwargs) -> CustomUser:
+    """User numbered `number`, with the fields in `kwargs` overridden"""
+    return CustomUser.objects.create(
+        **{
+            "username": f"user{number}",
+            "first_name": "Test",
+            "last_name": f"User{number}",
+            "email": f"user{number}@localhost.domain",
+            "identity_number": number,
+            "phone_number": f"0700{number:06d}",
+            "password": password,
+            **kwargs,
+        }
+    )
+
+
+def create_unit_group(number_of_units: int = 1) -> UnitGroup:
+    """Unit group of a new house in a new community, with its units"""
+    office = Office.objects.create(
+        name="Test Office",
+        manager=create_user(1, is_staff=True),
+        description="<p>Test office</p>",
+        address="1 Test Avenue",
+        contact_number="0711111111",
+        email="office@localhost.domain",
+    )
+    house = House.objects.create(
+        name="Test House",
+        office=office,
+        address="1 Test Street",
+        description="<p>Test house</p>",
+    )
+    house.communities.add(
+        Community.objects.create(
+            name="Test Community",
+            description="Test community",
+            social_media_link="https://t.me/",
+        )
+    )
+    unit_group = UnitGroup(
+        house=house,
+        name="Test Floor",
+        abbreviated_name="TF",
+        description="<p>Test unit group</p>",
+        number_of_units=number_of_units,
+        monthly_rent=Decimal("15000"),
+        deposit_amount=Decimal("15000"),
+    )
+    unit_group.save()
+    return unit_group
+
+
+def create_tenant(number: int = 100, unit=None, **user_fields) -> Tenant:
+    """Tenant occupying `unit`, else the unit of a new unit group"""
+    if unit is None:
+        unit = create_unit_group().units.get()
+    return Tenant.objects.create(user=create_user(number, **user_fields), unit=unit)
+
+
+class QueryPlanTestCase(TestCase):
+    """Asserts the indexes serving queries, on the databases whose `EXPLAIN`
+    names them"""
+
+    @classmethod
+    def setUpClass(cls):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise SkipTest(f"Query plans of {connection.vendor} aren't checked")
+        super().setUpClass()
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Plans the tiny tables of the test database as it would large ones
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan TO off")
+
+    def get_index_name(self, model, field_name: str) -> str:
+        """Name of the index Django made for `model.field_name` (`db_index`)"""
+        column = model._meta.get_field(field_name).column
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        return next(
+            name
+            for name, constraint in constraints.items()
+            if constraint["index"] and constraint["columns"] == [column]
+        )
+
+    def assertUsesIndex(self, queryset: QuerySet, index_name: str):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf"\b{re.escape(index_name)}\b", plan)
+
+
+class AdminTestCase(TestCase):
+    """Requests admin pages as a superuser"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = create_user(2, is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def get_changelist(self, url: str, queries: int) -> ChangeList:
+        """Change list rendered at `url`, asserting the queries it takes"""
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+
+class AdminPageTestCase(AdminTestCase):
+    """Renders admin pages as a superuser, with more users and unit groups than
+    the pages could list"""
+
+    related_objects = 5_000
+
+    max_page_size = 150 * 1024
+    """Bytes, a page listing the related objects is larger"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tenant = create_tenant()
+        accounts = UserAccount.objects.bulk_create(
+            UserAccount() for _ in range(cls.related_objects)
+        )
+        CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f"extra{number}",
+                email=f"extra{number}@localhost.domain",
+                identity_number=50_000_000 + number,
+                phone_number=f"0799{number:06d}",
+                password="!",
+                account=account,
+            )
+            for number, account in enumerate(accounts)
+        )
+        # Created around `UnitGroup.save`, which adds units
+        UnitGroup.objects.bulk_create(
+            UnitGroup(
+                house=cls.tenant.unit.unit_group.house,
+                name=f"Extra Floor {number}",
+                abbreviated_name=f"EF{number}",
+                number_of_units=0,
+                monthly_rent=Decimal("15000"),
+                deposit_amount=Decimal("15000"),
+            )
+            for number in range(cls.related_objects)
+        )
+
+    def assertPageSmall(self, url: str):
+        """Asserts the page at `url` searches the related objects as typed
+        rather than listing them"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.content), self.max_page_size)
+        return response
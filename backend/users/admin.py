@@ -1,4 +1,7 @@
+import re
+
 from django.contrib import admin
+from django.db import models
 from users.models import CustomUser
 
 # Register your models here.
@@ -37,6 +40,7 @@ from django.contrib.auth.models import Group
 # from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationForm
 # from unfold.admin import ModelAdmin
 
+from rental_ms.utils import normalize_phone_number
 from rental_ms.utils.admin import DevelopmentImportExportModelAdmin
 
 
@@ -153,6 +157,23 @@ class CustomUserAdmin(DevelopmentImportExportModelAdmin):
             ),
         ] + super().get_urls()
 
+    def get_search_results(self, request, queryset, search_term):
+        # Whole phone and ID numbers are matched on their indexes, sparing a
+        # scan of every user e.g as they are typed into autocomplete widgets.
+        # Other numbers, e.g parts of usernames, are searched as usual
+        digits = re.sub(r"\D", "", search_term)
+        if re.fullmatch(r"\+?[\d\s().-]+", search_term.strip()) and (
+            7 <= len(digits) <= 15
+        ):
+            conditions = models.Q(identity_number=int(digits))
+            phone_number_e164 = normalize_phone_number(search_term)
+            if phone_number_e164 is not None:
+                conditions |= models.Q(phone_number_e164=phone_number_e164)
+            matches = queryset.filter(conditions)
+            if matches.exists():
+                return matches, False
+        return super().get_search_results(request, queryset, search_term)
+
     # RemovedInDjango60Warning: when the deprecation ends, replace with:
     # def lookup_allowed(self, lookup, value, request):
     def lookup_allowed(self, lookup, value, request=None):
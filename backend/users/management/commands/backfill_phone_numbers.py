@@ -0,0 +1,62 @@
+"""Sets the E.164 phone number of users saved before it was maintained
+
+Needed once after upgrading, and with `--all` after changing
+`PHONE_NUMBER_COUNTRY_CODE` or `PHONE_NUMBER_NATIONAL_LENGTH`. Numbers that
+are no longer valid then have theirs cleared.
+
+Usage:
+    $ python manage.py backfill_phone_numbers
+"""
+
+from django.core.management.base import BaseCommand
+
+from rental_ms.utils import normalize_phone_number
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Sets the E.164 phone number of users from their phone number"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Normalize every user rather than those without the E.164 number",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=2_000, help="Users updated at once"
+        )
+
+    def handle(self, *args, **options):
+        queryset = CustomUser.objects.only(
+            "id", "phone_number", "phone_number_e164"
+        ).order_by("id")
+        if not options["all"]:
+            queryset = queryset.filter(phone_number_e164__isnull=True)
+        updated = invalid = 0
+        last_id = 0
+        while True:
+            # Paged by id as the rows change under the query
+            users = list(queryset.filter(id__gt=last_id)[: options["batch_size"]])
+            if not users:
+                break
+            last_id = users[-1].id
+            changed_users = []
+            for user in users:
+                phone_number_e164 = normalize_phone_number(user.phone_number)
+                if phone_number_e164 is None:
+                    invalid += 1
+                if phone_number_e164 != user.phone_number_e164:
+                    user.phone_number_e164 = phone_number_e164
+                    changed_users.append(user)
+            CustomUser.objects.bulk_update(changed_users, ["phone_number_e164"])
+            updated += len(changed_users)
+        self.stdout.write(
+            self.style.SUCCESS(f"E.164 phone number set for {updated:,} users")
+        )
+        if invalid:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{invalid:,} users have a phone number that isn't one"
+                )
+            )
@@ -0,0 +1,28 @@
+"""Deletes expired password reset tokens
+
+Tokens are only useful until they expire, so without this the table keeps
+growing. They are deleted a batch at a time. Run it periodically, e.g hourly
+from cron:
+
+    0 * * * * cd /path/to/backend && python manage.py purge_expired_tokens
+
+Usage:
+    $ python manage.py purge_expired_tokens
+"""
+
+from django.core.management.base import BaseCommand
+
+from users.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = "Deletes expired password reset tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=5_000, help="Tokens deleted at once"
+        )
+
+    def handle(self, *args, **options):
+        deleted = AuthToken.objects.delete_expired(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted:,} expired tokens"))
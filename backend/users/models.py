@@ -1,14 +1,15 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.translation import gettext as _
 from uuid import uuid4
 from os import path
 from django.core.validators import FileExtensionValidator
 from django.core.validators import RegexValidator
 from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from rental_ms.utils import get_expiry_datetime
 from finance.models import UserAccount
-from rental_ms.utils import EnumWithChoices
+from rental_ms.utils import EnumWithChoices, normalize_phone_number
 
 # Create your models here.
 
@@ -18,6 +19,16 @@ def generate_profile_filepath(instance: "CustomUser", filename: str) -> str:
     return f"user_profile/{instance.id}{custom_filename}"
 
 
+class CustomUserManager(UserManager):
+
+    def filter_by_phone_number(self, phone_number: str) -> models.QuerySet:
+        """Users having `phone_number`, entered in any format"""
+        phone_number_e164 = normalize_phone_number(phone_number)
+        if phone_number_e164 is None:
+            return self.none()
+        return self.filter(phone_number_e164=phone_number_e164)
+
+
 class CustomUser(AbstractUser):
 
     class UserGender(EnumWithChoices):
@@ -75,6 +86,15 @@ class CustomUser(AbstractUser):
         blank=True,
         null=True,
     )
+    phone_number_e164 = models.CharField(
+        max_length=16,
+        verbose_name=_("Phone number (E.164)"),
+        help_text=_("Phone number in E.164 format e.g +254712345678. Set on save"),
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+    )
 
     profile = models.ImageField(
         _("Profile Picture"),
@@ -100,6 +120,8 @@ class CustomUser(AbstractUser):
         unique=True,
     )
 
+    objects = CustomUserManager()
+
     # USERNAME_FIELD = "email"
 
     REQUIRED_FIELDS = (
@@ -118,6 +140,10 @@ class CustomUser(AbstractUser):
             new_account = UserAccount.objects.create()
             new_account.save()
             self.account = new_account
+        self.phone_number_e164 = normalize_phone_number(self.phone_number)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone_number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_number_e164"}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -141,15 +167,58 @@ class CustomUser(AbstractUser):
         )
 
 
+class AuthTokenManager(models.Manager):
+
+    def filter_valid(self, token: str) -> models.QuerySet:
+        """Unexpired tokens matching `token` as entered"""
+        return self.filter(
+            token=AuthToken.hash_token(token), expiry_datetime__gt=timezone.now()
+        )
+
+    def delete_expired(self, batch_size: int = 5_000) -> int:
+        """Deletes expired tokens a batch at a time, sparing long locks of the
+        table, and returns their count"""
+        deleted = 0
+        while True:
+            ids = list(
+                self.filter(expiry_datetime__lte=timezone.now()).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                return deleted
+            deleted += self.filter(id__in=ids).delete()[0]
+
+
 class AuthToken(models.Model):
 
     user = models.OneToOneField(
         CustomUser, on_delete=models.CASCADE, related_name="auth_token"
     )
-    token = models.CharField(help_text=_("auth token value"), max_length=80, null=False)
+    token = models.CharField(
+        help_text=_("auth token value hashed"),
+        max_length=80,
+        null=False,
+        db_index=True,
+    )
     expiry_datetime = models.DateTimeField(
-        help_text=_("Expiry datetime"), null=False, default=get_expiry_datetime
+        help_text=_("Expiry datetime"),
+        null=False,
+        default=get_expiry_datetime,
+        db_index=True,
     )
 
+    objects = AuthTokenManager()
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """HMAC of `token` with the secret key. Tokens are stored hashed, of no
+        use to whoever reads the table"""
+        return salted_hmac("users.AuthToken", token, algorithm="sha256").hexdigest()
+
+    def set_token(self, token: str):
+        self.token = self.hash_token(token)
+        self.expiry_datetime = get_expiry_datetime()
+
     def is_expired(self):
         return timezone.now() > self.expiry_datetime
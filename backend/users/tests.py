@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.contrib.admin import site
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
 
-# Create your tests here.
+from rental_ms.utils.testing import QueryPlanTestCase, create_user
+from users.models import AuthToken, CustomUser
+
+
+class UserAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(100, username="tenant2024555")
+        cls.other_user = create_user(12345678)
+
+    def search(self, term: str) -> list[CustomUser]:
+        queryset, _ = site._registry[CustomUser].get_search_results(
+            RequestFactory().get("/"), CustomUser.objects.all(), term
+        )
+        return list(queryset)
+
+    def test_whole_identity_number_matches_exactly(self):
+        self.assertEqual(self.search("12345678"), [self.other_user])
+
+    def test_whole_phone_number_matches_exactly(self):
+        self.assertEqual(self.search("0700 000 100"), [self.user])
+
+    def test_other_numbers_are_searched_as_usual(self):
+        self.assertEqual(self.search("2024555"), [self.user])
+
+
+class AuthTokenQueryPlanTests(QueryPlanTestCase):
+    def test_reset_token_lookup_uses_token_index(self):
+        self.assertUsesIndex(
+            AuthToken.objects.filter_valid("TOKEN123").select_related("user"),
+            self.get_index_name(AuthToken, "token"),
+        )
+
+    def test_expired_token_sweep_uses_expiry_index(self):
+        self.assertUsesIndex(
+            AuthToken.objects.filter(expiry_datetime__lte=timezone.now()).values_list(
+                "id", flat=True
+            )[:5_000],
+            self.get_index_name(AuthToken, "expiry_datetime"),
+        )